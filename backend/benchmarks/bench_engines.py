@@ -0,0 +1,54 @@
+"""
+Compare commit extraction engines on the same repository.
+
+    python backend/benchmarks/bench_engines.py --commits 2000
+    python backend/benchmarks/bench_engines.py --repo /path/to/repo
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analyzer import ENGINES, GitAnalyzer  # noqa: E402
+from bench_workers import build_repo  # noqa: E402
+
+
+def run(repo_path: str) -> None:
+    baseline = None
+    print(f"{'engine':>10} {'seconds':>10} {'commits/s':>10} {'speedup':>8}")
+    for engine in ENGINES:
+        start = time.perf_counter()
+        commits = GitAnalyzer(repo_path, engine=engine).analyze_commits()
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        print(
+            f"{engine:>10} {elapsed:>10.2f} {len(commits) / elapsed:>10.1f} "
+            f"{baseline / elapsed:>7.2f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repo", help="Existing repository to benchmark")
+    parser.add_argument(
+        "--commits", type=int, default=1000, help="Size of the synthetic repository"
+    )
+    args = parser.parse_args()
+
+    if args.repo:
+        run(args.repo)
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"Building synthetic repository with {args.commits} commits...")
+        build_repo(temp_dir, args.commits)
+        run(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Benchmark suite over synthetic repositories at several scales.
+
+Generates reproducible repositories (see :mod:`synthetic`) for each
+scenario and scale, then times commit extraction, both statistics
+functions, timeline creation and every exporter, recording throughput and
+peak traced memory. Results are written as JSON; pass a previous results
+file with ``--compare`` to fail on regressions:
+
+    python backend/benchmarks/bench_suite.py --scales 1k,10k -o results.json
+    python backend/benchmarks/bench_suite.py --compare results.json
+    python backend/benchmarks/bench_suite.py --scales 100k \\
+        --repo-dir ~/.cache/codevis-bench
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analyzer import GitAnalyzer  # noqa: E402
+from exporter import DataExporter  # noqa: E402
+from synthetic import generate_repo  # noqa: E402
+import vectorized  # noqa: E402
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+# Differences below these are measurement noise, whatever the ratio
+NOISE_FLOOR = {"seconds": 0.01, "peak_bytes": 64 * 1024}
+
+# Scenario -> synthetic.write_history options
+SCENARIOS = {
+    "balanced": {"shape": "balanced"},
+    "wide": {"shape": "wide"},
+    "deep": {"shape": "deep"},
+    "many-authors": {"shape": "balanced", "authors": 5_000},
+}
+
+
+def measure(function: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, Any]:
+    """Time ``function`` (best of ``repeat``) and trace its peak memory."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    result: Dict[str, Any] = {"seconds": round(best, 6)}
+    if memory:
+        # A separate run: tracing slows everything down too much to time
+        tracemalloc.start()
+        try:
+            function()
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def stream_export(timeline_data: Dict[str, Any], path: str, output_format: str):
+    """Write timeline data the way ``analyze_repository`` streams it."""
+    writer = DataExporter.open_timeline_writer(path, output_format)
+    for event in timeline_data["timeline"]:
+        writer.write_event(event)
+    extra = {
+        key: timeline_data[key] for key in ("rollups", "tree") if key in timeline_data
+    }
+    writer.finish(
+        timeline_data["metadata"],
+        timeline_data["contributors"],
+        timeline_data["files"],
+        **extra,
+    )
+
+
+def run_scenario(
+    repo_path: str, commit_count: int, args: argparse.Namespace, work_dir: str
+) -> List[Dict[str, Any]]:
+    """Run every benchmark against one repository."""
+    analyzer = GitAnalyzer(repo_path, engine="numstat")
+    pipelined = GitAnalyzer(repo_path, engine="async", workers=4)
+    commits = analyzer.analyze_commits()
+    store = analyzer.load_commits()
+    contributors = analyzer.get_contributor_stats(commits)
+    files = analyzer.get_file_stats(commits)
+    timeline_data = DataExporter.create_timeline_data(commits, contributors, files)
+
+    benchmarks: Dict[str, Callable[[], Any]] = {
+        "analyze_commits[numstat]": analyzer.analyze_commits,
+        "analyze_commits[async]": pipelined.analyze_commits,
+        "load_commits[numstat]": analyzer.load_commits,
+        "contributor_stats[dicts]": lambda: analyzer.get_contributor_stats(commits),
+        "file_stats[dicts]": lambda: analyzer.get_file_stats(commits),
+        "contributor_stats[store]": lambda: analyzer.get_contributor_stats(store),
+        "file_stats[store]": lambda: analyzer.get_file_stats(store),
+        "create_timeline_data": lambda: DataExporter.create_timeline_data(
+            commits, contributors, files
+        ),
+    }
+    if commit_count <= args.pydriller_limit:
+        pydriller = GitAnalyzer(repo_path)
+        benchmarks["analyze_commits[pydriller]"] = pydriller.analyze_commits
+        if args.complexity:
+            complexity = GitAnalyzer(repo_path, engine="numstat", complexity=True)
+            benchmarks["analyze_commits[numstat+complexity]"] = (
+                complexity.analyze_commits
+            )
+
+    outputs = {
+        "export[json]": os.path.join(work_dir, "timeline.json"),
+        "export[ndjson]": os.path.join(work_dir, "timeline.ndjson"),
+        "export[columnar]": os.path.join(work_dir, "timeline.ctv"),
+    }
+    for name, path in outputs.items():
+        output_format = name[len("export[") : -1]
+        benchmarks[name] = lambda path=path, output_format=output_format: stream_export(
+            timeline_data, path, output_format
+        )
+
+    results = []
+    for name, function in benchmarks.items():
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            result = measure(function, args.repeat, not args.no_memory)
+        result = {"benchmark": name, **result}
+        if result["seconds"] > 0:
+            result["commits_per_second"] = round(commit_count / result["seconds"], 1)
+        if name in outputs:
+            result["output_bytes"] = os.path.getsize(outputs[name])
+        results.append(result)
+        print(
+            f"  {name:<38} {result['seconds']:>9.3f}s "
+            f"{result.get('commits_per_second', 0):>11.1f} commits/s "
+            f"{result.get('peak_bytes', 0) / 2**20:>9.1f} MiB"
+        )
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and code version the results come from."""
+
+    def git_output(*command: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *command],
+                cwd=Path(__file__).resolve().parent,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git": git_output("--version"),
+        "revision": git_output("rev-parse", "HEAD"),
+        "numpy": vectorized.HAVE_NUMPY,
+    }
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline_path: str, tolerance: float
+) -> List[str]:
+    """Return the regressions of ``results`` against a baseline file."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def key(result):
+        return (result["scenario"], result["scale"], result["benchmark"])
+
+    previous = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        label = "/".join(key(result))
+        for metric in ("seconds", "peak_bytes"):
+            if metric in result and old.get(metric):
+                ratio = result[metric] / old[metric]
+                growth = result[metric] - old[metric]
+                if ratio > 1 + tolerance and growth > NOISE_FLOOR[metric]:
+                    regressions.append(
+                        f"{label}: {metric} {old[metric]} -> {result[metric]} "
+                        f"({ratio - 1:+.0%})"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scales",
+        default="1k,10k",
+        help=f"Comma-separated scales to run ({', '.join(SCALES)}; default: 1k,10k)",
+    )
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"Comma-separated scenarios ({', '.join(SCENARIOS)})",
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        help="Only run benchmarks whose name contains this text (repeatable)",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Keep the best of N")
+    parser.add_argument(
+        "--no-memory", action="store_true", help="Skip peak memory measurement"
+    )
+    parser.add_argument(
+        "--pydriller-limit",
+        type=int,
+        default=1_000,
+        help="Largest repository to run the (slow) pydriller engine on",
+    )
+    parser.add_argument(
+        "--complexity",
+        action="store_true",
+        help="Also time complexity analysis (up to --pydriller-limit commits)",
+    )
+    parser.add_argument(
+        "--repo-dir",
+        help="Keep generated repositories here and reuse them on later runs",
+    )
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Results file to check for regressions")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown or memory growth before failing (default: 0.25)",
+    )
+    args = parser.parse_args()
+
+    scales = [scale.strip() for scale in args.scales.split(",") if scale.strip()]
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    for scale in scales:
+        if scale not in SCALES:
+            parser.error(f"unknown scale: {scale}")
+    for name in scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        repo_root = Path(args.repo_dir or temp_dir)
+        for scale in scales:
+            for name in scenarios:
+                repo_path = repo_root / f"{name}-{scale}"
+                if not (repo_path / ".git").exists():
+                    print(f"Generating {name} repository with {scale} commits...")
+                    generate_repo(str(repo_path), SCALES[scale], **SCENARIOS[name])
+                print(f"{name} / {scale}")
+                work_dir = tempfile.mkdtemp(dir=temp_dir)
+                for result in run_scenario(
+                    str(repo_path), SCALES[scale], args, work_dir
+                ):
+                    results.append({"scenario": name, "scale": scale, **result})
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
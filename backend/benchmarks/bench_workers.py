@@ -0,0 +1,89 @@
+"""
+Benchmark commit extraction throughput across worker counts.
+
+Builds a synthetic repository (or uses an existing one) and times
+``GitAnalyzer.analyze_commits`` for increasing ``workers`` values:
+
+    python backend/benchmarks/bench_workers.py --commits 2000
+    python backend/benchmarks/bench_workers.py --repo /path/to/repo
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from git import Repo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analyzer import GitAnalyzer  # noqa: E402
+
+
+def build_repo(path: str, commits: int, files: int = 20) -> None:
+    """Create a repository with ``commits`` commits over ``files`` files."""
+    repo = Repo.init(path)
+    with repo.config_writer() as git_config:
+        git_config.set_value("user", "name", "Bench User")
+        git_config.set_value("user", "email", "bench@example.com")
+
+    for i in range(commits):
+        name = f"module_{i % files}.py"
+        target = Path(path) / name
+        with open(target, "a", encoding="utf-8") as f:
+            f.write(f"value_{i} = {i}\n" * 5)
+        repo.index.add([name])
+        repo.index.commit(f"Commit {i}")
+
+
+def worker_counts(limit: int):
+    """Return 1, 2, 4, ... up to ``limit`` (always including ``limit``)."""
+    counts = []
+    n = 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    counts.append(limit)
+    return counts
+
+
+def run(repo_path: str, max_workers: int) -> None:
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>10} {'commits/s':>10} {'speedup':>8}")
+    for workers in worker_counts(max_workers):
+        start = time.perf_counter()
+        commits = GitAnalyzer(repo_path, workers=workers).analyze_commits()
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        print(
+            f"{workers:>8} {elapsed:>10.2f} {len(commits) / elapsed:>10.1f} "
+            f"{baseline / elapsed:>7.2f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repo", help="Existing repository to benchmark")
+    parser.add_argument(
+        "--commits", type=int, default=1000, help="Size of the synthetic repository"
+    )
+    parser.add_argument(
+        "--max-workers", type=int, default=os.cpu_count() or 1, help="Largest pool"
+    )
+    args = parser.parse_args()
+
+    if args.repo:
+        run(args.repo, args.max_workers)
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"Building synthetic repository with {args.commits} commits...")
+        build_repo(temp_dir, args.commits)
+        run(temp_dir, args.max_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Reproducible synthetic Git repositories for benchmarks.
+
+Histories are generated from a seeded RNG and written with a single
+``git fast-import`` process, so even 100k-commit repositories build in
+seconds and the same parameters always produce the same commit hashes:
+
+    python backend/benchmarks/synthetic.py /tmp/repo --commits 10000 --shape deep
+"""
+
+import argparse
+import random
+import subprocess
+from pathlib import Path
+from typing import IO, Dict, List
+
+SHAPES = ("balanced", "wide", "deep")
+
+# First commit date and average spacing; fixed so hashes are reproducible
+START_TIMESTAMP = 1_500_000_000
+INTERVAL = 3_600
+
+TIMEZONES = ("+0000", "-0500", "+0100", "+0530", "-0800", "+0900")
+
+# Functions kept per file: enough for the complexity parser to chew on,
+# small enough that a 100k-commit history stays cheap to build
+MAX_FUNCTIONS = 8
+
+
+def directory_for(shape: str, rng: random.Random) -> str:
+    """Pick a directory for a new file.
+
+    ``wide`` spreads files over a thousand top-level directories,
+    ``deep`` nests them up to twelve levels down a few chains and
+    ``balanced`` uses a three-level tree with a fan-out of eight.
+    """
+    if shape == "wide":
+        return f"pkg{rng.randrange(1000)}"
+    if shape == "deep":
+        chain = rng.randrange(4)
+        depth = rng.randrange(1, 13)
+        return "/".join(f"c{chain}_level{level}" for level in range(depth))
+    return "/".join(f"d{rng.randrange(8)}" for _ in range(3))
+
+
+def render(functions: List[int]) -> bytes:
+    """Render a Python module made of the given function numbers."""
+    lines = []
+    for n in functions:
+        lines.append(f"def function_{n}(value):")
+        lines.append(f"    if value > {n % 97}:")
+        lines.append(f"        return value - {n % 13}")
+        if n % 3 == 0:
+            lines.append(f"    for item in range({n % 7}):")
+            lines.append("        value += item")
+        lines.append("    return value")
+        lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _data(out: IO[bytes], payload: bytes) -> None:
+    out.write(b"data %d\n" % len(payload))
+    out.write(payload)
+    out.write(b"\n")
+
+
+def write_history(
+    out: IO[bytes],
+    commits: int,
+    shape: str = "balanced",
+    authors: int = 20,
+    files_per_commit: int = 3,
+    seed: int = 0,
+) -> None:
+    """Write a ``git fast-import`` stream for a synthetic history to ``out``.
+
+    Each commit modifies, adds, renames or deletes a few files; authors
+    follow a skewed distribution (a few authors make most commits).
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape: {shape} (expected one of {SHAPES})")
+    rng = random.Random(seed)
+    files: Dict[str, List[int]] = {}  # path -> function numbers
+    paths: List[str] = []  # live paths, for O(1) random choice
+    next_function = 0
+    next_file = 0
+
+    for index in range(commits):
+        author = min(int(rng.paretovariate(1.2)) - 1, authors - 1)
+        timezone = TIMEZONES[author % len(TIMEZONES)]
+        timestamp = START_TIMESTAMP + index * INTERVAL + rng.randrange(INTERVAL)
+        identity = (
+            f"Author {author} <author{author}@example.com> {timestamp} {timezone}"
+        )
+
+        out.write(b"commit refs/heads/main\n")
+        out.write(f"author {identity}\ncommitter {identity}\n".encode("utf-8"))
+        _data(out, f"Change {index}\n\nSynthetic commit {index}.\n".encode("utf-8"))
+
+        for _ in range(rng.randint(1, files_per_commit)):
+            roll = rng.random()
+            if not paths or roll < 0.15:
+                path = f"{directory_for(shape, rng)}/module_{next_file}.py"
+                next_file += 1
+                files[path] = []
+                paths.append(path)
+            elif roll < 0.17 and len(paths) > 1:
+                slot = rng.randrange(len(paths))
+                old = paths[slot]
+                new = f"{directory_for(shape, rng)}/module_{next_file}.py"
+                next_file += 1
+                files[new] = files.pop(old)
+                paths[slot] = new
+                out.write(f"R {old} {new}\n".encode("utf-8"))
+                continue
+            elif roll < 0.18 and len(paths) > 1:
+                slot = rng.randrange(len(paths))
+                path = paths[slot]
+                paths[slot] = paths[-1]
+                paths.pop()
+                del files[path]
+                out.write(f"D {path}\n".encode("utf-8"))
+                continue
+            else:
+                path = paths[rng.randrange(len(paths))]
+
+            functions = files[path]
+            functions.append(next_function)
+            next_function += 1
+            if len(functions) > MAX_FUNCTIONS:
+                del functions[rng.randrange(len(functions))]
+            out.write(f"M 100644 inline {path}\n".encode("utf-8"))
+            _data(out, render(functions))
+        out.write(b"\n")
+
+
+def generate_repo(path: str, commits: int, **options) -> str:
+    """Create a synthetic repository at ``path`` and return its HEAD hash.
+
+    ``options`` are passed on to :func:`write_history`.
+    """
+    Path(path).mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q", path], check=True)
+    subprocess.run(
+        ["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=path, check=True
+    )
+    process = subprocess.Popen(
+        ["git", "fast-import", "--quiet"], cwd=path, stdin=subprocess.PIPE
+    )
+    try:
+        write_history(process.stdin, commits, **options)
+    finally:
+        process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError(f"git fast-import failed ({process.returncode})")
+    # Check out the final tree so the repository looks like a normal clone
+    subprocess.run(["git", "reset", "-q", "--hard"], cwd=path, check=True)
+    return subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=path,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", help="Directory to create the repository in")
+    parser.add_argument("--commits", type=int, default=1000)
+    parser.add_argument("--shape", choices=SHAPES, default="balanced")
+    parser.add_argument("--authors", type=int, default=20)
+    parser.add_argument("--files-per-commit", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    head = generate_repo(
+        args.path,
+        args.commits,
+        shape=args.shape,
+        authors=args.authors,
+        files_per_commit=args.files_per_commit,
+        seed=args.seed,
+    )
+    print(f"Created {args.path} with {args.commits} commits (HEAD {head})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Single-pass aggregation of commit data into timeline statistics.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+try:
+    from .identity import IdentityTable
+    from .rollups import RollupBuilder
+    from .tree import DirectoryTree
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from identity import IdentityTable
+    from rollups import RollupBuilder
+    from tree import DirectoryTree
+
+
+def _merge_file_stats(target: Dict[str, Any], other: Dict[str, Any]) -> None:
+    """Fold the file record ``other`` into ``target``."""
+    target["changes"] += other["changes"]
+    target["lines_added"] += other["lines_added"]
+    target["lines_removed"] += other["lines_removed"]
+    target["authors"] |= other["authors"]
+    target["first_change"] = min(target["first_change"], other["first_change"])
+    target["last_change"] = max(target["last_change"], other["last_change"])
+    target["previous_paths"].extend(other["previous_paths"])
+
+
+class LiveFileSet:
+    """Tracks the set of paths that exist after each commit.
+
+    Each commit's ADD/DELETE/RENAME/COPY changes are applied to a single set
+    of live paths, so updating costs O(changes) and memory is bounded by the
+    size of the current tree rather than by a snapshot per commit.
+    """
+
+    def __init__(self):
+        """Start from an empty tree."""
+        self.paths: Set[str] = set()
+
+    def apply(self, files_changed: Iterable[Dict[str, Any]]) -> None:
+        """Apply one commit's file changes."""
+        for change in files_changed:
+            change_type = change["change_type"]
+            old_path, new_path = change["old_path"], change["new_path"]
+
+            if change_type == "DELETE":
+                self.paths.discard(old_path)
+                continue
+            if change_type == "RENAME" and old_path != new_path:
+                self.paths.discard(old_path)
+            # ADD, COPY, MODIFY and UNKNOWN all leave new_path in the tree;
+            # adding is idempotent, which also covers histories that start
+            # with files that were never seen being added.
+            if new_path is not None:
+                self.paths.add(new_path)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+
+class TimelineAggregator:
+    """Accumulates contributor stats, file stats, rollups, the directory tree
+    and timeline events.
+
+    Commits are consumed one at a time (oldest first), so memory is bounded
+    by the aggregates rather than by the length of the history. Authors are
+    interned into ``identities`` and aggregated by integer identity id.
+    """
+
+    def __init__(self, identities: Optional[IdentityTable] = None):
+        """Initialize empty aggregates."""
+        self.identities = identities or IdentityTable()
+        # identity id -> stats
+        self.contributors: Dict[int, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.total_commits = 0
+        self.cumulative_lines = 0
+        self.first_datetime: Optional[str] = None
+        self.last_datetime: Optional[str] = None
+        self.rollups = RollupBuilder()
+        self.live_files = LiveFileSet()
+        self.tree = DirectoryTree()
+
+    def add(self, commit: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold a commit into the aggregates and return its timeline event.
+
+        The event carries the author's canonical name and email; together
+        they identify the contributor (see :meth:`event_author_key`).
+        """
+        author = self.identities.resolve(commit["author"], commit["email"])
+        self.add_contributor(commit)
+        self.add_files(commit)
+        self.rollups.add(commit, author)
+        self.tree.add(commit, author)
+        self.live_files.apply(commit["files_changed"])
+
+        self.total_commits += 1
+        self.cumulative_lines += commit["lines_added"] - commit["lines_removed"]
+        if self.first_datetime is None:
+            self.first_datetime = commit["datetime"]
+        self.last_datetime = commit["datetime"]
+
+        return {
+            "timestamp": commit["timestamp"],
+            "datetime": commit["datetime"],
+            "commit_hash": commit["hash"],
+            "author": commit["author"],
+            "email": commit["email"],
+            "message": commit["message"],
+            "files_changed": commit["files_changed"],
+            "lines_added": commit["lines_added"],
+            "lines_removed": commit["lines_removed"],
+            "cumulative_lines": self.cumulative_lines,
+            "cumulative_files": len(self.live_files),
+        }
+
+    def add_contributor(self, commit: Dict[str, Any]) -> None:
+        """Update contributor statistics with a commit."""
+        author = self.identities.resolve(commit["author"], commit["email"])
+        timestamp = commit["timestamp"]
+
+        stats = self.contributors.get(author)
+        if stats is None:
+            stats = self.contributors[author] = {
+                "email": self.identities.emails[author],
+                "commits": 0,
+                "lines_added": 0,
+                "lines_removed": 0,
+                "files_changed": 0,
+                "first_commit": timestamp,
+                "last_commit": timestamp,
+            }
+
+        stats["commits"] += 1
+        stats["lines_added"] += commit["lines_added"]
+        stats["lines_removed"] += commit["lines_removed"]
+        stats["files_changed"] += commit["total_files"]
+        if timestamp < stats["first_commit"]:
+            stats["first_commit"] = timestamp
+        if timestamp > stats["last_commit"]:
+            stats["last_commit"] = timestamp
+
+    def add_files(self, commit: Dict[str, Any]) -> None:
+        """Update file statistics with the files a commit touched.
+
+        Stats are keyed by full path. A rename moves the file's record to
+        its new path (recording the old one in ``previous_paths``), so a
+        file's history stays continuous across renames; renaming onto a path
+        that already has a record merges the two.
+        """
+        author = self.identities.resolve(commit["author"], commit["email"])
+        timestamp = commit["timestamp"]
+
+        for file_change in commit["files_changed"]:
+            old_path, new_path = file_change["old_path"], file_change["new_path"]
+            path = new_path or old_path or file_change["filename"]
+
+            if (
+                file_change["change_type"] == "RENAME"
+                and old_path in self.files
+                and old_path != new_path
+            ):
+                moved = self.files.pop(old_path)
+                moved["previous_paths"].append(old_path)
+                if path in self.files:
+                    _merge_file_stats(self.files[path], moved)
+                else:
+                    self.files[path] = moved
+
+            stats = self.files.get(path)
+            if stats is None:
+                stats = self.files[path] = {
+                    "changes": 0,
+                    "lines_added": 0,
+                    "lines_removed": 0,
+                    "authors": set(),
+                    "first_change": timestamp,
+                    "last_change": timestamp,
+                    "previous_paths": [],
+                }
+
+            stats["changes"] += 1
+            stats["lines_added"] += file_change["lines_added"]
+            stats["lines_removed"] += file_change["lines_removed"]
+            stats["authors"].add(author)
+            if timestamp < stats["first_change"]:
+                stats["first_change"] = timestamp
+            if timestamp > stats["last_change"]:
+                stats["last_change"] = timestamp
+
+    def contributor_stats(self, authors: Iterable[int] = None) -> Dict[str, Any]:
+        """Return the contributor statistics keyed by identity label.
+
+        ``authors`` (identity ids) limits the result to those contributors.
+        """
+        labels = self.identities.labels()
+        if authors is None:
+            authors = self.contributors
+        return {labels[author]: self.contributors[author] for author in authors}
+
+    def file_stats(self, paths: Iterable[str] = None) -> Dict[str, Any]:
+        """Return the file statistics keyed by path, with author sets as
+        lists of identity labels for JSON.
+
+        ``paths`` limits the result to those of the given paths that have
+        statistics.
+        """
+        labels = self.identities.labels()
+        if paths is None:
+            paths = self.files
+        return {
+            path: dict(
+                stats,
+                authors=[labels[author] for author in stats["authors"]],
+                previous_paths=list(stats["previous_paths"]),
+            )
+            for path, stats in ((path, self.files.get(path)) for path in paths)
+            if stats is not None
+        }
+
+    def metadata(self) -> Dict[str, Any]:
+        """Return the timeline metadata for the commits seen so far."""
+        return {
+            "total_commits": self.total_commits,
+            "total_contributors": len(self.contributors),
+            "total_files": len(self.files),
+            "date_range": {
+                "start": self.first_datetime,
+                "end": self.last_datetime,
+            },
+        }
+
+    def timeline_data(self, timeline_events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the complete timeline data structure for visualization."""
+        return {
+            "metadata": self.metadata(),
+            "timeline": timeline_events,
+            "contributors": self.contributor_stats(),
+            "files": self.file_stats(),
+            "rollups": self.rollups.to_dict(),
+            "tree": self.tree.to_dict(),
+        }
@@ -0,0 +1,425 @@
+"""
+Indexed SQLite database of an analysis, for ad-hoc queries.
+
+:func:`analyze_repository` can write every commit, file change,
+contributor and file into a database next to the timeline file. The
+common aggregates (top files, top authors, activity over time) are then
+answered by indexed queries over the relevant time range instead of a
+scan over the whole timeline:
+
+    db = AnalysisDatabase("analysis.sqlite")
+    db.top_files(start=time.time() - 90 * 86400, limit=20)
+    db.activity("week", by_author=True)
+
+The database is a plain SQLite file; any SQLite client can query it too.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+SCHEMA_VERSION = "1"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT);
+CREATE TABLE paths (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE);
+CREATE TABLE commits (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    author_id INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    datetime TEXT NOT NULL,
+    message TEXT NOT NULL,
+    lines_added INTEGER NOT NULL,
+    lines_removed INTEGER NOT NULL,
+    files_changed INTEGER NOT NULL
+);
+CREATE TABLE changes (
+    commit_id INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    author_id INTEGER NOT NULL,
+    path_id INTEGER NOT NULL,
+    old_path_id INTEGER,
+    change_type TEXT NOT NULL,
+    lines_added INTEGER NOT NULL,
+    lines_removed INTEGER NOT NULL,
+    complexity INTEGER
+);
+CREATE TABLE contributors (
+    author_id INTEGER PRIMARY KEY,
+    commits INTEGER NOT NULL,
+    lines_added INTEGER NOT NULL,
+    lines_removed INTEGER NOT NULL,
+    files_changed INTEGER NOT NULL,
+    first_commit REAL,
+    last_commit REAL
+);
+CREATE TABLE files (
+    path_id INTEGER PRIMARY KEY,
+    changes INTEGER NOT NULL,
+    lines_added INTEGER NOT NULL,
+    lines_removed INTEGER NOT NULL,
+    authors INTEGER NOT NULL,
+    first_change REAL,
+    last_change REAL
+);
+"""
+
+# Created after the bulk load, which is much faster than maintaining them
+# row by row. The time-ordered change index covers the top-files query.
+INDEXES = """
+CREATE INDEX commits_hash ON commits (hash);
+CREATE INDEX commits_time ON commits (timestamp);
+CREATE INDEX commits_author ON commits (author_id, timestamp);
+CREATE INDEX changes_time
+    ON changes (timestamp, path_id, lines_added, lines_removed);
+CREATE INDEX changes_path ON changes (path_id, timestamp);
+CREATE INDEX changes_author ON changes (author_id, timestamp);
+CREATE INDEX changes_commit ON changes (commit_id);
+"""
+
+# SQLite modifiers turning a Unix time into the start of its bucket; weeks
+# start on Monday and months on the first, as in :mod:`rollups`
+BUCKET_MODIFIERS = {
+    "day": "'start of day'",
+    "week": "'start of day', '-6 days', 'weekday 1'",
+    "month": "'start of month'",
+}
+
+MAX_LIMIT = 1000
+
+
+class AnalysisDatabaseWriter:
+    """Writes an analysis into a new database, one commit at a time.
+
+    The database is built in a temporary file that replaces ``path`` in
+    :meth:`finish`, so readers never see a half-written analysis.
+    """
+
+    BATCH = 2000
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.temp_path = f"{path}.tmp"
+        if os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+        self.conn = sqlite3.connect(self.temp_path)
+        # A crash leaves only the temporary file behind: skip the journal
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.executescript(SCHEMA)
+        self.paths: Dict[str, int] = {}
+        self.commit_count = 0
+        self._commits: List[Tuple] = []
+        self._changes: List[Tuple] = []
+        self._new_paths: List[Tuple[int, str]] = []
+
+    def _path_id(self, path: Optional[str]) -> Optional[int]:
+        if path is None:
+            return None
+        path_id = self.paths.get(path)
+        if path_id is None:
+            path_id = self.paths[path] = len(self.paths)
+            self._new_paths.append((path_id, path))
+        return path_id
+
+    def add(self, commit: Dict[str, Any], author_id: int) -> None:
+        """Add an extracted commit by the identity ``author_id``."""
+        commit_id = self.commit_count
+        self.commit_count += 1
+        timestamp = commit["timestamp"]
+        self._commits.append(
+            (
+                commit_id,
+                commit["hash"],
+                author_id,
+                timestamp,
+                commit["datetime"],
+                commit["message"],
+                commit["lines_added"],
+                commit["lines_removed"],
+                commit["total_files"],
+            )
+        )
+        for change in commit["files_changed"]:
+            path = change["new_path"] or change["old_path"] or change["filename"]
+            old_path = change["old_path"]
+            self._changes.append(
+                (
+                    commit_id,
+                    timestamp,
+                    author_id,
+                    self._path_id(path),
+                    self._path_id(old_path) if old_path != path else None,
+                    change["change_type"],
+                    change["lines_added"],
+                    change["lines_removed"],
+                    change["complexity"],
+                )
+            )
+        if len(self._commits) >= self.BATCH:
+            self._flush()
+
+    def _flush(self) -> None:
+        self.conn.executemany("INSERT INTO paths VALUES (?, ?)", self._new_paths)
+        self.conn.executemany(
+            "INSERT INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self._commits
+        )
+        self.conn.executemany(
+            "INSERT INTO changes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self._changes
+        )
+        self._new_paths.clear()
+        self._commits.clear()
+        self._changes.clear()
+
+    def finish(self, aggregator, metadata: Dict[str, Any]) -> None:
+        """Write the aggregates of ``aggregator``, index and publish."""
+        self._flush()
+        identities = aggregator.identities
+        self.conn.executemany(
+            "INSERT INTO authors VALUES (?, ?, ?)",
+            (
+                (author_id, label, identities.emails[author_id])
+                for author_id, label in enumerate(identities.labels())
+            ),
+        )
+        self.conn.executemany(
+            "INSERT INTO contributors VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    author_id,
+                    stats["commits"],
+                    stats["lines_added"],
+                    stats["lines_removed"],
+                    stats["files_changed"],
+                    stats["first_commit"],
+                    stats["last_commit"],
+                )
+                for author_id, stats in aggregator.contributors.items()
+            ),
+        )
+        self.conn.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    self._path_id(path),
+                    stats["changes"],
+                    stats["lines_added"],
+                    stats["lines_removed"],
+                    len(stats["authors"]),
+                    stats["first_change"],
+                    stats["last_change"],
+                )
+                for path, stats in aggregator.files.items()
+            ),
+        )
+        # Paths only known from the file records (e.g. previous names)
+        self.conn.executemany("INSERT INTO paths VALUES (?, ?)", self._new_paths)
+        self._new_paths.clear()
+        self.conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("version", SCHEMA_VERSION), ("metadata", json.dumps(metadata))],
+        )
+        self.conn.executescript(INDEXES)
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+        self.conn.close()
+        os.replace(self.temp_path, self.path)
+
+    def close(self) -> None:
+        """Abandon an unfinished database."""
+        try:
+            self.conn.close()
+        finally:
+            if os.path.exists(self.temp_path):
+                os.unlink(self.temp_path)
+
+
+def _bucket(resolution: str) -> str:
+    modifiers = BUCKET_MODIFIERS.get(resolution)
+    if modifiers is None:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    return f"CAST(strftime('%s', timestamp, 'unixepoch', {modifiers}) AS REAL)"
+
+
+def _limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return 20
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+class AnalysisDatabase:
+    """Read-only query API over a database written by
+    :class:`AnalysisDatabaseWriter`.
+
+    Every query takes an optional time range (``start``/``end``, Unix
+    times, inclusive) and ``path``, a file or directory to restrict the
+    query to. Each thread gets its own connection, reopened when the file
+    is replaced by a newer analysis.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise ValueError(f"Analysis database not found: {path}")
+        self.path = path
+        self._local = threading.local()
+        version = self._query("SELECT value FROM meta WHERE key = 'version'")
+        if not version or version[0]["value"] != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported analysis database: {path}")
+
+    @property
+    def generation(self) -> Tuple[int, int]:
+        """Identifies the analysis in the file; changes when it is replaced."""
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _connection(self) -> sqlite3.Connection:
+        signature = self.generation
+        local = self._local
+        if getattr(local, "signature", None) != signature:
+            if getattr(local, "conn", None) is not None:
+                local.conn.close()
+            local.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            local.conn.row_factory = sqlite3.Row
+            local.signature = signature
+        return local.conn
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._connection().execute(sql, params)]
+
+    def _filters(
+        self,
+        start: Optional[float],
+        end: Optional[float],
+        path: Optional[str],
+        author: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause shared by the queries."""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(end)
+        if path:
+            prefix = path.rstrip("/")
+            # The path itself or anything below it, as an index range
+            clauses.append(
+                "path_id IN (SELECT id FROM paths "
+                "WHERE path = ? OR (path >= ? AND path < ?))"
+            )
+            params += [prefix, prefix + "/", prefix + "0"]
+        if author is not None:
+            clauses.append("author_id IN (SELECT id FROM authors WHERE name = ?)")
+            params.append(author)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def metadata(self) -> Dict[str, Any]:
+        """Return the metadata of the analysis."""
+        rows = self._query("SELECT value FROM meta WHERE key = 'metadata'")
+        return json.loads(rows[0]["value"]) if rows else {}
+
+    def top_files(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        path: Optional[str] = None,
+        limit: Optional[int] = 20,
+        order: str = "churn",
+    ) -> List[Dict[str, Any]]:
+        """Return the files with the most ``churn`` (lines added plus
+        removed) or ``changes`` in the range."""
+        if order not in ("churn", "changes"):
+            raise ValueError(f"Unknown order: {order}")
+        where, params = self._filters(start, end, path)
+        return self._query(
+            "SELECT paths.path, top.changes, top.lines_added, top.lines_removed, "
+            "top.churn FROM ("
+            "SELECT path_id, COUNT(*) AS changes, SUM(lines_added) AS lines_added, "
+            "SUM(lines_removed) AS lines_removed, "
+            "SUM(lines_added + lines_removed) AS churn "
+            f"FROM changes{where} GROUP BY path_id "
+            f"ORDER BY {order} DESC, path_id LIMIT ?) AS top "
+            "JOIN paths ON paths.id = top.path_id "
+            f"ORDER BY top.{order} DESC, top.path_id",
+            (*params, _limit(limit)),
+        )
+
+    def top_authors(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        path: Optional[str] = None,
+        limit: Optional[int] = 20,
+        order: str = "commits",
+    ) -> List[Dict[str, Any]]:
+        """Return the authors with the most ``commits`` or ``churn`` in the
+        range (counting only changes under ``path`` if given)."""
+        if order not in ("commits", "churn"):
+            raise ValueError(f"Unknown order: {order}")
+        where, params = self._filters(start, end, path)
+        table = "changes" if path else "commits"
+        commits = "COUNT(DISTINCT commit_id)" if path else "COUNT(*)"
+        return self._query(
+            "SELECT authors.name AS author, authors.email, top.commits, "
+            "top.lines_added, top.lines_removed, top.churn FROM ("
+            f"SELECT author_id, {commits} AS commits, "
+            "SUM(lines_added) AS lines_added, SUM(lines_removed) AS lines_removed, "
+            "SUM(lines_added + lines_removed) AS churn "
+            f"FROM {table}{where} GROUP BY author_id "
+            f"ORDER BY {order} DESC, author_id LIMIT ?) AS top "
+            "JOIN authors ON authors.id = top.author_id "
+            f"ORDER BY top.{order} DESC, top.author_id",
+            (*params, _limit(limit)),
+        )
+
+    def activity(
+        self,
+        resolution: str = "week",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        path: Optional[str] = None,
+        author: Optional[str] = None,
+        by_author: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Return commits and lines per ``day``, ``week`` or ``month``.
+
+        With ``by_author`` there is one row per bucket and author; ``author``
+        restricts the counts to one contributor.
+        """
+        bucket = _bucket(resolution)
+        where, params = self._filters(start, end, path, author)
+        table = "changes" if path else "commits"
+        commits = "COUNT(DISTINCT commit_id)" if path else "COUNT(*)"
+        group = "bucket, author_id" if by_author else "bucket"
+        rows = self._query(
+            f"SELECT {bucket} AS bucket, "
+            f"{'author_id, ' if by_author else ''}{commits} AS commits, "
+            "SUM(lines_added) AS lines_added, SUM(lines_removed) AS lines_removed "
+            f"FROM {table}{where} GROUP BY {group} ORDER BY {group}",
+            tuple(params),
+        )
+        names = self._author_names() if by_author else None
+        for row in rows:
+            row["start"] = row.pop("bucket")
+            row["date"] = (
+                datetime.fromtimestamp(row["start"], timezone.utc).date().isoformat()
+            )
+            if by_author:
+                row["author"] = names[row.pop("author_id")]
+        return rows
+
+    def _author_names(self) -> Dict[int, str]:
+        return {
+            row["id"]: row["name"]
+            for row in self._query("SELECT id, name FROM authors")
+        }
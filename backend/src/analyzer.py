@@ -2,58 +2,452 @@
 Git repository analyzer for codebase timeline visualization.
 """
 
-from typing import List, Dict, Any
-from git import Repo
-from pydriller import Repository
+import itertools
+import math
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Dict, Any, Deque, Iterable, Iterator, Optional
+from git import GitCommandError, Repo
+from pydriller import Git
+
+try:
+    from .aggregator import TimelineAggregator
+    from .cache import CommitCache, ComplexityCache
+    from .complexity import ComplexityResolver
+    from .gitlog import iter_log_commits, path_scope, pathspecs
+    from .identity import IdentityTable, Mailmap
+    from .pipeline import iter_pipelined_commits
+    from .profiling import NULL_PROFILER, Profiler
+    from .store import CommitStore
+    from . import vectorized
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from aggregator import TimelineAggregator
+    from cache import CommitCache, ComplexityCache
+    from complexity import ComplexityResolver
+    from gitlog import iter_log_commits, path_scope, pathspecs
+    from identity import IdentityTable, Mailmap
+    from pipeline import iter_pipelined_commits
+    from profiling import NULL_PROFILER, Profiler
+    from store import CommitStore
+    import vectorized
+
+ENGINES = ("pydriller", "numstat", "async")
+
+
+# Per-process analyzer used by pool workers, created by _init_worker
+_worker_analyzer = None
+
+
+def _init_worker(repo_path: str, options: Dict[str, Any], open_lock) -> None:
+    """Give each pool worker its own analyzer (and Repo handle)."""
+    global _worker_analyzer
+    _worker_analyzer = GitAnalyzer(repo_path, **options)
+    engine = _worker_analyzer.engine
+    if engine == "pydriller":
+        # pydriller writes to .git/config when opening a repository, which
+        # fails if several workers hold the config lock at the same time.
+        with open_lock:
+            _worker_analyzer._pydriller_git()
+
+
+def _extract_chunk(hashes: List[str]) -> List[Dict[str, Any]]:
+    """Extract a slice of commits inside a pool worker."""
+    return _worker_analyzer._extract_hashes(hashes)
+
+
+def _normalize_paths(paths: Iterable[str]) -> List[str]:
+    """Turn user-supplied path filters into repository-relative paths."""
+    normalized = []
+    for path in paths:
+        path = path.replace("\\", "/").strip("/")
+        while path.startswith("./"):
+            path = path[2:]
+        if path and path != ".":
+            normalized.append(path)
+    return normalized
 
 
 class GitAnalyzer:
     """Analyzes Git repository history and extracts timeline data."""
 
-    def __init__(self, repo_path: str):
-        """Initialize analyzer with repository path."""
+    CACHE_FLUSH_SIZE = 1000
+    # Smallest slice of history handed to a pool worker
+    MIN_CHUNK_SIZE = 50
+
+    def __init__(
+        self,
+        repo_path: str,
+        use_cache: bool = False,
+        cache_dir: Optional[str] = None,
+        workers: int = 1,
+        engine: str = "pydriller",
+        mailmap: bool = True,
+        alias_files: Iterable[str] = (),
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        from_commit: Optional[str] = None,
+        to_commit: Optional[str] = None,
+        include_paths: Iterable[str] = (),
+        exclude_paths: Iterable[str] = (),
+        complexity: bool = False,
+        profiler: Profiler = NULL_PROFILER,
+    ):
+        """Initialize analyzer with repository path.
+
+        When ``use_cache`` is set, extracted commits are persisted in a
+        :class:`CommitCache` (inside ``.git`` unless ``cache_dir`` is given)
+        and later runs only extract commits that are not cached yet.
+        With ``workers`` > 1, commits are extracted in a process pool.
+
+        ``engine`` selects how commits are extracted: ``"pydriller"`` builds
+        full diffs, ``"numstat"`` parses ``git log --numstat --raw`` output
+        from a single git process, which is much faster. ``"async"`` gives
+        the same commits as ``"numstat"`` from an asyncio pipeline (see
+        :mod:`pipeline`) that overlaps git I/O with parsing; there
+        ``workers`` is the number of concurrent git processes instead of
+        pool workers.
+
+        File complexity is only computed with ``complexity`` set (it is None
+        otherwise). Results are cached by blob SHA, so each distinct file
+        content is parsed once; with ``use_cache`` they are also kept in a
+        size-bounded :class:`ComplexityCache` shared by later runs.
+
+        Commit listing and the parts of extraction that run in this process
+        are timed as ``extract.*`` spans of ``profiler`` (see
+        :mod:`profiling`); pool workers are not instrumented.
+
+        Authors are resolved to identities through the repository's
+        ``.mailmap`` (unless ``mailmap`` is false) and any ``alias_files``
+        in the same format; commits carry the canonical name and email.
+
+        The analysis can be bounded to part of the history; git does the
+        filtering, so the rest of the history is never extracted:
+
+        - ``since``/``until``: commit dates, in any format ``git log
+          --since`` accepts (``"90 days ago"``, ``"2024-01-31"``, ...).
+        - ``from_commit``/``to_commit``: the range of commits reachable from
+          ``to_commit`` (default ``HEAD``) that descend from, or are,
+          ``from_commit``.
+        - ``include_paths``/``exclude_paths``: files or directories (literal
+          paths, relative to the repository root). Only commits touching
+          the selected paths are analyzed and only changes to them are
+          reported; renames into or out of them are still detected.
+        """
+        if engine not in ENGINES:
+            raise ValueError(
+                f"Unknown engine: {engine} (expected one of {', '.join(ENGINES)})"
+            )
+
         self.repo_path = repo_path
         self.repo = Repo(repo_path)
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.workers = max(1, workers)
+        self.engine = engine
+        self.since = since
+        self.until = until
+        self.from_commit = from_commit
+        self.to_commit = to_commit
+        self.include_paths = _normalize_paths(include_paths)
+        self.exclude_paths = _normalize_paths(exclude_paths)
+        self.pathspecs = pathspecs(self.include_paths, self.exclude_paths)
+        self.scope = path_scope(self.include_paths, self.exclude_paths)
+        self.complexity = complexity
+        self.profiler = profiler
+        self.identities = IdentityTable(
+            Mailmap.load(repo_path if mailmap else None, alias_files)
+        )
+        self._git = None
 
     def analyze_commits(self) -> List[Dict[str, Any]]:
-        """Analyze all commits in the repository."""
-        commits_data = []
+        """Analyze all commits in the repository, oldest first."""
+        return list(self.iter_commits())
+
+    def load_commits(self) -> CommitStore:
+        """Analyze all commits into a compact :class:`CommitStore`.
+
+        Prefer this over :meth:`analyze_commits` for large histories: the
+        store keeps commits in typed arrays instead of per-commit dicts.
+        """
+        return CommitStore(self.iter_commits())
+
+    def iter_commits(
+        self, hashes: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield extracted commits one at a time, oldest first.
+
+        Commits are ordered by author date before extraction, so only a
+        bounded number of extracted commits is held in memory at a time.
+        ``hashes`` (as returned by :meth:`list_commits_by_date`) selects the
+        commits to extract instead of the whole analyzed history.
+        """
+        prune = hashes is None and not self.bounded
+        if hashes is None:
+            with self.profiler.span("extract.list"):
+                hashes = self.list_commits_by_date()
+
+        if self.use_cache:
+            commits = self._iter_commits_cached(hashes, prune)
+        else:
+            commits = itertools.chain.from_iterable(self._iter_extracted(hashes))
+
+        identities = self.identities
+        for commit in commits:
+            # The cache keeps raw identities, so mailmap edits apply to it
+            author = identities.resolve(commit["author"], commit["email"])
+            commit["author"] = identities.names[author]
+            commit["email"] = identities.emails[author]
+            yield commit
+
+    def open_cache(self) -> CommitCache:
+        """Open the persistent commit cache for this repository."""
+        # The async engine extracts exactly what the numstat engine does
+        engine = "numstat" if self.engine == "async" else self.engine
+        return CommitCache.for_repository(
+            self.repo.git_dir,
+            self.repo_path,
+            cache_dir=self.cache_dir,
+            scope="\0".join(self.pathspecs),
+            fingerprint=f"{engine}:complexity={int(self.complexity)}",
+        )
+
+    def complexity_resolver(self) -> ComplexityResolver:
+        """Create the resolver used to compute file complexity."""
+        cache = None
+        if self.use_cache:
+            cache = ComplexityCache.for_repository(
+                self.repo.git_dir, cache_dir=self.cache_dir
+            )
+        return ComplexityResolver(self.repo_path, cache, self.profiler)
+
+    @property
+    def bounded(self) -> bool:
+        """Whether the analysis covers only a date or commit range."""
+        return any((self.since, self.until, self.from_commit, self.to_commit))
 
-        for commit in Repository(self.repo_path).traverse_commits():
-            commit_data = self._extract_commit_data(commit)
-            commits_data.append(commit_data)
+    def log_args(self, exclude: Iterable[str] = ()) -> List[str]:
+        """Return the ``git log`` arguments selecting the analyzed commits,
+        leaving out those reachable from the ``exclude`` revisions."""
+        args = []
+        if self.since:
+            args.append(f"--since={self.since}")
+        if self.until:
+            args.append(f"--until={self.until}")
+        args.append(self.to_commit or "HEAD")
+        if self.from_commit:
+            # Exclude everything reachable from the parents of from_commit,
+            # which keeps from_commit itself in the range
+            args.append(f"^{self.from_commit}^@")
+        args.extend(f"^{revision}" for revision in exclude)
+        if self.pathspecs:
+            args.append("--")
+            args.extend(self.pathspecs)
+        return args
 
-        # Sort by date (oldest first)
-        commits_data.sort(key=lambda x: x["timestamp"])
+    def list_commits_by_date(self, exclude: Iterable[str] = ()) -> List[str]:
+        """Return the hashes to analyze, ordered by author date.
 
-        return commits_data
+        These are the commits reachable from HEAD, narrowed down by the
+        range and path filters, minus those reachable from ``exclude``
+        (e.g. a previously analyzed HEAD). Commits with the same author
+        date keep their traversal order.
+        """
+        try:
+            output = self.repo.git.log(
+                "--reverse", "--format=%H %at", *self.log_args(exclude)
+            )
+        except GitCommandError as e:
+            if self.from_commit or self.to_commit:
+                raise ValueError(f"Invalid commit range: {e.stderr.strip()}") from e
+            return []  # no commits yet
+
+        entries = [line.split(" ") for line in output.splitlines()]
+        entries.sort(key=lambda entry: int(entry[1]))
+        return [commit_hash for commit_hash, _ in entries]
+
+    def _iter_commits_cached(
+        self, hashes: List[str], prune: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield commits in ``hashes`` order, extracting only uncached ones.
+
+        With ``prune`` (for runs over the whole history), commits that are
+        no longer reachable from HEAD (e.g. after a rebase or force-push)
+        are dropped from the cache before it is consulted.
+        """
+        with self.open_cache() as cache:
+            if prune:
+                cache.retain(set(hashes))
+            cached_hashes = cache.hashes()
+
+            # Missing commits come out of the extractor in the same relative
+            # order, so they can be merged back in while walking ``hashes``.
+            missing = [h for h in hashes if h not in cached_hashes]
+            self.profiler.count("commits_cached", len(hashes) - len(missing))
+            extracted = self._iter_extracted(missing)
+            fresh: Iterator[Dict[str, Any]] = iter(())
+
+            for start in range(0, len(hashes), self.CACHE_FLUSH_SIZE):
+                window = hashes[start : start + self.CACHE_FLUSH_SIZE]
+                cached = cache.get_many(h for h in window if h in cached_hashes)
+
+                for commit_hash in window:
+                    if commit_hash in cached:
+                        yield cached.pop(commit_hash)
+                        continue
+
+                    commit = next(fresh, None)
+                    if commit is None:
+                        # Flush per batch so an interrupted run keeps progress
+                        batch = next(extracted)
+                        cache.put_many(batch)
+                        fresh = iter(batch)
+                        commit = next(fresh)
+                    yield commit
 
-    def _extract_commit_data(self, commit) -> Dict[str, Any]:
-        """Extract data from a single commit."""
+    def _iter_extracted(self, hashes: List[str]) -> Iterator[List[Dict[str, Any]]]:
+        """Extract the given commits, yielding batches in input order.
+
+        With more than one worker the hashes are split into contiguous
+        slices that are extracted in a process pool; results are yielded in
+        slice order, so the output matches a sequential run exactly.
+        """
+        if not hashes:
+            return
+        self.profiler.count("commits_extracted", len(hashes))
+
+        if (
+            self.workers == 1
+            or self.engine == "async"
+            or len(hashes) < 2 * self.MIN_CHUNK_SIZE
+        ):
+            commits = self._iter_commit_data(hashes)
+            while True:
+                batch = list(itertools.islice(commits, self.CACHE_FLUSH_SIZE))
+                if not batch:
+                    return
+                yield batch
+
+        # Several chunks per worker keep the pool busy when some slices of
+        # history are much more expensive than others.
+        chunk_size = max(
+            self.MIN_CHUNK_SIZE,
+            min(self.CACHE_FLUSH_SIZE, math.ceil(len(hashes) / (self.workers * 4))),
+        )
+        chunks = [
+            hashes[start : start + chunk_size]
+            for start in range(0, len(hashes), chunk_size)
+        ]
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(
+                self.repo_path,
+                {
+                    "engine": self.engine,
+                    "include_paths": self.include_paths,
+                    "exclude_paths": self.exclude_paths,
+                    "complexity": self.complexity,
+                    "use_cache": self.use_cache,
+                    "cache_dir": self.cache_dir,
+                },
+                multiprocessing.Lock(),
+            ),
+        ) as executor:
+            # Keep a bounded number of chunks in flight so finished results
+            # do not pile up while the consumer is busy.
+            pending: Deque[Future] = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_extract_chunk, chunk))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _pydriller_git(self) -> Git:
+        """Return the pydriller handle used to load commits, opening it once."""
+        if self._git is None:
+            self._git = Git(self.repo_path)
+        return self._git
+
+    def _extract_hashes(self, hashes: List[str]) -> List[Dict[str, Any]]:
+        """Extract the given commits sequentially."""
+        return list(self._iter_commit_data(hashes))
+
+    def _iter_commit_data(self, hashes: List[str]) -> Iterator[Dict[str, Any]]:
+        """Yield extracted data for the given commits, in input order."""
+        resolver = self.complexity_resolver() if self.complexity else None
+        try:
+            if self.engine == "numstat":
+                yield from iter_log_commits(
+                    self.repo_path,
+                    hashes,
+                    self.scope,
+                    complexity=resolver and resolver.complexity,
+                    profiler=self.profiler,
+                )
+                return
+            if self.engine == "async":
+                yield from iter_pipelined_commits(
+                    self.repo_path,
+                    hashes,
+                    self.scope,
+                    processes=self.workers,
+                    resolver=resolver,
+                    profiler=self.profiler,
+                )
+                return
+
+            git = self._pydriller_git()
+            try:
+                for commit_hash in hashes:
+                    yield self._extract_commit_data(
+                        git.get_commit(commit_hash), resolver
+                    )
+            finally:
+                git.clear()
+        finally:
+            if resolver is not None:
+                resolver.close()
+
+    def _extract_commit_data(
+        self, commit, resolver: Optional[ComplexityResolver] = None
+    ) -> Dict[str, Any]:
+        """Extract data from a single commit.
+
+        Complexity is looked up through ``resolver``, or left out (None).
+        """
         files_changed = []
         lines_added = 0
         lines_removed = 0
 
-        # Handle modifications safely
-        if hasattr(commit, "modifications") and commit.modifications:
-            for modification in commit.modifications:
-                file_data = {
-                    "filename": modification.filename or "unknown",
-                    "old_path": modification.old_path,
-                    "new_path": modification.new_path,
-                    "change_type": (
-                        modification.change_type.name
-                        if modification.change_type
-                        else "UNKNOWN"
-                    ),
-                    "lines_added": modification.added_lines or 0,
-                    "lines_removed": modification.removed_lines or 0,
-                    "complexity": getattr(modification, "complexity", 0),
-                }
-                files_changed.append(file_data)
-
-                lines_added += modification.added_lines or 0
-                lines_removed += modification.removed_lines or 0
+        # pydriller 2.x exposes per-file changes as ``modified_files``
+        # (``modifications`` was removed), and returns none for merges.
+        with self.profiler.span("extract.diff"):
+            modifications = commit.modified_files
+        for modification in modifications:
+            if self.scope is not None and not self.scope(
+                modification.old_path, modification.new_path
+            ):
+                continue
+            file_data = {
+                "filename": modification.filename or "unknown",
+                "old_path": modification.old_path,
+                "new_path": modification.new_path,
+                "change_type": (
+                    modification.change_type.name
+                    if modification.change_type
+                    else "UNKNOWN"
+                ),
+                "lines_added": modification.added_lines or 0,
+                "lines_removed": modification.deleted_lines or 0,
+                "complexity": self._file_complexity(commit, modification, resolver),
+            }
+            files_changed.append(file_data)
+
+            lines_added += modification.added_lines or 0
+            lines_removed += modification.deleted_lines or 0
 
         return {
             "hash": commit.hash,
@@ -68,69 +462,44 @@ class GitAnalyzer:
             "total_files": len(files_changed),
         }
 
-    def get_contributor_stats(self, commits: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate contributor statistics."""
-        contributors = {}
+    @staticmethod
+    def _file_complexity(
+        commit, modification, resolver: Optional[ComplexityResolver]
+    ) -> Optional[int]:
+        """Return the complexity of a modified file's new contents."""
+        if resolver is None or modification.new_path is None:
+            return None
+        # Only the blob SHA is needed; reading ``modification.complexity``
+        # would load and parse the contents for every commit.
+        blob = modification._c_diff.b_blob
+        if blob is None:
+            # Exact renames come without blob ids in the patch
+            try:
+                blob = commit._c_object.tree / modification.new_path
+            except KeyError:
+                return None
+        return resolver.complexity(modification.new_path, blob.hexsha)
 
+    def get_contributor_stats(
+        self, commits: Iterable[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Calculate contributor statistics."""
+        if isinstance(commits, CommitStore):
+            if vectorized.HAVE_NUMPY:
+                return vectorized.contributor_stats(commits)
+            return commits.contributor_stats()
+        aggregator = TimelineAggregator()
         for commit in commits:
-            author = commit["author"]
-            email = commit["email"]
-
-            if author not in contributors:
-                contributors[author] = {
-                    "email": email,
-                    "commits": 0,
-                    "lines_added": 0,
-                    "lines_removed": 0,
-                    "files_changed": 0,
-                    "first_commit": commit["timestamp"],
-                    "last_commit": commit["timestamp"],
-                }
-
-            contributors[author]["commits"] += 1
-            contributors[author]["lines_added"] += commit["lines_added"]
-            contributors[author]["lines_removed"] += commit["lines_removed"]
-            contributors[author]["files_changed"] += commit["total_files"]
-            contributors[author]["first_commit"] = min(
-                contributors[author]["first_commit"], commit["timestamp"]
-            )
-            contributors[author]["last_commit"] = max(
-                contributors[author]["last_commit"], commit["timestamp"]
-            )
-
-        return contributors
+            aggregator.add_contributor(commit)
+        return aggregator.contributor_stats()
 
-    def get_file_stats(self, commits: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def get_file_stats(self, commits: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate file-level statistics."""
-        files = {}
-
+        if isinstance(commits, CommitStore):
+            if vectorized.HAVE_NUMPY:
+                return vectorized.file_stats(commits)
+            return commits.file_stats()
+        aggregator = TimelineAggregator()
         for commit in commits:
-            for file_change in commit["files_changed"]:
-                filename = file_change["filename"]
-
-                if filename not in files:
-                    files[filename] = {
-                        "changes": 0,
-                        "lines_added": 0,
-                        "lines_removed": 0,
-                        "authors": set(),
-                        "first_change": commit["timestamp"],
-                        "last_change": commit["timestamp"],
-                    }
-
-                files[filename]["changes"] += 1
-                files[filename]["lines_added"] += file_change["lines_added"]
-                files[filename]["lines_removed"] += file_change["lines_removed"]
-                files[filename]["authors"].add(commit["author"])
-                files[filename]["first_change"] = min(
-                    files[filename]["first_change"], commit["timestamp"]
-                )
-                files[filename]["last_change"] = max(
-                    files[filename]["last_change"], commit["timestamp"]
-                )
-
-        # Convert sets to lists for JSON serialization
-        for file_data in files.values():
-            file_data["authors"] = list(file_data["authors"])
-
-        return files
+            aggregator.add_files(commit)
+        return aggregator.file_stats()
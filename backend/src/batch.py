@@ -0,0 +1,220 @@
+"""
+Batch analysis of many repositories across a pool of worker processes.
+"""
+
+import contextlib
+import json
+import multiprocessing
+import os
+import subprocess
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    from .exporter import COLUMNAR_SUFFIX
+    from .main import analyze_repository
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from exporter import COLUMNAR_SUFFIX
+    from main import analyze_repository
+
+INDEX_FILENAME = "index.json"
+
+_SUFFIXES = {"json": ".json", "ndjson": ".ndjson", "columnar": COLUMNAR_SUFFIX}
+
+
+def read_manifest(manifest_path: str) -> List[str]:
+    """Read repository paths from a manifest, one per line.
+
+    Blank lines and ``#`` comments are ignored; relative paths are resolved
+    against the manifest's directory.
+    """
+    base = Path(manifest_path).parent
+    repos = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                repos.append(str(base / os.path.expanduser(line)))
+    return repos
+
+
+def estimate_size(repo_path: str) -> int:
+    """Return the number of commits reachable from HEAD (0 if unknown)."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-list", "--count", "HEAD"],
+            cwd=repo_path,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        return int(output.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return 0
+
+
+def _output_paths(repos: List[str], output_dir: Path, suffix: str) -> List[Path]:
+    """Name each output after its repository, keeping the names unique."""
+    seen: Dict[str, int] = {}
+    paths = []
+    for repo in repos:
+        name = Path(repo).resolve().name or "repo"
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}-{seen[name]}"
+        paths.append(output_dir / f"{name}{suffix}")
+    return paths
+
+
+def _run_job(repo_path: str, output_path: str, options: Dict[str, Any], conn) -> None:
+    """Analyze one repository inside a worker process and report back."""
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            data = analyze_repository(
+                repo_path, output_path, keep_timeline=False, **options
+            )
+        conn.send({"status": "ok", "metadata": data["metadata"]})
+    except BaseException as e:
+        conn.send({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def analyze_many(
+    repos: Iterable[str],
+    output_dir: str,
+    jobs: Optional[int] = None,
+    timeout: Optional[float] = None,
+    output_format: str = "json",
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """Analyze many repositories, ``jobs`` at a time, into ``output_dir``.
+
+    Repositories are scheduled largest first (by commit count) so the
+    longest analyses do not end up running alone at the end of the batch.
+    Each one runs in its own process: a failure, crash or exceeded
+    ``timeout`` (seconds) is recorded and the rest of the batch carries on.
+
+    The combined index (``index.json`` in ``output_dir``) lists every
+    repository with its status, output file and summary metadata; it is
+    rewritten as results come in. ``on_result`` is called with each entry.
+    Other keyword ``options`` are passed on to :func:`analyze_repository`.
+    """
+    repos = list(repos)
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    output_root = Path(output_dir)
+    output_root.mkdir(parents=True, exist_ok=True)
+    options = dict(options, output_format=output_format)
+
+    outputs = _output_paths(repos, output_root, _SUFFIXES[output_format])
+    entries = [
+        {
+            "repo": repo,
+            "output": str(output),
+            "commits": estimate_size(repo),
+            "status": "pending",
+        }
+        for repo, output in zip(repos, outputs)
+    ]
+    # Ascending, so pop() from the end takes the largest
+    pending = sorted(entries, key=lambda entry: entry["commits"])
+
+    context = multiprocessing.get_context()
+    running: Dict[Any, Dict[str, Any]] = {}  # connection -> job state
+    index_path = output_root / INDEX_FILENAME
+    started = time.monotonic()
+
+    def finish(job: Dict[str, Any], result: Dict[str, Any]) -> None:
+        entry = job["entry"]
+        entry.update(result)
+        entry["seconds"] = round(time.monotonic() - job["started"], 3)
+        job["process"].join()
+        job["conn"].close()
+        _write_index(index_path, entries, time.monotonic() - started)
+        if on_result:
+            on_result(entry)
+
+    try:
+        while pending or running:
+            while pending and len(running) < jobs:
+                entry = pending.pop()
+                entry["status"] = "running"
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_run_job,
+                    args=(entry["repo"], entry["output"], options, sender),
+                )
+                process.start()
+                sender.close()
+                running[receiver] = {
+                    "entry": entry,
+                    "process": process,
+                    "conn": receiver,
+                    "started": time.monotonic(),
+                }
+
+            now = time.monotonic()
+            wait_for = None
+            if timeout is not None:
+                deadline = min(job["started"] for job in running.values()) + timeout
+                wait_for = max(0.0, deadline - now)
+
+            for conn in wait(list(running), timeout=wait_for):
+                job = running.pop(conn)
+                try:
+                    result = conn.recv()
+                except EOFError:
+                    # The worker died without reporting (e.g. killed by the OS)
+                    job["process"].join()
+                    result = {
+                        "status": "failed",
+                        "error": f"worker exited with code {job['process'].exitcode}",
+                    }
+                finish(job, result)
+
+            if timeout is not None:
+                now = time.monotonic()
+                for conn, job in list(running.items()):
+                    if now - job["started"] >= timeout:
+                        del running[conn]
+                        job["process"].terminate()
+                        finish(
+                            job,
+                            {
+                                "status": "timeout",
+                                "error": f"timed out after {timeout}s",
+                            },
+                        )
+    finally:
+        # Only reached with jobs still running if the batch itself is
+        # interrupted; don't leave orphaned analyses behind.
+        for job in running.values():
+            job["process"].terminate()
+            job["process"].join()
+
+    return _write_index(index_path, entries, time.monotonic() - started)
+
+
+def _write_index(
+    index_path: Path, entries: List[Dict[str, Any]], seconds: float
+) -> Dict[str, Any]:
+    """Write the combined batch index atomically and return it."""
+    counts: Dict[str, int] = {}
+    for entry in entries:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    index = {
+        "summary": {
+            "repositories": len(entries),
+            "statuses": counts,
+            "seconds": round(seconds, 3),
+        },
+        "repositories": entries,
+    }
+    partial = index_path.with_suffix(".json.tmp")
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(partial, index_path)
+    return index
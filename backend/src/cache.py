@@ -0,0 +1,278 @@
+"""
+Persistent caches for incremental repository analysis.
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set
+
+
+class CommitCache:
+    """SQLite-backed store of extracted commit data keyed by commit hash.
+
+    Commit hashes are content addresses, so a cached row never goes stale for
+    its own hash. History rewrites (rebases, force-pushes) only change which
+    hashes are reachable; callers prune rows that are no longer reachable with
+    :meth:`retain`.
+    """
+
+    SCHEMA_VERSION = "2"
+    FILENAME = "codevis-cache.sqlite"
+    # SQLite limits the number of bound parameters per statement.
+    QUERY_BATCH = 500
+
+    def __init__(self, cache_path: str, fingerprint: str = ""):
+        """Open (or create) the cache database at ``cache_path``.
+
+        ``fingerprint`` identifies the extraction options that produced the
+        cached rows; a mismatch with the stored value clears the cache.
+        """
+        self.cache_path = cache_path
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(cache_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS commits ("
+            "hash TEXT PRIMARY KEY, timestamp REAL NOT NULL, data TEXT NOT NULL)"
+        )
+
+        version = f"{self.SCHEMA_VERSION}:{fingerprint}"
+        if self.get_meta("version") != version:
+            self.clear()
+            self.set_meta("version", version)
+        self.conn.commit()
+
+    @classmethod
+    def for_repository(
+        cls,
+        git_dir: str,
+        repo_path: str,
+        cache_dir: Optional[str] = None,
+        scope: str = "",
+        **kwargs,
+    ) -> "CommitCache":
+        """Open the cache for a repository.
+
+        By default the cache lives inside the repository's ``.git`` directory.
+        When ``cache_dir`` is given, the file is named after the resolved
+        repository path so one directory can hold caches for many repositories.
+        A non-empty ``scope`` (e.g. a path filter) gets a cache file of its
+        own, so scoped runs don't evict the full-history cache.
+        """
+        if cache_dir is None:
+            path = Path(git_dir) / cls.FILENAME
+        else:
+            resolved = str(Path(repo_path).resolve())
+            digest = hashlib.sha1(resolved.encode("utf-8")).hexdigest()[:12]
+            path = Path(cache_dir) / f"{Path(resolved).name}-{digest}.sqlite"
+
+        if scope:
+            digest = hashlib.sha1(scope.encode("utf-8")).hexdigest()[:12]
+            path = path.with_name(f"{path.stem}-{digest}{path.suffix}")
+        return cls(str(path), **kwargs)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Return a metadata value, or None if it is not set."""
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Store a metadata value."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+        self.conn.commit()
+
+    def hashes(self) -> Set[str]:
+        """Return the set of all cached commit hashes."""
+        return {row[0] for row in self.conn.execute("SELECT hash FROM commits")}
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return cached commit data for the given hashes, keyed by hash."""
+        wanted = list(hashes)
+        result = {}
+        for start in range(0, len(wanted), self.QUERY_BATCH):
+            batch = wanted[start : start + self.QUERY_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT hash, data FROM commits WHERE hash IN ({placeholders})",
+                batch,
+            )
+            for commit_hash, data in rows:
+                result[commit_hash] = json.loads(data)
+        return result
+
+    def put_many(self, commits: Iterable[Dict[str, Any]]) -> None:
+        """Insert or replace extracted commit data."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO commits (hash, timestamp, data) VALUES (?, ?, ?)",
+            (
+                (commit["hash"], commit["timestamp"], json.dumps(commit))
+                for commit in commits
+            ),
+        )
+        self.conn.commit()
+
+    def retain(self, reachable: Set[str]) -> int:
+        """Delete every cached commit not in ``reachable``.
+
+        Returns the number of rows removed.
+        """
+        stale = [(commit_hash,) for commit_hash in self.hashes() - reachable]
+        self.conn.executemany("DELETE FROM commits WHERE hash = ?", stale)
+        self.conn.commit()
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove all cached commits."""
+        self.conn.execute("DELETE FROM commits")
+        self.conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self.conn.close()
+
+    def __enter__(self) -> "CommitCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+
+
+class ComplexityCache:
+    """SQLite-backed, size-bounded cache of file complexity keyed by blob.
+
+    A file's complexity only depends on its contents and language, so a
+    result is valid wherever the same blob appears again: in later commits,
+    on other branches or in later runs. Entries are evicted least recently
+    used first once there are more than ``max_entries``. Lookups and
+    inserts are buffered in memory and written out by :meth:`flush`; each
+    flush is one tick of the recency clock.
+    """
+
+    SCHEMA_VERSION = "1"
+    FILENAME = "codevis-complexity.sqlite"
+    MAX_ENTRIES = 200_000
+
+    _MISSING = object()
+
+    def __init__(self, cache_path: str, max_entries: int = MAX_ENTRIES):
+        """Open (or create) the cache database at ``cache_path``."""
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # Pool workers share the file; wait for each other's writes. The
+        # async engine uses the cache from its event loop thread.
+        self.conn = sqlite3.connect(cache_path, timeout=60, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "key TEXT PRIMARY KEY, complexity INTEGER, used INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS blobs_used ON blobs (used)")
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()
+        if row is None or row[0] != self.SCHEMA_VERSION:
+            self.conn.execute("DELETE FROM blobs")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                (self.SCHEMA_VERSION,),
+            )
+        self.conn.commit()
+
+        self._used: Set[str] = set()
+        self._pending: Dict[str, Optional[int]] = {}
+
+    @classmethod
+    def for_repository(
+        cls, git_dir: str, cache_dir: Optional[str] = None, **kwargs
+    ) -> "ComplexityCache":
+        """Open the complexity cache used for a repository.
+
+        Blob SHAs are content addresses, so one cache in ``cache_dir`` can
+        be shared by many repositories; without it the cache lives inside
+        the repository's ``.git`` directory.
+        """
+        directory = Path(cache_dir) if cache_dir is not None else Path(git_dir)
+        return cls(str(directory / cls.FILENAME), **kwargs)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached complexity for ``key`` (which may be None),
+        or ``default`` if it is not cached."""
+        if key in self._pending:
+            return self._pending[key]
+        row = self.conn.execute(
+            "SELECT complexity FROM blobs WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        self._used.add(key)
+        return row[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, self._MISSING) is not self._MISSING
+
+    def put(self, key: str, complexity: Optional[int]) -> None:
+        """Cache the complexity of ``key``."""
+        self._pending[key] = complexity
+
+    def flush(self) -> None:
+        """Write buffered entries and recency updates, then evict least
+        recently used entries beyond ``max_entries``."""
+        if not self._pending and not self._used:
+            return
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'clock'"
+            ).fetchone()
+            clock = int(row[0]) + 1 if row else 1
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('clock', ?)",
+                (str(clock),),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO blobs (key, complexity, used) "
+                "VALUES (?, ?, ?)",
+                ((key, value, clock) for key, value in self._pending.items()),
+            )
+            self.conn.executemany(
+                "UPDATE blobs SET used = ? WHERE key = ?",
+                ((clock, key) for key in self._used - self._pending.keys()),
+            )
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM blobs WHERE key IN "
+                    "(SELECT key FROM blobs ORDER BY used LIMIT ?)",
+                    (excess,),
+                )
+        self._pending.clear()
+        self._used.clear()
+
+    def close(self) -> None:
+        """Flush buffered entries and close the database connection."""
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self) -> "ComplexityCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
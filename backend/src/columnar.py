@@ -0,0 +1,389 @@
+"""
+Compact columnar binary timeline format.
+
+Timeline events are stored as fixed-width column arrays (timestamps, line
+deltas, author ids, ...) with authors (name and email) and paths interned
+into string tables. A :class:`ColumnarTimeline` memory-maps the file and
+decodes only the events that are asked for, so time slices can be read
+without parsing everything.
+
+File layout::
+
+    MAGIC (8 bytes) | directory offset (uint64, little endian)
+    column data ...
+    directory (UTF-8 JSON): column offsets/types plus the aggregates
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"CTVCOL1\0"
+HEADER = struct.Struct("<8sQ")
+
+CHANGE_TYPES = ["UNKNOWN", "ADD", "COPY", "DELETE", "MODIFY", "RENAME"]
+CHANGE_TYPE_IDS = {name: i for i, name in enumerate(CHANGE_TYPES)}
+
+# Sentinel for missing optional values in integer columns
+NONE_ID = -1
+
+# Column name -> array typecode
+EVENT_COLUMNS = {
+    "timestamp": "d",
+    "utc_offset": "i",  # minutes east of UTC, to rebuild ``datetime``
+    "author_id": "I",
+    "lines_added": "Q",
+    "lines_removed": "Q",
+    "cumulative_lines": "q",
+    "cumulative_files": "Q",
+    "changes_start": "Q",  # index of the event's first file change
+}
+CHANGE_COLUMNS = {
+    "old_path_id": "q",
+    "new_path_id": "q",
+    "change_type": "B",
+    "change_lines_added": "Q",
+    "change_lines_removed": "Q",
+    "complexity": "q",
+}
+
+
+class _StringTable:
+    """Interns strings to integer ids while writing."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.blob = bytearray()
+        self.offsets = array("Q", [0])
+
+    def intern(self, value: str) -> int:
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.ids)
+            self.blob += value.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        return string_id
+
+    def append(self, value: str) -> None:
+        """Add a string without interning (for per-event values)."""
+        self.blob += value.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+
+def utc_offset_minutes(iso_datetime: str) -> int:
+    """Return the UTC offset of an ISO 8601 datetime in minutes (0 if naive)."""
+    offset = datetime.fromisoformat(iso_datetime).utcoffset()
+    return int(offset.total_seconds() // 60) if offset else 0
+
+
+class ColumnarWriter:
+    """Writes timeline events into the columnar format.
+
+    Columns are accumulated in compact typed arrays and written out by
+    :meth:`finish`; it has the same interface as the streaming JSON writer.
+    """
+
+    def __init__(self, output_path: str):
+        """Prepare to write ``output_path``."""
+        self.output_path = output_path
+        self.events_written = 0
+        self.columns = {name: array(code) for name, code in EVENT_COLUMNS.items()}
+        self.columns.update(
+            {name: array(code) for name, code in CHANGE_COLUMNS.items()}
+        )
+        self.hashes = bytearray()
+        # 20 bytes for SHA-1 repositories, 32 for SHA-256 ones
+        self.hash_size: Optional[int] = None
+        # (name, email) -> author id, indexing the two parallel tables
+        self.author_ids: Dict[Tuple[str, str], int] = {}
+        self.authors = _StringTable()
+        self.author_emails = _StringTable()
+        self.paths = _StringTable()
+        self.messages = _StringTable()
+
+    def write_event(self, event: Dict[str, Any]) -> None:
+        """Append a single timeline event."""
+        columns = self.columns
+        columns["timestamp"].append(event["timestamp"])
+        columns["utc_offset"].append(utc_offset_minutes(event["datetime"]))
+        columns["author_id"].append(self._author_id(event))
+        columns["lines_added"].append(event["lines_added"])
+        columns["lines_removed"].append(event["lines_removed"])
+        columns["cumulative_lines"].append(event["cumulative_lines"])
+        columns["cumulative_files"].append(event["cumulative_files"])
+        columns["changes_start"].append(len(columns["change_type"]))
+        commit_hash = bytes.fromhex(event["commit_hash"])
+        if self.hash_size is None:
+            self.hash_size = len(commit_hash)
+        self.hashes += commit_hash
+        self.messages.append(event["message"])
+
+        for change in event["files_changed"]:
+            old_path, new_path = change["old_path"], change["new_path"]
+            columns["old_path_id"].append(
+                NONE_ID if old_path is None else self.paths.intern(old_path)
+            )
+            columns["new_path_id"].append(
+                NONE_ID if new_path is None else self.paths.intern(new_path)
+            )
+            columns["change_type"].append(CHANGE_TYPE_IDS[change["change_type"]])
+            columns["change_lines_added"].append(change["lines_added"])
+            columns["change_lines_removed"].append(change["lines_removed"])
+            complexity = change.get("complexity")
+            columns["complexity"].append(NONE_ID if complexity is None else complexity)
+
+        self.events_written += 1
+
+    def _author_id(self, event: Dict[str, Any]) -> int:
+        author = (event["author"], event.get("email", ""))
+        author_id = self.author_ids.get(author)
+        if author_id is None:
+            author_id = self.author_ids[author] = len(self.author_ids)
+            self.authors.append(author[0])
+            self.author_emails.append(author[1])
+        return author_id
+
+    def finish(
+        self,
+        metadata: Dict[str, Any],
+        contributors: Dict[str, Any],
+        files: Dict[str, Any],
+        **sections: Any,
+    ) -> None:
+        """Write all columns, the directory and the aggregates.
+
+        Extra keyword ``sections`` (e.g. ``rollups``) are stored alongside
+        the aggregates.
+        """
+        output_file = Path(self.output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Sentinel so event i's changes are changes_start[i]:changes_start[i+1]
+        self.columns["changes_start"].append(len(self.columns["change_type"]))
+
+        blobs: List[Tuple[str, str, bytes]] = [
+            (name, column.typecode, column.tobytes())
+            for name, column in self.columns.items()
+        ]
+        blobs.append(("hashes", "B", bytes(self.hashes)))
+        for name, table in (
+            ("authors", self.authors),
+            ("author_emails", self.author_emails),
+            ("paths", self.paths),
+            ("messages", self.messages),
+        ):
+            blobs.append((f"{name}_blob", "B", bytes(table.blob)))
+            blobs.append((f"{name}_offsets", "Q", table.offsets.tobytes()))
+
+        directory: Dict[str, Any] = {
+            "byteorder": sys.byteorder,
+            "events": self.events_written,
+            "hash_size": self.hash_size or 20,
+            "columns": {},
+            "metadata": metadata,
+            "contributors": contributors,
+            "files": files,
+            "sections": sections,
+        }
+
+        # Written beside the target and moved into place, so a reader that
+        # has the old file mapped never sees it truncated
+        partial = output_file.with_name(output_file.name + ".tmp")
+        with open(partial, "wb") as f:
+            f.write(HEADER.pack(MAGIC, 0))
+            for name, typecode, data in blobs:
+                # Align every column so it can be cast in place from the mmap
+                f.write(b"\0" * (-f.tell() % 8))
+                directory["columns"][name] = {
+                    "offset": f.tell(),
+                    "type": typecode,
+                    "size": len(data),
+                }
+                f.write(data)
+
+            directory_offset = f.tell()
+            f.write(json.dumps(directory, separators=(",", ":")).encode("utf-8"))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, directory_offset))
+        os.replace(partial, output_file)
+
+    def close(self) -> None:
+        """Discard buffered columns (nothing is written until finish)."""
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class ColumnarTimeline:
+    """Memory-mapped reader for the columnar timeline format."""
+
+    def __init__(self, path: str):
+        """Map ``path`` and read its directory; no events are decoded yet."""
+        self.source_path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, directory_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a columnar timeline file: {path}")
+
+        directory = json.loads(self._mmap[directory_offset:].decode("utf-8"))
+        self.metadata: Dict[str, Any] = directory["metadata"]
+        self.contributors: Dict[str, Any] = directory["contributors"]
+        self.files: Dict[str, Any] = directory["files"]
+        self.sections: Dict[str, Any] = directory.get("sections", {})
+        self._length: int = directory["events"]
+        self._hash_size: int = directory["hash_size"]
+
+        view = memoryview(self._mmap)
+        swap = directory["byteorder"] != sys.byteorder
+        self._columns: Dict[str, Any] = {}
+        for name, column in directory["columns"].items():
+            data = view[column["offset"] : column["offset"] + column["size"]]
+            if swap and column["type"] != "B":
+                # Written on a machine with the other byte order: copy once
+                values = array(column["type"])
+                values.frombytes(data)
+                values.byteswap()
+                self._columns[name] = values
+            else:
+                self._columns[name] = data.cast(column["type"])
+
+        self.authors = self._decode_table("authors")
+        # Files written before emails were stored have none
+        self.author_emails = (
+            self._decode_table("author_emails")
+            if "author_emails_blob" in self._columns
+            else None
+        )
+        self._path_cache: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self._length
+
+    def column(self, name: str):
+        """Return a raw column (a typed memoryview or array)."""
+        return self._columns[name]
+
+    @property
+    def timestamps(self):
+        """Event timestamps, in ascending order."""
+        return self._columns["timestamp"]
+
+    def _decode_table(self, name: str) -> List[str]:
+        blob = self._columns[f"{name}_blob"]
+        offsets = self._columns[f"{name}_offsets"]
+        return [
+            bytes(blob[offsets[i] : offsets[i + 1]]).decode("utf-8")
+            for i in range(len(offsets) - 1)
+        ]
+
+    def _table_entry(self, name: str, index: int) -> str:
+        blob = self._columns[f"{name}_blob"]
+        offsets = self._columns[f"{name}_offsets"]
+        return bytes(blob[offsets[index] : offsets[index + 1]]).decode("utf-8")
+
+    def path(self, path_id: int) -> Optional[str]:
+        """Return the path for an interned path id."""
+        if path_id == NONE_ID:
+            return None
+        path = self._path_cache.get(path_id)
+        if path is None:
+            path = self._path_cache[path_id] = self._table_entry("paths", path_id)
+        return path
+
+    def slice_indices(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Tuple[int, int]:
+        """Return the event index range with ``start <= timestamp <= end``."""
+        timestamps = self.timestamps
+        lo = 0 if start is None else bisect.bisect_left(timestamps, start)
+        hi = len(self) if end is None else bisect.bisect_right(timestamps, end)
+        return lo, max(lo, hi)
+
+    def event(self, index: int) -> Dict[str, Any]:
+        """Decode a single timeline event."""
+        c = self._columns
+        timestamp = c["timestamp"][index]
+        tz = timezone(timedelta(minutes=c["utc_offset"][index]))
+        size = self._hash_size
+        hash_start = index * size
+
+        files_changed = []
+        for i in range(c["changes_start"][index], c["changes_start"][index + 1]):
+            old_path = self.path(c["old_path_id"][i])
+            new_path = self.path(c["new_path_id"][i])
+            complexity = c["complexity"][i]
+            files_changed.append(
+                {
+                    "filename": (new_path or old_path or "unknown").rsplit("/", 1)[-1],
+                    "old_path": old_path,
+                    "new_path": new_path,
+                    "change_type": CHANGE_TYPES[c["change_type"][i]],
+                    "lines_added": c["change_lines_added"][i],
+                    "lines_removed": c["change_lines_removed"][i],
+                    "complexity": None if complexity == NONE_ID else complexity,
+                }
+            )
+
+        author_id = c["author_id"][index]
+        event = {
+            "timestamp": timestamp,
+            "datetime": datetime.fromtimestamp(timestamp, tz).isoformat(),
+            "commit_hash": bytes(c["hashes"][hash_start : hash_start + size]).hex(),
+            "author": self.authors[author_id],
+            "message": self._table_entry("messages", index),
+            "files_changed": files_changed,
+            "lines_added": c["lines_added"][index],
+            "lines_removed": c["lines_removed"][index],
+            "cumulative_lines": c["cumulative_lines"][index],
+            "cumulative_files": c["cumulative_files"][index],
+        }
+        if self.author_emails is not None:
+            event["email"] = self.author_emails[author_id]
+        return event
+
+    def iter_events(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the events between two timestamps (inclusive)."""
+        lo, hi = self.slice_indices(start, end)
+        for index in range(lo, hi):
+            yield self.event(index)
+
+    def to_timeline_data(self) -> Dict[str, Any]:
+        """Decode the whole file into the regular timeline data structure."""
+        return dict(
+            self.sections,
+            metadata=self.metadata,
+            timeline=list(self.iter_events()),
+            contributors=self.contributors,
+            files=self.files,
+        )
+
+    def close(self) -> None:
+        """Release the memory map and file handle."""
+        # Views into the mmap must be released before it can be closed
+        for column in self._columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        self._columns = {}
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "ColumnarTimeline":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
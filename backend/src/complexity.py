@@ -0,0 +1,115 @@
+"""
+On-demand cyclomatic complexity of changed files, cached per blob.
+"""
+
+from collections import OrderedDict
+from typing import Any, Optional
+
+import lizard
+import lizard_languages
+
+try:
+    from .cache import ComplexityCache
+    from .gitlog import BlobReader
+    from .profiling import NULL_PROFILER, Profiler
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from cache import ComplexityCache
+    from gitlog import BlobReader
+    from profiling import NULL_PROFILER, Profiler
+
+
+def source_complexity(filename: str, source: bytes) -> Optional[int]:
+    """Return the cyclomatic complexity of a file's contents, computed the
+    way pydriller does (None for unsupported languages and empty files)."""
+    if lizard_languages.get_reader_for(filename) is None:
+        return None
+    code = source.decode("utf-8", "ignore")
+    if not code:
+        return None
+    return lizard.analyze_file.analyze_source_code(filename, code).CCN
+
+
+class ComplexityResolver:
+    """Computes file complexity by blob SHA, parsing each blob at most once.
+
+    Results are kept in a bounded in-memory LRU and, if ``cache`` is given,
+    in a persistent :class:`ComplexityCache` shared across runs. Blob
+    contents are only read (through ``git cat-file``) on a cache miss;
+    misses are timed as the ``extract.complexity`` span of ``profiler``.
+    """
+
+    MEMORY_ENTRIES = 20_000
+
+    MISSING = object()
+
+    def __init__(
+        self,
+        repo_path: str,
+        cache: Optional[ComplexityCache] = None,
+        profiler: Profiler = NULL_PROFILER,
+    ):
+        """Create a resolver for the repository at ``repo_path``."""
+        self.cache = cache
+        self.profiler = profiler
+        self.blobs = BlobReader(repo_path)
+        self.memory: "OrderedDict[str, Optional[int]]" = OrderedDict()
+        self.parsed = 0
+
+    def complexity(self, path: str, blob: Optional[str]) -> Optional[int]:
+        """Return the complexity of ``blob`` stored at ``path``."""
+        key = self.key(path, blob)
+        if key is None:
+            return None
+        value = self.cached(key)
+        if value is self.MISSING:
+            with self.profiler.span("extract.complexity"):
+                value = self.compute(key, path, self.blobs.read(blob))
+        return value
+
+    def key(self, path: str, blob: Optional[str]) -> Optional[str]:
+        """Return the cache key of ``blob`` stored at ``path``, or None if
+        its complexity is not computed (unsupported language, no blob)."""
+        reader = lizard_languages.get_reader_for(path)
+        if reader is None or not blob:
+            return None
+        # The same contents can parse differently in another language
+        return f"{blob}:{reader.__name__}"
+
+    def cached(self, key: str) -> Any:
+        """Return the known complexity for ``key``, or :attr:`MISSING`."""
+        value = self.memory.get(key, self.MISSING)
+        if value is not self.MISSING:
+            self.memory.move_to_end(key)
+            return value
+        if self.cache is not None:
+            value = self.cache.get(key, self.MISSING)
+            if value is not self.MISSING:
+                self._remember(key, value)
+        return value
+
+    def compute(self, key: str, path: str, source: Optional[bytes]) -> Optional[int]:
+        """Parse the blob contents ``source`` (None if it is not a blob)
+        and cache the result under ``key``."""
+        value = None if source is None else source_complexity(path, source)
+        self.parsed += 1
+        self.profiler.count("blobs_parsed")
+        if self.cache is not None:
+            self.cache.put(key, value)
+        self._remember(key, value)
+        return value
+
+    def _remember(self, key: str, value: Optional[int]) -> None:
+        self.memory[key] = value
+        if len(self.memory) > self.MEMORY_ENTRIES:
+            self.memory.popitem(last=False)
+
+    def flush(self) -> None:
+        """Persist newly computed results."""
+        if self.cache is not None:
+            self.cache.flush()
+
+    def close(self) -> None:
+        """Persist results and release the cache and ``git cat-file``."""
+        self.blobs.close()
+        if self.cache is not None:
+            self.cache.close()
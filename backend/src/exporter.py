@@ -4,9 +4,115 @@ Data export utilities for timeline visualization.
 
 import json
 import csv
-from typing import List, Dict, Any
+from typing import IO, List, Dict, Any, Iterable, Iterator, Optional, Union
 from pathlib import Path
 
+try:
+    from .aggregator import TimelineAggregator
+    from .columnar import ColumnarTimeline, ColumnarWriter
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from aggregator import TimelineAggregator
+    from columnar import ColumnarTimeline, ColumnarWriter
+
+
+STREAM_FORMATS = ("json", "ndjson", "columnar")
+
+COLUMNAR_SUFFIX = ".ctv"
+
+# Compact separators: the streamed formats are meant for machines, not diffs
+_COMPACT = (",", ":")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=_COMPACT)
+
+
+def stream_format_for(output_path: str) -> str:
+    """Guess the streamed timeline format from a file extension."""
+    suffix = Path(output_path).suffix.lower()
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if suffix == COLUMNAR_SUFFIX:
+        return "columnar"
+    return "json"
+
+
+def _extra_sections(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the optional top-level sections of timeline data."""
+    core = ("metadata", "timeline", "contributors", "files")
+    return {key: value for key, value in data.items() if key not in core}
+
+
+class TimelineWriter:
+    """Writes timeline data incrementally as events arrive.
+
+    ``json`` output is a regular timeline document written as a stream:
+    the ``timeline`` array comes first, followed by ``contributors``,
+    ``files`` and ``metadata`` once they are known. ``ndjson`` output has
+    one timeline event per line and a final line holding the
+    ``metadata``, ``contributors`` and ``files`` objects.
+    """
+
+    def __init__(self, output_path: str, output_format: Optional[str] = None):
+        """Open ``output_path`` for writing in the given (or guessed) format."""
+        self.output_path = output_path
+        self.format = output_format or stream_format_for(output_path)
+        if self.format not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported timeline format: {self.format}")
+
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self.events_written = 0
+        self._file: IO[str] = open(output_file, "w", encoding="utf-8")
+        if self.format == "json":
+            self._file.write('{"timeline":[')
+
+    def write_event(self, event: Dict[str, Any]) -> None:
+        """Append a single timeline event."""
+        if self.format == "json":
+            if self.events_written:
+                self._file.write(",")
+            self._file.write(_dumps(event))
+        else:
+            self._file.write(_dumps(event))
+            self._file.write("\n")
+        self.events_written += 1
+
+    def finish(
+        self,
+        metadata: Dict[str, Any],
+        contributors: Dict[str, Any],
+        files: Dict[str, Any],
+        **sections: Any,
+    ) -> None:
+        """Write the trailing aggregates and close the file.
+
+        Extra keyword ``sections`` (e.g. ``rollups``) are written as
+        additional top-level keys.
+        """
+        summary = dict(sections, contributors=contributors, files=files)
+        summary["metadata"] = metadata
+        if self.format == "json":
+            self._file.write("]")
+            for key, value in summary.items():
+                self._file.write(f',"{key}":{_dumps(value)}')
+            self._file.write("}")
+        else:
+            self._file.write(_dumps(summary))
+            self._file.write("\n")
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying file."""
+        self._file.close()
+
+    def __enter__(self) -> "TimelineWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
 
 class DataExporter:
     """Handles exporting timeline data to various formats."""
@@ -24,6 +130,106 @@ class DataExporter:
 
         print(f"Timeline data exported to {output_path}")
 
+    @staticmethod
+    def open_timeline_writer(
+        output_path: str, output_format: Optional[str] = None
+    ) -> Union[TimelineWriter, ColumnarWriter]:
+        """Open a streaming timeline writer (``json``, ``ndjson`` or
+        ``columnar``)."""
+        if (output_format or stream_format_for(output_path)) == "columnar":
+            return ColumnarWriter(output_path)
+        return TimelineWriter(output_path, output_format)
+
+    @staticmethod
+    def export_columnar(data: Dict[str, Any], output_path: str) -> None:
+        """Export timeline data to the columnar binary format."""
+        writer = ColumnarWriter(output_path)
+        for event in data["timeline"]:
+            writer.write_event(event)
+        writer.finish(
+            data["metadata"],
+            data["contributors"],
+            data["files"],
+            **_extra_sections(data),
+        )
+
+        print(f"Timeline data exported to {output_path}")
+
+    @staticmethod
+    def load_timeline(input_path: str) -> Dict[str, Any]:
+        """Load timeline data written as JSON, NDJSON or columnar."""
+        input_format = stream_format_for(input_path)
+        if input_format == "columnar":
+            with ColumnarTimeline(input_path) as timeline:
+                return timeline.to_timeline_data()
+
+        with open(input_path, "r", encoding="utf-8") as f:
+            if input_format == "json":
+                return json.load(f)
+
+            timeline_data: Dict[str, Any] = {"timeline": []}
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "metadata" in record:
+                    timeline_data.update(record)
+                else:
+                    timeline_data["timeline"].append(record)
+            return timeline_data
+
+    @staticmethod
+    def load_summary(input_path: str) -> Dict[str, Any]:
+        """Load everything in a timeline file except its events.
+
+        Only a JSON document is decoded whole; the summary of NDJSON is its
+        last line and columnar files keep it in their directory.
+        """
+        input_format = stream_format_for(input_path)
+        if input_format == "columnar":
+            with ColumnarTimeline(input_path) as timeline:
+                return dict(
+                    timeline.sections,
+                    metadata=timeline.metadata,
+                    contributors=timeline.contributors,
+                    files=timeline.files,
+                )
+
+        with open(input_path, "r", encoding="utf-8") as f:
+            if input_format == "json":
+                summary = json.load(f)
+                summary.pop("timeline", None)
+                return summary
+
+            last = ""
+            for line in f:
+                if line.strip():
+                    last = line
+            record = json.loads(last) if last else {}
+            return record if "metadata" in record else {}
+
+    @staticmethod
+    def iter_events(input_path: str) -> Iterator[Dict[str, Any]]:
+        """Yield the timeline events of a timeline file in order.
+
+        NDJSON and columnar files are read one event at a time; a JSON
+        document has to be loaded whole first.
+        """
+        input_format = stream_format_for(input_path)
+        if input_format == "columnar":
+            with ColumnarTimeline(input_path) as timeline:
+                yield from timeline.iter_events()
+        elif input_format == "ndjson":
+            with open(input_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if "metadata" not in record:
+                        yield record
+        else:
+            yield from DataExporter.load_timeline(input_path).get("timeline", [])
+
     @staticmethod
     def export_csv(commits: List[Dict[str, Any]], output_path: str) -> None:
         """Export commit data to CSV format."""
@@ -64,45 +270,17 @@ class DataExporter:
 
     @staticmethod
     def create_timeline_data(
-        commits: List[Dict[str, Any]],
+        commits: Iterable[Dict[str, Any]],
         contributors: Dict[str, Any],
         files: Dict[str, Any],
     ) -> Dict[str, Any]:
         """Create complete timeline data structure for visualization."""
-        # Calculate cumulative statistics
-        cumulative_lines = 0
-        cumulative_files = 0
-        timeline_events = []
-
-        for commit in commits:
-            cumulative_lines += commit["lines_added"] - commit["lines_removed"]
-            cumulative_files = len(files)  # This is approximate
-
-            event = {
-                "timestamp": commit["timestamp"],
-                "datetime": commit["datetime"],
-                "commit_hash": commit["hash"],
-                "author": commit["author"],
-                "message": commit["message"],
-                "files_changed": commit["files_changed"],
-                "lines_added": commit["lines_added"],
-                "lines_removed": commit["lines_removed"],
-                "cumulative_lines": cumulative_lines,
-                "cumulative_files": cumulative_files,
-            }
-            timeline_events.append(event)
-
-        return {
-            "metadata": {
-                "total_commits": len(commits),
-                "total_contributors": len(contributors),
-                "total_files": len(files),
-                "date_range": {
-                    "start": commits[0]["datetime"] if commits else None,
-                    "end": commits[-1]["datetime"] if commits else None,
-                },
-            },
-            "timeline": timeline_events,
-            "contributors": contributors,
-            "files": files,
-        }
+        aggregator = TimelineAggregator()
+        timeline_events = [aggregator.add(commit) for commit in commits]
+
+        timeline_data = aggregator.timeline_data(timeline_events)
+        timeline_data["metadata"]["total_contributors"] = len(contributors)
+        timeline_data["metadata"]["total_files"] = len(files)
+        timeline_data["contributors"] = contributors
+        timeline_data["files"] = files
+        return timeline_data
@@ -0,0 +1,330 @@
+"""
+Fast commit extraction from ``git log --numstat --raw`` output.
+
+This engine produces the same commit dicts as the pydriller-based extraction
+in :class:`GitAnalyzer`, but only asks git for per-file line counts and change
+types instead of full patches, and streams everything through one subprocess.
+"""
+
+import subprocess
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    from .profiling import NULL_PROFILER, Profiler
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from profiling import NULL_PROFILER, Profiler
+
+# Each commit header starts with \x01 so it can be told apart from diff entries
+LOG_FORMAT = "%x01%H%x00%an%x00%ae%x00%at%x00%aI%x00%B%x00"
+HEADER_FIELDS = 6
+
+READ_SIZE = 1 << 16
+
+# git --raw status letters, mapped to pydriller ModificationType names
+CHANGE_TYPES = {
+    "A": "ADD",
+    "C": "COPY",
+    "D": "DELETE",
+    "M": "MODIFY",
+    "R": "RENAME",
+    "T": "MODIFY",
+}
+
+
+def log_command(extra_args: Optional[List[str]] = None) -> List[str]:
+    """Build the ``git log`` command line parsed by :func:`parse_log`."""
+    return [
+        "git",
+        "-c",
+        "log.showSignature=false",
+        "log",
+        "--no-walk=unsorted",
+        "--stdin",
+        "--root",
+        "-M",
+        "--raw",
+        "--numstat",
+        "--no-abbrev",
+        "--no-color",
+        "--no-ext-diff",
+        "-z",
+        f"--format={LOG_FORMAT}",
+    ] + (extra_args or [])
+
+
+def pathspecs(
+    include_paths: Iterable[str] = (), exclude_paths: Iterable[str] = ()
+) -> List[str]:
+    """Build literal git pathspecs selecting ``include_paths`` (files or
+    directories; everything if empty) minus ``exclude_paths``."""
+    return [f":(literal){path}" for path in include_paths] + [
+        f":(exclude,literal){path}" for path in exclude_paths
+    ]
+
+
+def _under(path: str, prefixes: List[str]) -> bool:
+    """Whether ``path`` is one of ``prefixes`` or inside one of them."""
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in prefixes)
+
+
+def path_scope(
+    include_paths: Iterable[str] = (), exclude_paths: Iterable[str] = ()
+) -> Optional[Callable[[Optional[str], Optional[str]], bool]]:
+    """Return a predicate telling whether a file change, given its old and
+    new path, touches ``include_paths`` (everything if empty) outside of
+    ``exclude_paths``; None if there are no path filters.
+
+    This is the Python counterpart of :func:`pathspecs`. Diffs are taken
+    over the whole tree, so renames across the filter boundary are still
+    detected, and the changes are then filtered with it.
+    """
+    include_paths = list(include_paths)
+    exclude_paths = list(exclude_paths)
+    if not include_paths and not exclude_paths:
+        return None
+
+    def in_scope(old_path: Optional[str], new_path: Optional[str]) -> bool:
+        for path in (new_path, old_path):
+            if path is None:
+                continue
+            if include_paths and not _under(path, include_paths):
+                continue
+            if not _under(path, exclude_paths):
+                return True
+        return False
+
+    return in_scope
+
+
+def iter_log_commits(
+    repo_path: str,
+    hashes: List[str],
+    scope: Optional[Callable[[Optional[str], Optional[str]], bool]] = None,
+    complexity: Optional[Callable[[str, str], Optional[int]]] = None,
+    profiler: Profiler = NULL_PROFILER,
+) -> Iterator[Dict[str, Any]]:
+    """Yield commit data for ``hashes``, in the given order.
+
+    The hashes are fed to a single ``git log --stdin`` process whose output
+    is parsed incrementally, so memory use does not grow with history size.
+    With ``scope`` (see :func:`path_scope`), only changes it accepts are
+    reported; every commit is still yielded, possibly with no changes.
+    ``complexity``, if given, is called with the path and blob SHA of each
+    changed file's new contents to fill in its complexity.
+    Time spent waiting for git output is recorded as ``extract.git`` span
+    of ``profiler``.
+    """
+    if not hashes:
+        return
+
+    process = subprocess.Popen(
+        log_command(),
+        cwd=repo_path,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    # Feed stdin from a thread; writing everything up front could deadlock
+    # once git fills the stdout pipe.
+    def feed() -> None:
+        try:
+            for commit_hash in hashes:
+                process.stdin.write(commit_hash.encode("ascii") + b"\n")
+        except BrokenPipeError:
+            pass
+        finally:
+            process.stdin.close()
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+
+    try:
+        read = profiler.timed("extract.git", process.stdout.read)
+        yield from parse_log(iter(lambda: read(READ_SIZE), b""), complexity, scope)
+    finally:
+        process.stdout.close()
+        writer.join()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(
+            f"git log failed ({returncode}): {stderr.decode('utf-8', 'replace')}"
+        )
+
+
+class BlobReader:
+    """Reads blob contents through one long-running ``git cat-file --batch``.
+
+    The process is started on first use; close the reader (or use it as a
+    context manager) to stop it.
+    """
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self.process: Optional[subprocess.Popen] = None
+
+    def read(self, blob: str) -> Optional[bytes]:
+        """Return the contents of ``blob``, or None if it is not a blob in
+        the repository (e.g. a submodule commit)."""
+        if self.process is None:
+            self.process = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.repo_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+        self.process.stdin.write(blob.encode("ascii") + b"\n")
+        self.process.stdin.flush()
+
+        # <sha> <type> <size>, or <sha> missing
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            return None
+        data = self.process.stdout.read(int(header[2]))
+        self.process.stdout.read(1)  # trailing newline
+        return data if header[1] == b"blob" else None
+
+    def close(self) -> None:
+        """Stop the ``git cat-file`` process."""
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+
+    def __enter__(self) -> "BlobReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _decode(value: bytes) -> str:
+    return value.decode("utf-8", "replace")
+
+
+def _tokens(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a stream of byte chunks on NUL, yielding complete tokens."""
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        parts = pending.split(b"\0")
+        pending = parts.pop()
+        yield from parts
+    if pending:
+        yield pending
+
+
+def parse_log(
+    chunks: Iterable[bytes],
+    complexity: Optional[Callable[[str, str], Optional[int]]] = None,
+    scope: Optional[Callable[[Optional[str], Optional[str]], bool]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Parse ``git log -z --raw --numstat`` output into commit dicts.
+
+    For every commit git emits the header built from :data:`LOG_FORMAT`, one
+    raw entry per file (status and paths) and then one numstat entry per
+    file (line counts), both in the same file order. ``complexity`` and
+    ``scope`` are as for :func:`iter_log_commits`.
+    """
+    tokens = _tokens(chunks)
+    commit = None
+    # None for changes left out by ``scope``, to keep numstat entries aligned
+    files: List[Optional[Dict[str, Any]]] = []
+    numstat_index = 0
+
+    for token in tokens:
+        if token.startswith(b"\x01"):
+            if commit is not None:
+                yield _finish_commit(commit, files)
+            header = [token[1:]] + [next(tokens) for _ in range(HEADER_FIELDS - 1)]
+            commit = _parse_header(header)
+            files = []
+            numstat_index = 0
+            continue
+
+        token = token.lstrip(b"\n")
+        if not token:
+            continue
+
+        if token.startswith(b":"):
+            # :<old mode> <new mode> <old sha> <new sha> <status>
+            _, _, old_sha, new_sha, status = _decode(token[1:]).split(" ")
+            letter = status[0]
+            if letter in "RC":
+                old_path = _decode(next(tokens))
+                new_path = _decode(next(tokens))
+            else:
+                path = _decode(next(tokens))
+                old_path = None if letter == "A" else path
+                new_path = None if letter == "D" else path
+
+            if scope is not None and not scope(old_path, new_path):
+                files.append(None)
+                continue
+
+            change_type = CHANGE_TYPES.get(letter, "UNKNOWN")
+            if letter == "M" and old_sha == new_sha:
+                # Mode-only change; pydriller reports these as UNKNOWN
+                change_type = "UNKNOWN"
+
+            files.append(
+                {
+                    "filename": (new_path or old_path).rsplit("/", 1)[-1],
+                    "old_path": old_path,
+                    "new_path": new_path,
+                    "change_type": change_type,
+                    "lines_added": 0,
+                    "lines_removed": 0,
+                    "complexity": (
+                        complexity(new_path, new_sha)
+                        if complexity and new_path is not None
+                        else None
+                    ),
+                }
+            )
+            continue
+
+        # <added>\t<removed>\t<path>, or an empty path followed by the
+        # old and new path tokens for renames and copies
+        added, removed, path = token.split(b"\t", 2)
+        if not path:
+            next(tokens)
+            next(tokens)
+
+        file_data = files[numstat_index] if numstat_index < len(files) else None
+        if file_data is not None:
+            # Binary files report "-" for both counts
+            file_data["lines_added"] = int(added) if added != b"-" else 0
+            file_data["lines_removed"] = int(removed) if removed != b"-" else 0
+        numstat_index += 1
+
+    if commit is not None:
+        yield _finish_commit(commit, files)
+
+
+def _parse_header(fields: List[bytes]) -> Dict[str, Any]:
+    commit_hash, name, email, timestamp, iso_date, body = map(_decode, fields)
+    return {
+        "hash": commit_hash,
+        "author": name,
+        "email": email,
+        "timestamp": float(timestamp),
+        "datetime": iso_date,
+        "message": body.strip(),
+    }
+
+
+def _finish_commit(
+    commit: Dict[str, Any], files: List[Optional[Dict[str, Any]]]
+) -> Dict:
+    files = [file_data for file_data in files if file_data is not None]
+    commit["files_changed"] = files
+    commit["lines_added"] = sum(f["lines_added"] for f in files)
+    commit["lines_removed"] = sum(f["lines_removed"] for f in files)
+    commit["total_files"] = len(files)
+    return commit
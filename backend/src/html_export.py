@@ -0,0 +1,528 @@
+"""
+Self-contained HTML export of a timeline.
+
+The page needs no server and no other files. Rollups and the chunk index
+are embedded as plain JSON, so the overview chart is drawn as soon as the
+page opens. Events are embedded in chunks of :data:`CHUNK_EVENTS`:
+
+- each chunk is column-oriented, with timestamps, path ids and cumulative
+  counts delta-encoded;
+- each chunk is gzipped and base64-encoded;
+- the browser inflates a chunk (with ``DecompressionStream``) the first
+  time the scrubber enters it.
+
+Paths and authors are interned in shared tables.
+"""
+
+import base64
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from .exporter import DataExporter
+    from .identity import identity_key
+    from .rollups import RollupBuilder
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from exporter import DataExporter
+    from identity import identity_key
+    from rollups import RollupBuilder
+
+FORMAT_VERSION = 1
+
+CHUNK_EVENTS = 1000
+
+# Commit messages are cut to their first line and this many characters
+MESSAGE_LENGTH = 120
+
+TOP_CONTRIBUTORS = 50
+
+CHANGE_CODES = {
+    "ADD": "A",
+    "MODIFY": "M",
+    "DELETE": "D",
+    "RENAME": "R",
+    "COPY": "C",
+    "UNKNOWN": "U",
+}
+
+_ROLLUP_FIELDS = (
+    "start",
+    "commits",
+    "lines_added",
+    "lines_removed",
+    "authors",
+    "files",
+)
+
+
+def _script_json(value: Any) -> str:
+    """Serialize ``value`` as JSON that is safe inside a ``<script>`` tag."""
+    text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return text.replace("</", "<\\/")
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+    )
+
+
+def pack(value: Any) -> str:
+    """Encode ``value`` as base64 of gzipped compact JSON."""
+    raw = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return base64.b64encode(gzip.compress(raw.encode("utf-8"), mtime=0)).decode()
+
+
+def unpack(text: str) -> Any:
+    """Decode a value encoded with :func:`pack`."""
+    return json.loads(gzip.decompress(base64.b64decode(text)).decode("utf-8"))
+
+
+class _ChunkEncoder:
+    """Turns runs of timeline events into delta-encoded column chunks."""
+
+    def __init__(self):
+        self.paths: Dict[str, int] = {}
+        self.authors: Dict[str, int] = {}
+        self.total = 0
+        self.lines = 0  # cumulative counts before the next chunk
+        self.files = 0
+
+    def _intern(self, table: Dict[str, int], value: str) -> int:
+        index = table.get(value)
+        if index is None:
+            index = table[value] = len(table)
+        return index
+
+    def encode(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Encode ``events``; return the chunk's index entry and columns."""
+        first = int(events[0]["timestamp"])
+        entry = {
+            "first": self.total,
+            "count": len(events),
+            "start": first,
+            "end": int(events[-1]["timestamp"]),
+            "lines": self.lines,
+            "files": self.files,
+        }
+        columns: Dict[str, Any] = {
+            key: [] for key in ("t", "h", "a", "m", "la", "lr", "cl", "cf", "n")
+        }
+        columns.update(p=[], c=[], fa=[], fr=[])
+        previous_time = first
+        previous_path = 0
+        for event in events:
+            timestamp = int(event["timestamp"])
+            columns["t"].append(timestamp - previous_time)
+            previous_time = timestamp
+            commit_hash = event.get("commit_hash") or event.get("hash") or ""
+            columns["h"].append(commit_hash[:10])
+            columns["a"].append(self._intern(self.authors, event["author"]))
+            message = (event.get("message") or "").split("\n", 1)[0]
+            columns["m"].append(message[:MESSAGE_LENGTH])
+            columns["la"].append(event["lines_added"])
+            columns["lr"].append(event["lines_removed"])
+            lines = event.get("cumulative_lines", self.lines)
+            files = event.get("cumulative_files", self.files)
+            columns["cl"].append(lines - self.lines)
+            columns["cf"].append(files - self.files)
+            self.lines, self.files = lines, files
+
+            changes = event.get("files_changed", [])
+            columns["n"].append(len(changes))
+            for change in changes:
+                path = change["new_path"] or change["old_path"] or change["filename"]
+                path_id = self._intern(self.paths, path)
+                columns["p"].append(path_id - previous_path)
+                previous_path = path_id
+                columns["c"].append(CHANGE_CODES.get(change["change_type"], "U"))
+                columns["fa"].append(change["lines_added"])
+                columns["fr"].append(change["lines_removed"])
+        columns["c"] = "".join(columns["c"])
+        self.total += len(events)
+        return {"entry": entry, "columns": columns}
+
+
+def _compact_rollups(rollups: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Turn rollup buckets into one array per field."""
+    return {
+        resolution: {
+            field: [bucket[field] for bucket in buckets] for field in _ROLLUP_FIELDS
+        }
+        for resolution, buckets in rollups.items()
+    }
+
+
+def export_html(
+    input_path: str,
+    output_path: str,
+    title: Optional[str] = None,
+    chunk_events: int = CHUNK_EVENTS,
+) -> Dict[str, int]:
+    """Write a timeline file as a single self-contained HTML page.
+
+    Events are streamed from ``input_path`` and each chunk is written as
+    soon as it is full, so memory use does not grow with the history.
+    Returns the number of ``events`` and ``chunks`` and the file size in
+    ``bytes``.
+    """
+    summary = DataExporter.load_summary(input_path)
+    title = title or Path(input_path).stem
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    encoder = _ChunkEncoder()
+    rollups = RollupBuilder()
+    index: List[Dict[str, Any]] = []
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(
+            _PAGE_HEAD.replace("{{title}}", _escape(title)).replace(
+                "{{version}}", str(FORMAT_VERSION)
+            )
+        )
+
+        def write_chunk(events: List[Dict[str, Any]]) -> None:
+            chunk = encoder.encode(events)
+            f.write(
+                f'<script type="text/plain" id="chunk-{len(index)}">'
+                f"{pack(chunk['columns'])}</script>\n"
+            )
+            index.append(chunk["entry"])
+
+        buffer: List[Dict[str, Any]] = []
+        for event in DataExporter.iter_events(input_path):
+            rollups.add(event, identity_key(event["author"], event.get("email")))
+            buffer.append(event)
+            if len(buffer) >= chunk_events:
+                write_chunk(buffer)
+                buffer = []
+        if buffer:
+            write_chunk(buffer)
+
+        contributors = sorted(
+            summary.get("contributors", {}).items(),
+            key=lambda item: item[1].get("commits", 0),
+            reverse=True,
+        )[:TOP_CONTRIBUTORS]
+        header = {
+            "version": FORMAT_VERSION,
+            "title": title,
+            "metadata": summary.get("metadata", {}),
+            "rollups": _compact_rollups(rollups.to_dict()),
+            "authors": list(encoder.authors),
+            "chunks": index,
+            "contributors": [
+                {
+                    "name": name,
+                    "commits": stats.get("commits", 0),
+                    "lines_added": stats.get("lines_added", 0),
+                    "lines_removed": stats.get("lines_removed", 0),
+                }
+                for name, stats in contributors
+            ],
+        }
+        f.write(
+            f'<script type="text/plain" id="paths">{pack(list(encoder.paths))}'
+            "</script>\n"
+        )
+        f.write(
+            f'<script type="application/json" id="header">{_script_json(header)}'
+            "</script>\n"
+        )
+        f.write(_PAGE_SCRIPT)
+
+    return {
+        "events": encoder.total,
+        "chunks": len(index),
+        "bytes": output_file.stat().st_size,
+    }
+
+
+_PAGE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<meta name="generator" content="codevis html export v{{version}}">
+<title>{{title}}</title>
+<style>
+:root { color-scheme: dark; --bg: #0e0f14; --panel: #171a22; --line: #262b38;
+  --text: #d8dee9; --muted: #8a93a6; --accent: #58a6ff; --add: #3fb950;
+  --del: #f85149; }
+* { box-sizing: border-box; }
+body { margin: 0; font: 14px/1.4 system-ui, sans-serif; background: var(--bg);
+  color: var(--text); }
+header, main { padding: 12px 20px; }
+h1 { margin: 0 0 4px; font-size: 20px; }
+.muted { color: var(--muted); }
+#overview { width: 100%; height: 120px; display: block; cursor: crosshair;
+  background: var(--panel); border: 1px solid var(--line); border-radius: 4px; }
+.controls { display: flex; gap: 12px; align-items: center; margin: 10px 0; }
+.controls input { flex: 1; }
+button { background: var(--panel); color: var(--text); border: 1px solid var(--line);
+  border-radius: 4px; padding: 4px 14px; cursor: pointer; }
+.stats { display: flex; gap: 24px; margin: 8px 0 16px; }
+.stats b { display: block; font-size: 20px; }
+.panes { display: grid; grid-template-columns: 2fr 1fr 1fr; gap: 16px; }
+.pane { background: var(--panel); border: 1px solid var(--line); border-radius: 4px;
+  padding: 8px 12px; min-height: 200px; overflow: hidden; }
+.pane h2 { font-size: 13px; text-transform: uppercase; color: var(--muted);
+  margin: 0 0 8px; }
+.row { padding: 3px 0; border-bottom: 1px solid var(--line); white-space: nowrap;
+  overflow: hidden; text-overflow: ellipsis; }
+.row.current { color: var(--accent); }
+.add { color: var(--add); } .del { color: var(--del); }
+code { color: var(--muted); }
+</style>
+</head>
+<body>
+<header>
+<h1 id="title">{{title}}</h1>
+<div id="summary" class="muted"></div>
+</header>
+<main>
+<canvas id="overview"></canvas>
+<div class="controls">
+<button id="play">Play</button>
+<input id="scrubber" type="range" step="any">
+<span id="date" class="muted"></span>
+</div>
+<div class="stats">
+<div><b id="stat-commits">0</b><span class="muted">commits</span></div>
+<div><b id="stat-lines">0</b><span class="muted">lines</span></div>
+<div><b id="stat-files">0</b><span class="muted">files</span></div>
+</div>
+<div class="panes">
+<div class="pane"><h2>Commits</h2><div id="commits"></div></div>
+<div class="pane"><h2>Files changed</h2><div id="files"></div></div>
+<div class="pane"><h2>Top contributors</h2><div id="contributors"></div></div>
+</div>
+</main>
+"""
+
+_PAGE_SCRIPT = """<script>
+(function () {
+  "use strict";
+  var header = JSON.parse(document.getElementById("header").textContent);
+  var chunks = header.chunks;
+  var decoded = new Map();  // chunk number -> Promise of its events
+  var paths = null;
+  var CHANGE_NAMES = {A: "added", M: "modified", D: "deleted", R: "renamed",
+                      C: "copied", U: "changed"};
+
+  function inflate(id) {
+    var text = document.getElementById(id).textContent;
+    var binary = atob(text);
+    var bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+    var stream = new Blob([bytes]).stream()
+      .pipeThrough(new DecompressionStream("gzip"));
+    return new Response(stream).text().then(JSON.parse);
+  }
+
+  function loadPaths() {
+    if (!paths) paths = inflate("paths");
+    return paths;
+  }
+
+  function loadChunk(n) {
+    if (!decoded.has(n)) {
+      decoded.set(n, Promise.all([inflate("chunk-" + n), loadPaths()])
+        .then(function (result) {
+          return decodeChunk(chunks[n], result[0], result[1]);
+        }));
+    }
+    return decoded.get(n);
+  }
+
+  function decodeChunk(entry, c, pathTable) {
+    var events = [], time = entry.start, lines = entry.lines, files = entry.files;
+    var path = 0, k = 0;
+    for (var i = 0; i < entry.count; i++) {
+      time += c.t[i]; lines += c.cl[i]; files += c.cf[i];
+      var changes = [];
+      for (var j = 0; j < c.n[i]; j++, k++) {
+        path += c.p[k];
+        changes.push({path: pathTable[path], type: c.c[k], added: c.fa[k],
+                      removed: c.fr[k]});
+      }
+      events.push({index: entry.first + i, time: time, hash: c.h[i],
+                   author: header.authors[c.a[i]], message: c.m[i],
+                   added: c.la[i], removed: c.lr[i], lines: lines, files: files,
+                   changes: changes});
+    }
+    return events;
+  }
+
+  // Last chunk (or event) starting at or before time t, -1 if none
+  function lastAtOrBefore(items, t, key) {
+    var lo = 0, hi = items.length;
+    while (lo < hi) {
+      var mid = (lo + hi) >> 1;
+      if (key(items[mid]) <= t) lo = mid + 1; else hi = mid;
+    }
+    return lo - 1;
+  }
+
+  function el(tag, className, text) {
+    var node = document.createElement(tag);
+    if (className) node.className = className;
+    if (text !== undefined) node.textContent = text;
+    return node;
+  }
+
+  function formatDate(t) {
+    return new Date(t * 1000).toISOString().slice(0, 10);
+  }
+
+  var meta = header.metadata || {};
+  var start = chunks.length ? chunks[0].start : 0;
+  var last = chunks[chunks.length - 1];
+  var end = last ? last.end : 0;
+  var total = last ? last.first + last.count : 0;
+  document.getElementById("summary").textContent = total + " commits, " +
+    (meta.total_contributors || header.authors.length) + " contributors, " +
+    (chunks.length ? formatDate(start) + " to " + formatDate(end) : "no history");
+
+  var contributors = document.getElementById("contributors");
+  header.contributors.forEach(function (c) {
+    var row = el("div", "row");
+    row.appendChild(el("span", null, c.name + " "));
+    row.appendChild(el("span", "muted", c.commits + " commits"));
+    contributors.appendChild(row);
+  });
+
+  // Overview: commits per bucket at the finest resolution that fits
+  var canvas = document.getElementById("overview");
+  var rollup = null;
+  function pickRollup() {
+    var width = canvas.clientWidth || 800;
+    var names = ["day", "week", "month"];
+    for (var i = 0; i < names.length; i++) {
+      var r = header.rollups[names[i]];
+      if (r && (r.start.length <= width / 2 || i === names.length - 1)) return r;
+    }
+    return null;
+  }
+
+  function drawOverview(cursor) {
+    var ratio = window.devicePixelRatio || 1;
+    var width = canvas.clientWidth, height = canvas.clientHeight;
+    canvas.width = width * ratio; canvas.height = height * ratio;
+    var ctx = canvas.getContext("2d");
+    ctx.scale(ratio, ratio);
+    ctx.clearRect(0, 0, width, height);
+    if (!rollup || end <= start) return;
+    var max = Math.max.apply(null, rollup.commits.concat([1]));
+    var span = end - start;
+    var barWidth = Math.max(1, width / rollup.start.length - 1);
+    ctx.fillStyle = "#3b4a6b";
+    for (var i = 0; i < rollup.start.length; i++) {
+      var x = (rollup.start[i] - start) / span * width;
+      var h = rollup.commits[i] / max * (height - 10);
+      ctx.fillRect(Math.max(0, x), height - h, barWidth, h);
+    }
+    ctx.fillStyle = "#58a6ff";
+    ctx.fillRect((cursor - start) / span * width - 1, 0, 2, height);
+  }
+
+  var scrubber = document.getElementById("scrubber");
+  scrubber.min = start; scrubber.max = end; scrubber.value = end;
+  var request = 0;
+
+  function show(t) {
+    var token = ++request;
+    document.getElementById("date").textContent = chunks.length ? formatDate(t) : "";
+    drawOverview(t);
+    var n = lastAtOrBefore(chunks, t, function (c) { return c.start; });
+    if (n < 0) { render([], null); return; }
+    var wanted = [n];
+    if (n > 0) wanted.unshift(n - 1);  // for the commits just before a chunk starts
+    Promise.all(wanted.map(loadChunk)).then(function (parts) {
+      if (token !== request) return;  // the scrubber moved on meanwhile
+      var events = [].concat.apply([], parts);
+      var i = lastAtOrBefore(events, t, function (e) { return e.time; });
+      render(events.slice(Math.max(0, i - 14), i + 1).reverse(), events[i]);
+    });
+  }
+
+  function render(recent, current) {
+    document.getElementById("stat-commits").textContent =
+      current ? current.index + 1 : 0;
+    document.getElementById("stat-lines").textContent = current ? current.lines : 0;
+    document.getElementById("stat-files").textContent = current ? current.files : 0;
+    var list = document.getElementById("commits");
+    list.textContent = "";
+    recent.forEach(function (e) {
+      var row = el("div", e === current ? "row current" : "row");
+      row.appendChild(el("code", null, e.hash + " "));
+      row.appendChild(el("span", "muted", formatDate(e.time) + " " + e.author + " "));
+      row.appendChild(el("span", null, e.message + " "));
+      row.appendChild(el("span", "add", "+" + e.added + " "));
+      row.appendChild(el("span", "del", "-" + e.removed));
+      list.appendChild(row);
+    });
+    var files = document.getElementById("files");
+    files.textContent = "";
+    (current ? current.changes : []).forEach(function (change) {
+      var row = el("div", "row");
+      row.title = CHANGE_NAMES[change.type] || "";
+      row.appendChild(el("code", null, change.type + " "));
+      row.appendChild(el("span", null, change.path + " "));
+      row.appendChild(el("span", "add", "+" + change.added + " "));
+      row.appendChild(el("span", "del", "-" + change.removed));
+      files.appendChild(row);
+    });
+  }
+
+  scrubber.addEventListener("input", function () { show(+scrubber.value); });
+  function seek(event) {
+    var box = canvas.getBoundingClientRect();
+    scrubber.value = start + (event.clientX - box.left) / box.width * (end - start);
+    show(+scrubber.value);
+  }
+  canvas.addEventListener("mousedown", function (event) {
+    seek(event);
+    canvas.onmousemove = seek;
+  });
+  window.addEventListener("mouseup", function () { canvas.onmousemove = null; });
+  window.addEventListener("resize", function () {
+    rollup = pickRollup();
+    drawOverview(+scrubber.value);
+  });
+
+  // Play through the whole history in about a minute
+  var playing = null;
+  var button = document.getElementById("play");
+  button.addEventListener("click", function () {
+    if (playing) {
+      cancelAnimationFrame(playing); playing = null; button.textContent = "Play";
+      return;
+    }
+    var t = +scrubber.value >= end ? start : +scrubber.value;
+    button.textContent = "Pause";
+    var last = performance.now();
+    function step(now) {
+      t = Math.min(end, t + (end - start) * (now - last) / 60000);
+      last = now;
+      scrubber.value = t;
+      show(t);
+      if (t >= end) { playing = null; button.textContent = "Play"; return; }
+      playing = requestAnimationFrame(step);
+    }
+    playing = requestAnimationFrame(step);
+  });
+
+  rollup = pickRollup();
+  show(end);
+})();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,146 @@
+"""
+Author identity resolution: ``.mailmap`` support and identity interning.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_ENTRY = re.compile(r"\s*([^<#]*?)\s*<([^>]*)>")
+
+
+class Mailmap:
+    """Maps commit author names/emails to canonical ones, as git does.
+
+    Supports every ``.mailmap`` line form::
+
+        Proper Name <commit@email>
+        <proper@email> <commit@email>
+        Proper Name <proper@email> <commit@email>
+        Proper Name <proper@email> Commit Name <commit@email>
+
+    Emails and names are matched case-insensitively; an entry naming both
+    the commit name and email wins over an email-only one.
+    """
+
+    def __init__(self):
+        """Create an empty mailmap (which maps every identity to itself)."""
+        # commit email -> commit name (or None) -> (proper name, proper email)
+        self.entries: Dict[str, Dict[Optional[str], Tuple[str, str]]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def add_line(self, line: str) -> None:
+        """Add one ``.mailmap`` line; comments and malformed lines are ignored."""
+        if line.lstrip().startswith("#"):
+            return
+        matches = list(_ENTRY.finditer(line))
+        if not matches:
+            return
+
+        proper_name, proper_email = matches[0].group(1), matches[0].group(2)
+        if len(matches) == 1:
+            commit_name, commit_email = None, proper_email
+            proper_email = ""
+        else:
+            commit_name = matches[1].group(1) or None
+            commit_email = matches[1].group(2)
+
+        by_name = self.entries.setdefault(commit_email.lower(), {})
+        key = commit_name.lower() if commit_name else None
+        old_name, old_email = by_name.get(key, ("", ""))
+        by_name[key] = (proper_name or old_name, proper_email or old_email)
+
+    def update(self, lines: Iterable[str]) -> None:
+        """Add ``.mailmap`` lines; later lines override earlier ones."""
+        for line in lines:
+            self.add_line(line)
+
+    @classmethod
+    def load(
+        cls, repo_path: Optional[str] = None, extra_files: Iterable[str] = ()
+    ) -> "Mailmap":
+        """Read the repository's ``.mailmap`` and any extra alias files.
+
+        Extra files use the same format and take precedence, which is how
+        alias rules that do not belong in the repository are supplied.
+        """
+        mailmap = cls()
+        paths = [Path(repo_path) / ".mailmap"] if repo_path else []
+        paths.extend(Path(path) for path in extra_files)
+        for path in paths:
+            if path.is_file():
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    mailmap.update(f)
+        return mailmap
+
+    def lookup(self, name: str, email: str) -> Tuple[str, str]:
+        """Return the canonical ``(name, email)`` of a commit identity."""
+        by_name = self.entries.get(email.lower())
+        if by_name is None:
+            return name, email
+        entry = by_name.get(name.lower()) or by_name.get(None)
+        if entry is None:
+            return name, email
+        proper_name, proper_email = entry
+        return proper_name or name, proper_email or email
+
+
+def identity_key(name: str, email: Optional[str]) -> str:
+    """Return the key identifying the author with canonical ``name`` and
+    ``email``: the email (case-insensitive), or the name if there is none."""
+    return email.lower() if email else "\0" + name
+
+
+class IdentityTable:
+    """Interns author identities to dense integer ids.
+
+    An identity is a canonical email (case-insensitive): after applying the
+    mailmap, spellings of one person's name under the same email collapse
+    into one identity, while different people sharing a name stay apart.
+    Each raw ``(name, email)`` pair is resolved once, later lookups are a
+    single dict hit.
+    """
+
+    def __init__(self, mailmap: Optional[Mailmap] = None):
+        """Create an empty table, resolving through ``mailmap`` if given."""
+        self.mailmap = mailmap or Mailmap()
+        self.names: List[str] = []
+        self.emails: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._resolved: Dict[Tuple[str, str], int] = {}
+
+    def resolve(self, name: str, email: str) -> int:
+        """Return the identity id of a commit's author name and email."""
+        identity_id = self._resolved.get((name, email))
+        if identity_id is not None:
+            return identity_id
+
+        canonical_name, canonical_email = self.mailmap.lookup(name, email)
+        # Authors without an email can only be told apart by name
+        key = identity_key(canonical_name, canonical_email)
+        identity_id = self._ids.get(key)
+        if identity_id is None:
+            identity_id = self._ids[key] = len(self.names)
+            self.names.append(canonical_name)
+            self.emails.append(canonical_email)
+        self._resolved[(name, email)] = identity_id
+        return identity_id
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def labels(self) -> List[str]:
+        """Return a unique display label per identity id.
+
+        Labels are names; identities sharing a name are labelled
+        ``"Name <email>"`` to keep them apart.
+        """
+        counts: Dict[str, int] = {}
+        for name in self.names:
+            counts[name] = counts.get(name, 0) + 1
+        return [
+            name if counts[name] == 1 else f"{name} <{email}>"
+            for name, email in zip(self.names, self.emails)
+        ]
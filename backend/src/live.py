@@ -0,0 +1,232 @@
+"""
+Live timeline: keeps a served timeline current as the repository changes.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from git import GitCommandError
+
+try:
+    from .aggregator import TimelineAggregator
+    from .analyzer import GitAnalyzer
+    from .timeline_index import TimelineIndex
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from aggregator import TimelineAggregator
+    from analyzer import GitAnalyzer
+    from timeline_index import TimelineIndex
+
+logger = logging.getLogger(__name__)
+
+
+class LiveTimeline:
+    """Maintains the timeline of a repository and publishes its changes.
+
+    The full history is analyzed once; after that :meth:`refresh` only
+    extracts the commits that are new since the last analyzed HEAD, folds
+    them into the same aggregates and appends them to :attr:`index`.
+    Each change is published as a numbered update:
+
+    - ``delta``: the new timeline events, the updated metadata, and the
+      contributors and files the new commits touched (``removed_files``
+      lists paths whose records moved away through renames).
+    - ``reset``: the history was rewritten (or new commits predate the
+      newest event), so the timeline was rebuilt; clients reload it.
+
+    The last :attr:`BACKLOG` updates are kept so clients that reconnect
+    can catch up (see :meth:`updates`).
+    """
+
+    BACKLOG = 256
+
+    def __init__(self, analyzer: GitAnalyzer):
+        """Analyze the repository behind ``analyzer`` and start tracking it."""
+        self.analyzer = analyzer
+        self.version = 0
+        self.condition = threading.Condition()
+        # (version, type, JSON payload)
+        self.backlog: Deque[Tuple[int, str, str]] = deque(maxlen=self.BACKLOG)
+        self.head = self._current_head()
+        self._rebuild()
+
+    def _current_head(self) -> Optional[str]:
+        """Return the commit HEAD points at (None for an empty repository)."""
+        try:
+            return self.analyzer.repo.head.commit.hexsha
+        except ValueError:
+            return None
+
+    def _rebuild(self) -> None:
+        """Analyze the whole history into a fresh aggregator and index."""
+        aggregator = TimelineAggregator()
+        events = [aggregator.add(commit) for commit in self.analyzer.iter_commits()]
+        self.aggregator = aggregator
+        self.index = TimelineIndex(
+            events,
+            metadata=aggregator.metadata(),
+            contributors=aggregator.contributor_stats(),
+            files=aggregator.file_stats(),
+            rollups=aggregator.rollups.to_dict(),
+            tree=aggregator.tree,
+        )
+
+    def _is_ancestor(self, commit: str, head: str) -> bool:
+        try:
+            self.analyzer.repo.git.merge_base("--is-ancestor", commit, head)
+            return True
+        except GitCommandError:
+            return False
+
+    def refresh(self) -> Optional[str]:
+        """Pick up commits made since the last refresh.
+
+        Returns the type of the published update, or None if HEAD did not
+        move.
+        """
+        head = self._current_head()
+        if head == self.head:
+            return None
+
+        commits: List[Dict[str, Any]] = []
+        appendable = self.head is None or (
+            head is not None and self._is_ancestor(self.head, head)
+        )
+        if appendable:
+            exclude = [self.head] if self.head else []
+            hashes = self.analyzer.list_commits_by_date(exclude=exclude)
+            commits = list(self.analyzer.iter_commits(hashes))
+            timestamps = self.index.timestamps
+            # The timeline is ordered by author date; commits slotting in
+            # before the newest event (e.g. a merged branch with old
+            # commits) change every later event's cumulative counts.
+            appendable = not (
+                commits and timestamps and commits[0]["timestamp"] < timestamps[-1]
+            )
+
+        self.head = head
+        if not appendable:
+            self._rebuild()
+            self._publish("reset", {"head": head, "metadata": self.index.metadata})
+            return "reset"
+
+        self._publish("delta", self._apply(commits, head))
+        return "delta"
+
+    def _apply(self, commits: List[Dict[str, Any]], head: str) -> Dict[str, Any]:
+        """Fold new commits into the aggregates and index; return the delta."""
+        aggregator, index = self.aggregator, self.index
+        labels_before = aggregator.identities.labels()
+        touched_authors: Set[int] = set()
+        touched_paths: Set[str] = set()
+        renamed_from: Set[str] = set()
+
+        with index.lock:
+            events = []
+            for commit in commits:
+                events.append(aggregator.add(commit))
+                touched_authors.add(
+                    aggregator.identities.resolve(commit["author"], commit["email"])
+                )
+                for change in commit["files_changed"]:
+                    path = change["new_path"] or change["old_path"]
+                    touched_paths.add(path)
+                    if change["change_type"] == "RENAME" and change["old_path"]:
+                        renamed_from.add(change["old_path"])
+            index.extend(events)
+
+        relabelled = aggregator.identities.labels()[: len(labels_before)] != (
+            labels_before
+        )
+        if relabelled:
+            # A new namesake changed existing contributors' labels, which
+            # also appear in file author lists: resend everything
+            touched_authors = set(aggregator.contributors)
+            touched_paths = set(aggregator.files)
+
+        contributors = aggregator.contributor_stats(touched_authors)
+        files = aggregator.file_stats(touched_paths)
+        removed = sorted(p for p in renamed_from if p not in aggregator.files)
+
+        # Replace rather than mutate the served dicts, so requests being
+        # answered concurrently see either the old or the new version
+        if relabelled:
+            index.contributors = contributors
+            index.files = files
+        else:
+            index.contributors = {**index.contributors, **contributors}
+            updated_files = {**index.files, **files}
+            for path in removed:
+                updated_files.pop(path, None)
+            index.files = updated_files
+        index.rollups = aggregator.rollups.to_dict()
+        index.metadata = aggregator.metadata()
+
+        return {
+            "head": head,
+            "events": events,
+            "metadata": index.metadata,
+            "contributors": contributors,
+            "files": files,
+            "removed_files": removed,
+        }
+
+    def _publish(self, update_type: str, payload: Dict[str, Any]) -> None:
+        with self.condition:
+            self.version += 1
+            payload = dict(payload, type=update_type, id=self.version)
+            self.backlog.append((self.version, update_type, json.dumps(payload)))
+            self.condition.notify_all()
+
+    def updates(
+        self, last_id: Optional[int] = None, heartbeat: float = 15.0
+    ) -> Iterator[Optional[Tuple[int, str, str]]]:
+        """Return an iterator over ``(id, type, JSON payload)`` updates.
+
+        It starts after update ``last_id`` (default: the latest update at
+        the time of the call). If updates after it have already left the
+        backlog, or ``last_id`` is from before a server restart (newer than
+        any update here), a ``reset`` comes first. ``None`` is yielded every
+        ``heartbeat`` seconds without updates, so callers can keep idle
+        connections alive.
+        """
+        reset = None
+        with self.condition:
+            position = self.version if last_id is None else last_id
+            behind = self.backlog and position < self.backlog[0][0] - 1
+            if behind or position > self.version:
+                position = self.version
+                payload = {"head": self.head, "metadata": self.index.metadata}
+                payload.update(type="reset", id=position)
+                reset = (position, "reset", json.dumps(payload))
+        return self._follow(position, reset, heartbeat)
+
+    def _follow(
+        self,
+        position: int,
+        reset: Optional[Tuple[int, str, str]],
+        heartbeat: float,
+    ) -> Iterator[Optional[Tuple[int, str, str]]]:
+        if reset is not None:
+            yield reset
+        while True:
+            with self.condition:
+                if self.version <= position:
+                    self.condition.wait(heartbeat)
+                pending = [update for update in self.backlog if update[0] > position]
+            if not pending:
+                yield None
+                continue
+            for update in pending:
+                position = update[0]
+                yield update
+
+    def watch(self, interval: float, stop: threading.Event) -> None:
+        """Refresh every ``interval`` seconds until ``stop`` is set."""
+        while not stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh the live timeline")
@@ -2,14 +2,75 @@
 Main module for codebase timeline visualization backend.
 """
 
+import os
 from pathlib import Path
-from typing import Dict, Any
-from .analyzer import GitAnalyzer
-from .exporter import DataExporter
+from typing import Dict, Any, Iterable
 
+try:
+    from .aggregator import TimelineAggregator
+    from .analysis_db import AnalysisDatabaseWriter
+    from .analyzer import ENGINES, GitAnalyzer
+    from .exporter import STREAM_FORMATS, DataExporter
+    from .profiling import NULL_PROFILER, Profiler
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from aggregator import TimelineAggregator
+    from analysis_db import AnalysisDatabaseWriter
+    from analyzer import ENGINES, GitAnalyzer
+    from exporter import STREAM_FORMATS, DataExporter
+    from profiling import NULL_PROFILER, Profiler
 
-def analyze_repository(repo_path: str, output_path: str = None) -> Dict[str, Any]:
-    """Analyze a Git repository and generate timeline data."""
+
+def analyze_repository(
+    repo_path: str,
+    output_path: str = None,
+    use_cache: bool = False,
+    cache_dir: str = None,
+    workers: int = 1,
+    engine: str = "pydriller",
+    output_format: str = None,
+    keep_timeline: bool = True,
+    mailmap: bool = True,
+    alias_files: Iterable[str] = (),
+    since: str = None,
+    until: str = None,
+    from_commit: str = None,
+    to_commit: str = None,
+    include_paths: Iterable[str] = (),
+    exclude_paths: Iterable[str] = (),
+    complexity: bool = False,
+    database_path: str = None,
+    profiler: Profiler = NULL_PROFILER,
+) -> Dict[str, Any]:
+    """Analyze a Git repository and generate timeline data.
+
+    With ``use_cache`` enabled, extracted commits are kept in a persistent
+    cache so repeated runs only process new commits. ``workers`` > 1
+    extracts commits in parallel across a process pool, and ``engine``
+    selects the commit extraction backend (see :class:`GitAnalyzer`).
+    File complexity is only computed when ``complexity`` is set.
+    Authors are merged into identities through ``.mailmap`` (unless
+    ``mailmap`` is false) and ``alias_files``.
+
+    ``since``/``until``, ``from_commit``/``to_commit`` and
+    ``include_paths``/``exclude_paths`` restrict the analysis to part of
+    the history (see :class:`GitAnalyzer`); cumulative counts then start
+    from the first analyzed commit.
+
+    Timeline events are streamed to ``output_path`` as they are produced, as
+    ``json`` or ``ndjson`` (guessed from the extension unless
+    ``output_format`` is given). Pass ``keep_timeline=False`` to leave the
+    events out of the returned data, so memory stays bounded by the
+    aggregates.
+
+    With ``database_path``, commits, file changes, contributors and files
+    are also written to an indexed SQLite database for ad-hoc queries (see
+    :class:`AnalysisDatabase`).
+
+    Each stage is timed as a span of ``profiler`` (``extract``,
+    ``aggregate``, ``write``, ``database``, ``summarize``, ``export``), next to
+    ``commits``, ``files`` and ``bytes_written`` counters; the per-commit
+    loop runs inside :meth:`Profiler.hot_loop`.
+    """
     if not Path(repo_path).exists():
         raise ValueError(f"Repository path does not exist: {repo_path}")
 
@@ -19,32 +80,120 @@ def analyze_repository(repo_path: str, output_path: str = None) -> Dict[str, Any
     print(f"Analyzing repository: {repo_path}")
 
     # Initialize analyzer
-    analyzer = GitAnalyzer(repo_path)
-
-    # Analyze commits
-    print("Extracting commit history...")
-    commits = analyzer.analyze_commits()
-    print(f"Found {len(commits)} commits")
+    analyzer = GitAnalyzer(
+        repo_path,
+        use_cache=use_cache,
+        cache_dir=cache_dir,
+        workers=workers,
+        engine=engine,
+        mailmap=mailmap,
+        alias_files=alias_files,
+        since=since,
+        until=until,
+        from_commit=from_commit,
+        to_commit=to_commit,
+        include_paths=include_paths,
+        exclude_paths=exclude_paths,
+        complexity=complexity,
+        profiler=profiler,
+    )
 
-    # Calculate statistics
-    print("Calculating contributor statistics...")
-    contributors = analyzer.get_contributor_stats(commits)
+    writer = (
+        DataExporter.open_timeline_writer(output_path, output_format)
+        if output_path
+        else None
+    )
+    database = AnalysisDatabaseWriter(database_path) if database_path else None
 
-    print("Calculating file statistics...")
-    files = analyzer.get_file_stats(commits)
+    # Extract commits and fold them into the statistics in a single pass,
+    # so the raw history never has to be held in memory next to the timeline
+    print("Extracting commit history and calculating statistics...")
+    aggregator = TimelineAggregator(analyzer.identities)
+    timeline_events = []
+    try:
+        with profiler.hot_loop():
+            _fold_commits(
+                analyzer,
+                aggregator,
+                writer,
+                timeline_events,
+                keep_timeline,
+                profiler,
+                database,
+            )
+    except BaseException:
+        if writer:
+            writer.close()
+        if database:
+            database.close()
+        raise
+    print(f"Found {aggregator.total_commits} commits")
 
     # Create timeline data
     print("Creating timeline data...")
-    timeline_data = DataExporter.create_timeline_data(commits, contributors, files)
+    with profiler.span("summarize"):
+        timeline_data = aggregator.timeline_data(timeline_events)
+    if not keep_timeline:
+        del timeline_data["timeline"]
 
-    # Export if output path provided
-    if output_path:
-        DataExporter.export_json(timeline_data, output_path)
+    if writer:
+        with profiler.span("export"):
+            writer.finish(
+                timeline_data["metadata"],
+                timeline_data["contributors"],
+                timeline_data["files"],
+                rollups=timeline_data["rollups"],
+                tree=timeline_data["tree"],
+            )
+        profiler.count("bytes_written", os.path.getsize(output_path))
+        print(f"Timeline data exported to {output_path}")
         print(f"Analysis complete! Data saved to {output_path}")
 
+    if database:
+        with profiler.span("database"):
+            database.finish(aggregator, timeline_data["metadata"])
+        print(f"Analysis database written to {database_path}")
+
     return timeline_data
 
 
+def _fold_commits(
+    analyzer: GitAnalyzer,
+    aggregator: TimelineAggregator,
+    writer,
+    timeline_events: list,
+    keep_timeline: bool,
+    profiler: Profiler,
+    database: AnalysisDatabaseWriter = None,
+) -> None:
+    """Run the per-commit loop: extract, aggregate and write each commit.
+
+    Kept as its own function so it stands out in profiles.
+    """
+    commits = analyzer.iter_commits()
+    while True:
+        with profiler.span("extract"):
+            commit = next(commits, None)
+        if commit is None:
+            break
+        profiler.count("commits")
+        profiler.count("files", len(commit["files_changed"]))
+
+        with profiler.span("aggregate"):
+            event = aggregator.add(commit)
+        if writer:
+            with profiler.span("write"):
+                writer.write_event(event)
+        if database:
+            with profiler.span("database"):
+                author = aggregator.identities.resolve(
+                    commit["author"], commit["email"]
+                )
+                database.add(commit, author)
+        if keep_timeline:
+            timeline_events.append(event)
+
+
 def main():
     """Command-line interface for repository analysis."""
     import argparse
@@ -59,11 +208,100 @@ def main():
         default="timeline.json",
         help="Output file path (default: timeline.json)",
     )
+    parser.add_argument(
+        "--format",
+        choices=STREAM_FORMATS,
+        help="Output format (default: guessed from the output extension)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse previously extracted commits from the commit cache",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for the commit cache (default: inside .git)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to extract commits (default: 1)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="pydriller",
+        help="Commit extraction engine (default: pydriller)",
+    )
+    parser.add_argument(
+        "--complexity",
+        action="store_true",
+        help="Compute the cyclomatic complexity of changed files",
+    )
+    parser.add_argument(
+        "--since", help="Only analyze commits after this date (git date format)"
+    )
+    parser.add_argument(
+        "--until", help="Only analyze commits before this date (git date format)"
+    )
+    parser.add_argument(
+        "--from-commit", help="First commit of the analyzed range (inclusive)"
+    )
+    parser.add_argument(
+        "--to-commit", help="Last commit of the analyzed range (default: HEAD)"
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        help="Only analyze changes under this file or directory (repeatable)",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        help="Ignore changes under this file or directory (repeatable)",
+    )
+    parser.add_argument(
+        "--db", help="Also write the analysis to this SQLite database for queries"
+    )
+    parser.add_argument(
+        "--no-mailmap",
+        action="store_true",
+        help="Do not merge author identities using the repository's .mailmap",
+    )
+    parser.add_argument(
+        "--aliases",
+        action="append",
+        default=[],
+        help="Extra author alias file in .mailmap format (repeatable)",
+    )
 
     args = parser.parse_args()
 
     try:
-        analyze_repository(args.repo_path, args.output)
+        analyze_repository(
+            args.repo_path,
+            args.output,
+            use_cache=args.cache or args.cache_dir is not None,
+            cache_dir=args.cache_dir,
+            workers=args.workers,
+            engine=args.engine,
+            output_format=args.format,
+            keep_timeline=False,
+            mailmap=not args.no_mailmap,
+            alias_files=args.aliases,
+            since=args.since,
+            until=args.until,
+            from_commit=args.from_commit,
+            to_commit=args.to_commit,
+            include_paths=args.include,
+            exclude_paths=args.exclude,
+            complexity=args.complexity,
+            database_path=args.db,
+        )
     except Exception as e:
         print(f"Error: {e}")
         return 1
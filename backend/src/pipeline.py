@@ -0,0 +1,416 @@
+"""
+Asynchronous commit extraction overlapping git I/O with parsing.
+
+The ``async`` engine produces exactly the commits of the ``numstat`` engine
+(:mod:`gitlog`), but drives its git processes from an asyncio event loop
+running in a background thread:
+
+- The history is split into slices, each read by its own ``git log``
+  process, several at a time. Their output is buffered in bounded queues
+  while the consumer is busy, so git keeps working instead of blocking on
+  a full pipe; once a queue is full, its git process is held back.
+- Blob contents for complexity are read through one long-lived
+  ``git cat-file --batch`` process. Requests for the next batch of commits
+  are written before the current batch is parsed, so git looks up objects
+  while Python parses.
+
+Commits are parsed and yielded in input order.
+"""
+
+import asyncio
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+try:
+    from .complexity import ComplexityResolver
+    from .gitlog import READ_SIZE, log_command, parse_log
+    from .profiling import NULL_PROFILER, Profiler
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from complexity import ComplexityResolver
+    from gitlog import READ_SIZE, log_command, parse_log
+    from profiling import NULL_PROFILER, Profiler
+
+# Commits per git log process when the history is read by several of them;
+# large enough to amortize git's start-up, small enough to mostly fit a queue
+SLICE_SIZE = 5000
+# Output chunks (of READ_SIZE bytes) buffered per git log process
+QUEUE_CHUNKS = 64
+# Bytes of git cat-file output read ahead of the parser
+BLOB_READ_AHEAD = 1 << 20
+
+# Header tokens start with \x01, right after the NUL ending the previous commit
+COMMIT_BOUNDARY = b"\0\x01"
+
+
+class AsyncBlobReader:
+    """Pipelined blob reads through one long-running ``git cat-file --batch``.
+
+    Requests are written without waiting for earlier responses; responses
+    are read back in request order. The process is started on first use.
+    """
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self.process: Optional[asyncio.subprocess.Process] = None
+
+    async def request(self, blob: str) -> None:
+        """Ask for the contents of ``blob``."""
+        if self.process is None:
+            self.process = await asyncio.create_subprocess_exec(
+                "git",
+                "cat-file",
+                "--batch",
+                cwd=self.repo_path,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                limit=BLOB_READ_AHEAD,
+            )
+        # Buffered by the transport; never wait for it to drain here, git
+        # only reads more requests once its responses are consumed
+        self.process.stdin.write(blob.encode("ascii") + b"\n")
+
+    async def response(self) -> Optional[bytes]:
+        """Return the contents of the oldest unanswered request, or None if
+        it is not a blob in the repository (e.g. a submodule commit)."""
+        # <sha> <type> <size>, or <sha> missing
+        header = (await self.process.stdout.readline()).split()
+        if len(header) != 3:
+            return None
+        data = await self.process.stdout.readexactly(int(header[2]) + 1)
+        return data[:-1] if header[1] == b"blob" else None
+
+    async def close(self) -> None:
+        """Stop the ``git cat-file`` process."""
+        if self.process is not None:
+            process, self.process = self.process, None
+            process.stdin.close()
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+
+
+def _split_commits(buffer: bytearray, searched: int) -> bytes:
+    """Remove and return the complete commits at the start of ``buffer``.
+
+    Only the bytes from ``searched`` on are new, so the boundary search
+    skips what was already scanned.
+    """
+    end = buffer.rfind(COMMIT_BOUNDARY, max(0, searched - 1))
+    if end < 0:
+        return b""
+    complete = bytes(buffer[: end + 1])
+    del buffer[: end + 1]
+    return complete
+
+
+class LogPipeline:
+    """Extracts ``hashes`` with up to ``processes`` concurrent ``git log``
+    processes, as an asynchronous iterator of commit batches.
+
+    ``scope`` filters file changes as for :func:`gitlog.iter_log_commits`;
+    with a ``resolver``, file complexity is filled in through it.
+    """
+
+    def __init__(
+        self,
+        repo_path: str,
+        hashes: List[str],
+        scope: Optional[Callable[[Optional[str], Optional[str]], bool]] = None,
+        processes: int = 1,
+        resolver: Optional[ComplexityResolver] = None,
+        profiler: Profiler = NULL_PROFILER,
+    ):
+        self.repo_path = repo_path
+        self.scope = scope
+        self.processes = max(1, processes)
+        self.resolver = resolver
+        self.profiler = profiler
+        # Seconds spent and blobs parsed for complexity on the loop thread
+        self.complexity_time = [0.0, 0]
+        if self.processes == 1:
+            # Slicing would only add start-up costs to a single git process
+            self.slices = [hashes] if hashes else []
+        else:
+            self.slices = [
+                hashes[start : start + SLICE_SIZE]
+                for start in range(0, len(hashes), SLICE_SIZE)
+            ]
+
+    async def _read_log(
+        self, hashes: List[str], chunks: asyncio.Queue, executor: Executor
+    ) -> None:
+        """Run ``git log`` over ``hashes``, putting its output into
+        ``chunks``, then None (or the error that stopped it)."""
+        loop = asyncio.get_event_loop()
+        process = subprocess.Popen(
+            log_command(),
+            cwd=self.repo_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+        def feed() -> None:
+            try:
+                process.stdin.write("".join(h + "\n" for h in hashes).encode("ascii"))
+            except BrokenPipeError:
+                pass
+            finally:
+                process.stdin.close()
+
+        def run(function: Callable, *args: Any) -> asyncio.Future:
+            return loop.run_in_executor(executor, function, *args)
+
+        try:
+            feeding = run(feed)
+            # git writes about a commit at a time; a blocking read returns a
+            # whole chunk, so the loop wakes up once per chunk, not per write
+            while True:
+                chunk = await run(process.stdout.read, READ_SIZE)
+                if not chunk:
+                    break
+                await chunks.put(chunk)
+            await feeding
+            stderr = await run(process.stderr.read)
+            returncode = await run(process.wait)
+            if returncode != 0:
+                raise RuntimeError(
+                    f"git log failed ({returncode}): "
+                    f"{stderr.decode('utf-8', 'replace')}"
+                )
+        except Exception as e:
+            await chunks.put(e)
+        else:
+            await chunks.put(None)
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            # Waits for a read still running in the executor to return
+            process.stdout.close()
+            process.stderr.close()
+
+    async def batches(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the extracted commits in input order, in batches."""
+        pending = deque(self.slices)
+        window: Deque[Tuple[asyncio.Task, asyncio.Queue]] = deque()
+        closing = False
+
+        def start_readers(_: Any = None) -> None:
+            # Keep ``processes`` git processes busy, and at most twice as many
+            # slices read ahead of the one being parsed
+            while (
+                pending
+                and not closing
+                and len(window) < 2 * self.processes
+                and sum(not task.done() for task, _ in window) < self.processes
+            ):
+                chunks: asyncio.Queue = asyncio.Queue(QUEUE_CHUNKS)
+                task = asyncio.ensure_future(
+                    self._read_log(pending.popleft(), chunks, executor)
+                )
+                task.add_done_callback(start_readers)
+                window.append((task, chunks))
+
+        # Blocking pipe I/O: a reader and a stdin feeder per git process
+        executor = ThreadPoolExecutor(2 * self.processes)
+        blobs = AsyncBlobReader(self.repo_path) if self.resolver else None
+        # A parsed batch whose blobs were requested, with those requests and
+        # the files waiting for them
+        ahead: Optional[Tuple[List[Dict[str, Any]], List[Tuple], Dict]] = None
+        try:
+            start_readers()
+            while window:
+                _, chunks = window[0]
+                buffer = bytearray()
+                while True:
+                    chunk = await chunks.get()
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    if chunk is None:
+                        complete = bytes(buffer)
+                    else:
+                        searched = len(buffer)
+                        buffer += chunk
+                        complete = _split_commits(buffer, searched)
+                    if complete:
+                        batch, batch_blobs = self._parse(complete)
+                        if blobs is None:
+                            yield batch
+                        else:
+                            requests, waiting = await self._request_blobs(
+                                blobs, batch, batch_blobs
+                            )
+                            if ahead is not None:
+                                yield await self._resolve(blobs, *ahead)
+                            ahead = (batch, requests, waiting)
+                    if chunk is None:
+                        break
+                window.popleft()
+                start_readers()
+            if ahead is not None:
+                yield await self._resolve(blobs, *ahead)
+        finally:
+            closing = True
+            for task, _ in window:
+                task.cancel()
+            await asyncio.gather(*(task for task, _ in window), return_exceptions=True)
+            executor.shutdown()
+            if blobs is not None:
+                await blobs.close()
+
+    def _parse(
+        self, output: bytes
+    ) -> Tuple[List[Dict[str, Any]], Dict[Tuple[int, int], str]]:
+        """Parse ``output`` into a batch of commits and, with a resolver,
+        the blob ids of their files by (commit index, file index)."""
+        if self.resolver is None:
+            return list(parse_log([output], None, self.scope)), {}
+
+        # parse_log asks for the complexity of every file with new contents,
+        # in file order; collect the blob ids and leave complexity None
+        blob_ids: List[str] = []
+
+        def collect(path: str, blob: str) -> None:
+            blob_ids.append(blob)
+
+        batch = list(parse_log([output], collect, self.scope))
+        pending = {}
+        blob_id = iter(blob_ids)
+        for commit_index, commit in enumerate(batch):
+            for file_index, file_data in enumerate(commit["files_changed"]):
+                if file_data["new_path"] is not None:
+                    pending[commit_index, file_index] = next(blob_id)
+        return batch, pending
+
+    async def _request_blobs(
+        self,
+        blobs: AsyncBlobReader,
+        batch: List[Dict[str, Any]],
+        pending: Dict[Tuple[int, int], str],
+    ) -> Tuple[List[Tuple[str, str]], Dict[Tuple[int, int], str]]:
+        """Fill in the known complexities of ``batch`` and request the
+        ``pending`` blobs of the others.
+
+        Returns the requested (key, path) pairs in order, and the cache key
+        each file still waiting for a complexity needs.
+        """
+        resolver = self.resolver
+        requested: Dict[str, str] = {}
+        waiting: Dict[Tuple[int, int], str] = {}
+        for (commit_index, file_index), blob in pending.items():
+            file_data = batch[commit_index]["files_changed"][file_index]
+            key = resolver.key(file_data["new_path"], blob)
+            value = None if key is None else resolver.cached(key)
+            if value is resolver.MISSING:
+                if key not in requested:
+                    requested[key] = file_data["new_path"]
+                    await blobs.request(blob)
+                waiting[commit_index, file_index] = key
+            else:
+                file_data["complexity"] = value
+        return list(requested.items()), waiting
+
+    async def _resolve(
+        self,
+        blobs: AsyncBlobReader,
+        batch: List[Dict[str, Any]],
+        requests: List[Tuple[str, str]],
+        waiting: Dict[Tuple[int, int], str],
+    ) -> List[Dict[str, Any]]:
+        """Read the responses to ``requests`` and fill in the complexities
+        of the ``waiting`` files of ``batch``."""
+        resolver = self.resolver
+        values = {}
+        for key, path in requests:
+            source = await blobs.response()
+            # Also requested for the previous batch, before it was resolved
+            value = resolver.cached(key)
+            if value is resolver.MISSING:
+                start = time.perf_counter()
+                value = resolver.compute(key, path, source)
+                self.complexity_time[0] += time.perf_counter() - start
+                self.complexity_time[1] += 1
+            values[key] = value
+        for (commit_index, file_index), key in waiting.items():
+            file_data = batch[commit_index]["files_changed"][file_index]
+            file_data["complexity"] = values[key]
+        return batch
+
+
+def iter_pipelined_commits(
+    repo_path: str,
+    hashes: List[str],
+    scope: Optional[Callable[[Optional[str], Optional[str]], bool]] = None,
+    processes: int = 1,
+    resolver: Optional[ComplexityResolver] = None,
+    profiler: Profiler = NULL_PROFILER,
+) -> Iterator[Dict[str, Any]]:
+    """Yield commit data for ``hashes`` in the given order, extracted by a
+    :class:`LogPipeline` whose event loop runs in a background thread.
+
+    Arguments are as for :class:`LogPipeline`. Time spent waiting for the
+    pipeline is recorded as the ``extract.git`` span of ``profiler``,
+    except for the part spent computing complexity, which is recorded as
+    ``extract.complexity``.
+    """
+    if not hashes:
+        return
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="git-pipeline")
+    thread.daemon = True
+    thread.start()
+    pipeline = LogPipeline(repo_path, hashes, scope, processes, resolver, profiler)
+    batches = pipeline.batches()
+
+    def run(coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def wait() -> List[Dict[str, Any]]:
+        # Complexity is computed on the loop thread while this one waits;
+        # the loop is idle again once the result is in, so reading the
+        # totals here is safe
+        seconds, calls = pipeline.complexity_time
+        start = time.perf_counter()
+        try:
+            return run(batches.__anext__())
+        finally:
+            elapsed = time.perf_counter() - start
+            computed = pipeline.complexity_time[0] - seconds
+            profiler.add_time("extract.git", elapsed - computed)
+            if pipeline.complexity_time[1] > calls:
+                profiler.add_time(
+                    "extract.complexity",
+                    computed,
+                    pipeline.complexity_time[1] - calls,
+                )
+
+    try:
+        while True:
+            try:
+                batch = wait()
+            except StopAsyncIteration:
+                break
+            yield from batch
+    finally:
+        try:
+            run(batches.aclose())
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
@@ -0,0 +1,154 @@
+"""
+Lightweight instrumentation for analysis runs.
+
+A :class:`Profiler` collects wall-clock timing spans and counters for each
+stage of a run and reports them, with throughput and peak memory, as a
+JSON-serializable dict. Code paths take a profiler argument defaulting to
+:data:`NULL_PROFILER`, which records nothing, so uninstrumented runs pay
+next to nothing.
+"""
+
+import contextlib
+import cProfile
+import sys
+import threading
+import time
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def _peak_rss(who: int) -> Optional[int]:
+    """Peak resident set size in bytes for ``resource.RUSAGE_*`` ``who``."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler:
+    """Collects timing spans and counters for one analysis run.
+
+    Span names are dotted to show nesting: ``extract.git`` is part of
+    ``extract``. Spans and counters may be recorded from several threads.
+    With ``cpu_profile`` set to a path, the code run inside
+    :meth:`hot_loop` is also profiled with :mod:`cProfile` and the stats
+    are written there (readable with :mod:`pstats`, snakeviz, etc.).
+    """
+
+    def __init__(self, cpu_profile: Optional[str] = None):
+        self.cpu_profile = cpu_profile
+        self.started = time.perf_counter()
+        self.spans: Dict[str, list] = {}  # name -> [seconds, calls]
+        self.counters: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return True
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Record ``seconds`` spent in span ``name``."""
+        with self.lock:
+            totals = self.spans.get(name)
+            if totals is None:
+                totals = self.spans[name] = [0.0, 0]
+            totals[0] += seconds
+            totals[1] += calls
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        """Wrap ``function`` so every call is timed under ``name``."""
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add_time(name, perf_counter() - start)
+
+        return wrapper
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Add ``amount`` to counter ``name``."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextlib.contextmanager
+    def hot_loop(self) -> Iterator[None]:
+        """Mark the per-commit loop, profiling it if ``cpu_profile`` is set."""
+        if not self.cpu_profile:
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(self.cpu_profile)
+
+    def report(self) -> Dict[str, Any]:
+        """Return the collected measurements."""
+        seconds = time.perf_counter() - self.started
+        rates = {}
+        for name in ("commits", "files"):
+            if name in self.counters and seconds > 0:
+                rates[f"{name}_per_second"] = round(self.counters[name] / seconds, 2)
+        return {
+            "wall_seconds": round(seconds, 6),
+            "spans": {
+                name: {"seconds": round(total, 6), "calls": calls}
+                for name, (total, calls) in sorted(self.spans.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+            "rates": rates,
+            "memory": {
+                "peak_rss_bytes": _peak_rss(resource and resource.RUSAGE_SELF),
+                "peak_children_rss_bytes": _peak_rss(
+                    resource and resource.RUSAGE_CHILDREN
+                ),
+            },
+        }
+
+
+class NullProfiler(Profiler):
+    """A profiler that records nothing."""
+
+    def __init__(self):
+        super().__init__()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def span(self, name: str) -> ContextManager[None]:
+        return _NULL_CONTEXT
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        pass
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        return function
+
+    def count(self, name: str, amount: int = 1) -> None:
+        pass
+
+    def hot_loop(self) -> ContextManager[None]:
+        return _NULL_CONTEXT
+
+
+NULL_PROFILER = NullProfiler()
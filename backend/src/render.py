@@ -0,0 +1,461 @@
+"""
+Headless video rendering of a timeline as a directory heatmap.
+
+Every directory (down to a configurable depth) gets a cell in a grid laid
+out in path order, so sibling directories sit next to each other. Cells
+light up with the lines changed in them and cool down over time; cells of
+directories not touched yet stay dark. A bar along the bottom shows the
+progress through the history.
+
+The timeline is read twice, one event at a time: once to find its time
+range and directories, then to step through it frame by frame. Each frame
+covers an equal slice of the history, so commits made close together are
+merged into one frame. Heatmaps are rendered in a pool of worker
+processes, only when a frame differs from the one before it, and raw RGB
+frames are piped straight into ffmpeg; nothing but the video is written.
+"""
+
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .exporter import DataExporter
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from exporter import DataExporter
+
+VIDEO_FORMATS = ("mp4", "gif")
+
+# Directories are merged into their parents beyond this many cells
+MAX_CELLS = 4096
+
+# Heat levels a touched directory can show (cell states 1..LEVELS)
+LEVELS = 48
+
+BAR_HEIGHT = 6
+
+BACKGROUND = (14, 15, 20)
+BAR_DONE = (88, 166, 255)
+BAR_TODO = (40, 44, 56)
+
+_HEAT_STOPS = [
+    (36, 41, 54),
+    (52, 84, 160),
+    (214, 72, 52),
+    (255, 196, 60),
+    (255, 250, 220),
+]
+
+
+def _heat_color(level: int) -> Tuple[int, ...]:
+    """Color of heat ``level`` (0 = cold, ``LEVELS - 1`` = hottest)."""
+    position = level / (LEVELS - 1) * (len(_HEAT_STOPS) - 1)
+    low = min(int(position), len(_HEAT_STOPS) - 2)
+    fraction = position - low
+    return tuple(
+        round(a + (b - a) * fraction)
+        for a, b in zip(_HEAT_STOPS[low], _HEAT_STOPS[low + 1])
+    )
+
+
+# Cell state -> RGB: 0 is an untouched directory, then the heat levels
+COLORS: List[bytes] = [bytes(BACKGROUND)] + [
+    bytes(_heat_color(level)) for level in range(LEVELS)
+]
+
+# Every color a frame can contain, padded to the 256 entries of a GIF palette
+PALETTE = b"".join(COLORS + [bytes(BAR_DONE), bytes(BAR_TODO)]).ljust(256 * 3, b"\0")
+
+
+class FrameLayout:
+    """Pixel geometry of the heatmap grid for a number of cells."""
+
+    def __init__(self, width: int, height: int, cells: int):
+        if width < 16 or height < 16 or width % 2 or height % 2:
+            raise ValueError(
+                f"Frame size must be even and at least 16x16, got {width}x{height}"
+            )
+        self.width = width
+        self.height = height
+        self.cells = max(cells, 1)
+        self.map_height = height - BAR_HEIGHT
+        # Roughly square cells filling the frame
+        self.columns = math.ceil(math.sqrt(self.cells * width / self.map_height))
+        self.rows = math.ceil(self.cells / self.columns)
+        self.cell_width = width // self.columns
+        self.cell_height = self.map_height // self.rows
+        if self.cell_width < 1 or self.cell_height < 1:
+            raise ValueError(
+                f"{cells} directories do not fit in a {width}x{height} frame"
+            )
+        self.gap = 1 if min(self.cell_width, self.cell_height) >= 4 else 0
+
+    @property
+    def frame_size(self) -> int:
+        """Size in bytes of one raw RGB frame."""
+        return self.width * self.height * 3
+
+
+def render_heatmap(layout: FrameLayout, states: bytes) -> bytes:
+    """Render the heatmap part of a frame as raw RGB bytes.
+
+    ``states`` holds one byte per cell: 0 for an untouched directory,
+    ``1 + level`` for a touched one.
+    """
+    background = COLORS[0]
+    inner_width = layout.cell_width - layout.gap
+    inner_height = layout.cell_height - layout.gap
+    gap = background * layout.gap
+    blank_row = background * layout.width
+    cells = {state: COLORS[state] * inner_width + gap for state in set(states)}
+    empty_cell = background * layout.cell_width
+
+    parts = []
+    for row in range(layout.rows):
+        row_states = states[row * layout.columns : (row + 1) * layout.columns]
+        line = b"".join(cells[state] for state in row_states)
+        # Short last row, then the pixels left over by the integer division
+        line += empty_cell * (layout.columns - len(row_states))
+        line += background * (layout.width - layout.columns * layout.cell_width)
+        parts.append(line * inner_height)
+        parts.append(blank_row * layout.gap)
+    parts.append(blank_row * (layout.map_height - layout.rows * layout.cell_height))
+    return b"".join(parts)
+
+
+def render_bar(width: int, progress: float) -> bytes:
+    """Render the progress bar along the bottom of a frame."""
+    done = min(width, round(width * progress))
+    line = bytes(BAR_DONE) * done + bytes(BAR_TODO) * (width - done)
+    return line * BAR_HEIGHT
+
+
+def directory_of(path: str, depth: int) -> str:
+    """Return the directory of ``path``, cut down to ``depth`` levels."""
+    parts = path.split("/")[:-1]
+    return "/".join(parts[:depth])
+
+
+def _event_paths(event: Dict[str, Any]) -> Iterator[Tuple[str, int]]:
+    """Yield ``(path, lines changed)`` for each file an event touches."""
+    for change in event.get("files_changed", ()):
+        path = change.get("new_path") or change.get("old_path")
+        if path:
+            yield path, change.get("lines_added", 0) + change.get("lines_removed", 0)
+
+
+def scan_timeline(
+    events: Iterable[Dict[str, Any]], depth: int
+) -> Tuple[Optional[float], Optional[float], List[str]]:
+    """Return the time range of ``events`` and the directories to draw.
+
+    Directories are listed in path order. If there would be more than
+    :data:`MAX_CELLS` of them, the depth is reduced until they fit.
+    """
+    start = end = None
+    directories = set()
+    seen_paths = set()
+    for event in events:
+        timestamp = event["timestamp"]
+        start = timestamp if start is None else min(start, timestamp)
+        end = timestamp if end is None else max(end, timestamp)
+        for path, _ in _event_paths(event):
+            if path not in seen_paths:
+                seen_paths.add(path)
+                directories.add(directory_of(path, depth))
+    while len(directories) > MAX_CELLS and depth > 1:
+        depth -= 1
+        directories = {
+            "/".join(directory.split("/")[:depth]) for directory in directories
+        }
+    if len(directories) > MAX_CELLS:
+        raise ValueError(f"Too many top-level directories to draw ({len(directories)})")
+    return start, end, sorted(directories)
+
+
+def frame_states(
+    events: Iterable[Dict[str, Any]],
+    directories: List[str],
+    start: float,
+    end: float,
+    frame_count: int,
+    half_life: float,
+) -> Iterator[bytes]:
+    """Yield the cell states of each of ``frame_count`` frames.
+
+    Frame ``i`` shows the history up to ``start + (i + 1) / frame_count``
+    of the way to ``end``. Heat halves every ``half_life`` frames and is
+    shown on a log scale relative to the hottest cell so far.
+    """
+    depth = max((d.count("/") + 1 for d in directories if d), default=0)
+    cells = {directory: i for i, directory in enumerate(directories)}
+    cell_of: Dict[str, int] = {}  # path -> cell, so each path is split once
+    heat = [0.0] * len(directories)
+    touched = bytearray(len(directories))
+    peak_log = 1.0
+    decay = 0.5 ** (1 / half_life) if half_life > 0 else 0.0
+    step = (end - start) / frame_count
+    top = LEVELS - 1
+
+    events = iter(events)
+    event = next(events, None)
+    for frame in range(frame_count):
+        boundary = end if frame == frame_count - 1 else start + step * (frame + 1)
+        heat = [value * decay for value in heat]
+        while event is not None and event["timestamp"] <= boundary:
+            for path, lines in _event_paths(event):
+                cell = cell_of.get(path)
+                if cell is None:
+                    cell = cell_of[path] = cells[directory_of(path, depth)]
+                heat[cell] += max(lines, 1)
+                touched[cell] = 1
+            event = next(events, None)
+        peak_log = max(peak_log, math.log1p(max(heat, default=0.0)))
+        scale = top / peak_log
+        yield bytes(
+            1 + min(top, int(math.log1p(value) * scale)) if alive else 0
+            for value, alive in zip(heat, touched)
+        )
+
+
+_worker_layout: Optional[FrameLayout] = None
+
+
+def _init_worker(layout: FrameLayout) -> None:
+    global _worker_layout
+    _worker_layout = layout
+
+
+def _render_in_worker(states: bytes) -> bytes:
+    return render_heatmap(_worker_layout, states)
+
+
+def render_heatmaps(
+    states: Iterable[bytes],
+    layout: FrameLayout,
+    jobs: int = 1,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[bytes]:
+    """Render a heatmap for each item of ``states``, in order.
+
+    Frames identical to the one before them (nothing changed, or not
+    enough to move a cell to another heat level) reuse its image instead
+    of being rendered again. With ``jobs`` > 1 the rest are rendered in a
+    process pool, a bounded batch at a time so memory use stays flat
+    however long the video is. ``stats`` counts ``rendered`` and
+    ``reused`` frames.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("rendered", 0)
+    stats.setdefault("reused", 0)
+    pool = None
+    if jobs > 1:
+        pool = multiprocessing.get_context().Pool(
+            jobs, initializer=_init_worker, initargs=(layout,)
+        )
+
+    def render(batch: List[bytes]) -> List[bytes]:
+        if pool is not None:
+            return pool.map(_render_in_worker, batch)
+        return [render_heatmap(layout, states) for states in batch]
+
+    previous_states = previous_image = None
+    states = iter(states)
+    try:
+        while True:
+            batch = list(islice(states, jobs * 4))
+            if not batch:
+                break
+            wanted: Dict[bytes, None] = {}  # ordered set
+            last = previous_states
+            for frame in batch:
+                if frame != last:
+                    wanted[frame] = None
+                last = frame
+            images = dict(zip(wanted, render(list(wanted))))
+            stats["rendered"] += len(images)
+            for frame in batch:
+                if frame == previous_states:
+                    stats["reused"] += 1
+                else:
+                    previous_states, previous_image = frame, images[frame]
+                yield previous_image
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+def iter_frames(
+    input_path: str,
+    width: int = 1280,
+    height: int = 720,
+    fps: int = 30,
+    duration: float = 60.0,
+    depth: int = 2,
+    jobs: Optional[int] = None,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[bytes]:
+    """Yield the raw RGB frames of a timeline video.
+
+    ``duration`` seconds at ``fps`` frames per second are spread evenly
+    over the history of the timeline file at ``input_path``.
+    """
+    start, end, directories = scan_timeline(DataExporter.iter_events(input_path), depth)
+    if start is None:
+        raise ValueError(f"No timeline events in {input_path}")
+    layout = FrameLayout(width, height, len(directories))
+    frame_count = max(1, round(duration * fps))
+    states = frame_states(
+        DataExporter.iter_events(input_path),
+        directories,
+        start,
+        end,
+        frame_count,
+        half_life=fps / 2,
+    )
+    heatmaps = render_heatmaps(
+        states, layout, jobs=jobs or os.cpu_count() or 1, stats=stats
+    )
+    for frame, heatmap in enumerate(heatmaps):
+        yield heatmap + render_bar(width, (frame + 1) / frame_count)
+
+
+def _unsupported_format(output_format: str) -> ValueError:
+    return ValueError(
+        f"Unsupported video format: {output_format} "
+        f"(expected one of {', '.join(VIDEO_FORMATS)})"
+    )
+
+
+def ffmpeg_command(
+    output_path: str,
+    output_format: str,
+    width: int,
+    height: int,
+    fps: int,
+    palette_path: Optional[str] = None,
+    ffmpeg: str = "ffmpeg",
+) -> List[str]:
+    """Build the ffmpeg command encoding raw RGB frames from stdin.
+
+    GIFs are mapped onto :data:`PALETTE`, read as a raw 16x16 image from
+    ``palette_path``: every color a frame can contain is in it, so no
+    palette has to be computed from (and no frames buffered for) the
+    video itself.
+    """
+    command = [
+        ffmpeg,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "-s",
+        f"{width}x{height}",
+        "-r",
+        str(fps),
+        "-i",
+        "-",
+    ]
+    if output_format == "mp4":
+        command += [
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-crf",
+            "23",
+            "-pix_fmt",
+            "yuv420p",
+            "-movflags",
+            "+faststart",
+        ]
+    elif output_format == "gif":
+        if palette_path is None:
+            raise ValueError("GIF output needs a palette file")
+        command += [
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "-s",
+            "16x16",
+            "-i",
+            palette_path,
+            "-lavfi",
+            "[0:v][1:v]paletteuse=dither=none",
+            "-loop",
+            "0",
+        ]
+    else:
+        raise _unsupported_format(output_format)
+    command.append(output_path)
+    return command
+
+
+def render_video(
+    input_path: str,
+    output_path: str,
+    output_format: Optional[str] = None,
+    fps: int = 30,
+    ffmpeg: str = "ffmpeg",
+    **options: Any,
+) -> Dict[str, int]:
+    """Render a timeline file to an MP4 or GIF video with ffmpeg.
+
+    ``output_format`` defaults to the extension of ``output_path``; other
+    keyword ``options`` are passed on to :func:`iter_frames`. Returns the
+    number of ``frames`` written and how many were ``rendered`` or
+    ``reused``.
+    """
+    output_format = output_format or os.path.splitext(output_path)[1].lstrip(".")
+    if output_format not in VIDEO_FORMATS:
+        raise _unsupported_format(output_format)
+    executable = shutil.which(ffmpeg)
+    if executable is None:
+        raise RuntimeError(f"{ffmpeg} was not found; it is needed for video export")
+    width = options.get("width", 1280)
+    height = options.get("height", 720)
+
+    stats = {"frames": 0}
+    palette_path = None
+    if output_format == "gif":
+        with tempfile.NamedTemporaryFile(suffix=".rgb", delete=False) as palette:
+            palette.write(PALETTE)
+        palette_path = palette.name
+    try:
+        command = ffmpeg_command(
+            output_path, output_format, width, height, fps, palette_path, executable
+        )
+        # stderr goes to a file: a pipe nobody reads while frames are being
+        # written fills up and blocks ffmpeg, which then stops reading stdin
+        with tempfile.TemporaryFile() as log:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=log)
+            try:
+                for frame in iter_frames(input_path, fps=fps, stats=stats, **options):
+                    process.stdin.write(frame)
+                    stats["frames"] += 1
+                process.stdin.close()
+            except BrokenPipeError:
+                pass  # ffmpeg exited early; its error is reported below
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+            if process.wait() != 0:
+                log.seek(0)
+                error = log.read().decode("utf-8", "replace").strip()
+                raise RuntimeError(f"ffmpeg failed ({process.returncode}): {error}")
+    finally:
+        if palette_path is not None:
+            os.unlink(palette_path)
+    return stats
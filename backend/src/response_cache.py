@@ -0,0 +1,127 @@
+"""
+Cache of encoded API response bodies with their compressed variants.
+
+Brotli is an optional dependency: :data:`HAVE_BROTLI` tells whether ``br``
+responses can be produced; gzip is always available.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+HAVE_BROTLI = brotli is not None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+GZIP_LEVEL = 6
+# Bodies are compressed once per cache entry, so spend a little more on it
+BROTLI_QUALITY = 8
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CachedBody:
+    """A response body, its validator and its compressed variants.
+
+    Compressed variants are made on first request, so an entry only ever
+    pays for the encodings clients actually accept.
+    """
+
+    def __init__(self, body: bytes, mimetype: str):
+        self.body = body
+        self.mimetype = mimetype
+        # The same for every encoding, so it is a weak validator
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.variants: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Bytes held by the body and its variants."""
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+    def encodings(self) -> Tuple[str, ...]:
+        """The content codings this body can be sent with, best first."""
+        if len(self.body) < MIN_COMPRESS_BYTES:
+            return ()
+        return ("br", "gzip") if HAVE_BROTLI else ("gzip",)
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """Return the body in ``encoding`` (None for the plain body)."""
+        if encoding is None:
+            return self.body
+        variant = self.variants.get(encoding)
+        if variant is None:
+            with self._lock:
+                variant = self.variants.get(encoding)
+                if variant is None:
+                    variant = self.variants[encoding] = _compress(self.body, encoding)
+        return variant
+
+
+class ResponseCache:
+    """Thread-safe LRU of :class:`CachedBody` entries.
+
+    Entries are stored under a key (e.g. the request path and query) with
+    the ``generation`` of the data they were built from; an entry from
+    another generation is a miss. The least recently used entries are
+    dropped once the bodies and their variants exceed ``max_bytes``.
+    """
+
+    MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, CachedBody]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, generation: Any) -> Optional[CachedBody]:
+        """Return the entry for ``key`` if it was built from ``generation``."""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != generation:
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+
+    def put(
+        self, key: Hashable, generation: Any, body: bytes, mimetype: str
+    ) -> CachedBody:
+        """Store ``body`` for ``key`` and return its entry."""
+        entry = CachedBody(body, mimetype)
+        with self._lock:
+            self._entries[key] = (generation, entry)
+            self._entries.move_to_end(key)
+            self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        total = sum(entry.size for _, entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, (_, entry) = self._entries.popitem(last=False)
+            total -= entry.size
+
+    def trim(self) -> None:
+        """Evict entries beyond ``max_bytes`` after variants were added."""
+        with self._lock:
+            self._evict()
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
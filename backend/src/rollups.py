@@ -0,0 +1,142 @@
+"""
+Pre-aggregated timeline rollups at day, week and month resolution.
+"""
+
+import bisect
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Hashable, List, Optional, Set
+
+RESOLUTIONS = ("day", "week", "month")
+
+_DAY = 86400
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def bucket_start(timestamp: float, resolution: str) -> float:
+    """Return the UTC start of the bucket containing ``timestamp``.
+
+    Weeks start on Monday; months on the first day of the month.
+    """
+    days = int(timestamp // _DAY)
+    if resolution == "day":
+        return float(days * _DAY)
+    if resolution == "week":
+        # 1970-01-01 was a Thursday, three days after a Monday
+        return float((days - (days + 3) % 7) * _DAY)
+    if resolution == "month":
+        date = _EPOCH + timedelta(days=days)
+        return datetime(date.year, date.month, 1, tzinfo=timezone.utc).timestamp()
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+class _Bucket:
+    __slots__ = ("start", "commits", "lines_added", "lines_removed", "authors", "files")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.commits = 0
+        self.lines_added = 0
+        self.lines_removed = 0
+        self.authors: Set[Hashable] = set()
+        self.files: Set[str] = set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "start": self.start,
+            "date": datetime.fromtimestamp(self.start, timezone.utc).date().isoformat(),
+            "commits": self.commits,
+            "lines_added": self.lines_added,
+            "lines_removed": self.lines_removed,
+            "authors": len(self.authors),
+            "files": len(self.files),
+        }
+
+
+class RollupBuilder:
+    """Builds per-bucket commit, line, author and file counts in one pass.
+
+    Commits must arrive oldest first: only the current bucket of each
+    resolution keeps its author and file sets, earlier buckets are reduced
+    to counts as soon as a later commit closes them.
+    """
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        """Initialize empty rollups for the given resolutions."""
+        self.resolutions = tuple(resolutions)
+        self.buckets: Dict[str, List[Dict[str, Any]]] = {
+            r: [] for r in self.resolutions
+        }
+        self._current: Dict[str, Optional[_Bucket]] = {
+            r: None for r in self.resolutions
+        }
+
+    def add(self, commit: Dict[str, Any], author: Optional[Hashable] = None) -> None:
+        """Count a commit into the bucket of every resolution.
+
+        Authors are counted by ``author``, the commit's identity id, so
+        different people sharing a name are counted apart; without it, by
+        author name.
+        """
+        if author is None:
+            author = commit["author"]
+        timestamp = commit["timestamp"]
+        paths = [
+            change["new_path"] or change["old_path"] or change["filename"]
+            for change in commit["files_changed"]
+        ]
+
+        for resolution in self.resolutions:
+            start = bucket_start(timestamp, resolution)
+            bucket = self._current[resolution]
+            if bucket is None or bucket.start != start:
+                if bucket is not None:
+                    self.buckets[resolution].append(bucket.to_dict())
+                bucket = self._current[resolution] = _Bucket(start)
+
+            bucket.commits += 1
+            bucket.lines_added += commit["lines_added"]
+            bucket.lines_removed += commit["lines_removed"]
+            bucket.authors.add(author)
+            bucket.files.update(paths)
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return the buckets of every resolution, including open ones."""
+        result = {}
+        for resolution in self.resolutions:
+            buckets = list(self.buckets[resolution])
+            current = self._current[resolution]
+            if current is not None:
+                buckets.append(current.to_dict())
+            result[resolution] = buckets
+        return result
+
+
+def select_rollup(
+    rollups: Dict[str, List[Dict[str, Any]]],
+    resolution: str = "auto",
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    max_buckets: int = 2000,
+) -> Dict[str, Any]:
+    """Return the buckets of one resolution overlapping ``[start, end]``.
+
+    With ``resolution="auto"`` the finest resolution that fits in
+    ``max_buckets`` buckets for the requested range is chosen, which is what
+    a zoomable overview wants.
+    """
+    if resolution != "auto" and resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+
+    candidates = RESOLUTIONS if resolution == "auto" else (resolution,)
+    selected: List[Dict[str, Any]] = []
+    chosen = candidates[-1]
+    for chosen in candidates:
+        buckets = rollups.get(chosen, [])
+        starts = [bucket["start"] for bucket in buckets]
+        lo = 0 if start is None else bisect.bisect_right(starts, start) - 1
+        hi = len(buckets) if end is None else bisect.bisect_right(starts, end)
+        selected = buckets[max(lo, 0) : hi]
+        if len(selected) <= max_buckets:
+            break
+
+    return {"resolution": chosen, "buckets": selected}
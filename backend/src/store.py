@@ -0,0 +1,260 @@
+"""
+Compact in-memory commit store.
+
+Commits are kept as struct-of-arrays columns (see :mod:`columnar` for the
+on-disk equivalent) with author identities and paths interned to integer
+ids, instead of one dict per commit plus one dict per file change.
+Statistics are computed directly on the columns; commit dicts are only
+materialized when they are asked for (iteration, export).
+"""
+
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    from .columnar import CHANGE_TYPE_IDS, CHANGE_TYPES, NONE_ID, utc_offset_minutes
+    from .identity import IdentityTable
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from columnar import CHANGE_TYPE_IDS, CHANGE_TYPES, NONE_ID, utc_offset_minutes
+    from identity import IdentityTable
+
+_RENAME = CHANGE_TYPE_IDS["RENAME"]
+
+
+class StringPool:
+    """Interns strings to dense integer ids."""
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def intern(self, value: str) -> int:
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return string_id
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.values[string_id]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class CommitStore:
+    """Holds extracted commits in typed column arrays, oldest first.
+
+    Per-commit columns are indexed by commit position; per-change columns
+    by change position, with ``changes_start[i]:changes_start[i + 1]``
+    selecting the changes of commit ``i``.
+    """
+
+    def __init__(self, commits: Iterable[Dict[str, Any]] = ()):
+        """Create a store, optionally filled from commit dicts."""
+        self.identities = IdentityTable()
+        self.paths = StringPool()
+        self.hashes: List[str] = []
+        self.messages: List[str] = []
+
+        self.timestamp = array("d")
+        self.utc_offset = array("i")
+        self.author_id = array("I")
+        self.lines_added = array("Q")
+        self.lines_removed = array("Q")
+        self.changes_start = array("Q", [0])
+
+        self.old_path_id = array("q")
+        self.new_path_id = array("q")
+        self.change_type = array("B")
+        self.change_lines_added = array("Q")
+        self.change_lines_removed = array("Q")
+        self.complexity = array("q")
+
+        self.extend(commits)
+
+    def append(self, commit: Dict[str, Any]) -> None:
+        """Add one extracted commit."""
+        author_id = self.identities.resolve(commit["author"], commit["email"])
+
+        self.hashes.append(commit["hash"])
+        self.messages.append(commit["message"])
+        self.timestamp.append(commit["timestamp"])
+        self.utc_offset.append(utc_offset_minutes(commit["datetime"]))
+        self.author_id.append(author_id)
+        self.lines_added.append(commit["lines_added"])
+        self.lines_removed.append(commit["lines_removed"])
+
+        paths = self.paths
+        for change in commit["files_changed"]:
+            old_path, new_path = change["old_path"], change["new_path"]
+            self.old_path_id.append(
+                NONE_ID if old_path is None else paths.intern(old_path)
+            )
+            self.new_path_id.append(
+                NONE_ID if new_path is None else paths.intern(new_path)
+            )
+            self.change_type.append(CHANGE_TYPE_IDS[change["change_type"]])
+            self.change_lines_added.append(change["lines_added"])
+            self.change_lines_removed.append(change["lines_removed"])
+            complexity = change.get("complexity")
+            self.complexity.append(NONE_ID if complexity is None else complexity)
+        self.changes_start.append(len(self.change_type))
+
+    def extend(self, commits: Iterable[Dict[str, Any]]) -> None:
+        """Add extracted commits, oldest first."""
+        for commit in commits:
+            self.append(commit)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self.commit(index)
+
+    def _path(self, path_id: int) -> Optional[str]:
+        return None if path_id == NONE_ID else self.paths[path_id]
+
+    def commit(self, index: int) -> Dict[str, Any]:
+        """Materialize commit ``index`` as a regular commit dict.
+
+        The author name and email are those of the commit's identity.
+        """
+        timestamp = self.timestamp[index]
+        tz = timezone(timedelta(minutes=self.utc_offset[index]))
+
+        files_changed = []
+        for i in range(self.changes_start[index], self.changes_start[index + 1]):
+            old_path = self._path(self.old_path_id[i])
+            new_path = self._path(self.new_path_id[i])
+            complexity = self.complexity[i]
+            files_changed.append(
+                {
+                    "filename": (new_path or old_path or "unknown").rsplit("/", 1)[-1],
+                    "old_path": old_path,
+                    "new_path": new_path,
+                    "change_type": CHANGE_TYPES[self.change_type[i]],
+                    "lines_added": self.change_lines_added[i],
+                    "lines_removed": self.change_lines_removed[i],
+                    "complexity": None if complexity == NONE_ID else complexity,
+                }
+            )
+
+        author_id = self.author_id[index]
+        return {
+            "hash": self.hashes[index],
+            "author": self.identities.names[author_id],
+            "email": self.identities.emails[author_id],
+            "timestamp": timestamp,
+            "datetime": datetime.fromtimestamp(timestamp, tz).isoformat(),
+            "message": self.messages[index],
+            "files_changed": files_changed,
+            "lines_added": self.lines_added[index],
+            "lines_removed": self.lines_removed[index],
+            "total_files": len(files_changed),
+        }
+
+    def contributor_stats(self) -> Dict[str, Any]:
+        """Compute contributor statistics, as
+        :meth:`TimelineAggregator.contributor_stats` does."""
+        count = len(self.identities)
+        commits = [0] * count
+        added = [0] * count
+        removed = [0] * count
+        files = [0] * count
+        first: List[Optional[float]] = [None] * count
+        last: List[Optional[float]] = [None] * count
+
+        starts = self.changes_start
+        for index, (author_id, timestamp) in enumerate(
+            zip(self.author_id, self.timestamp)
+        ):
+            commits[author_id] += 1
+            added[author_id] += self.lines_added[index]
+            removed[author_id] += self.lines_removed[index]
+            files[author_id] += starts[index + 1] - starts[index]
+            if first[author_id] is None or timestamp < first[author_id]:
+                first[author_id] = timestamp
+            if last[author_id] is None or timestamp > last[author_id]:
+                last[author_id] = timestamp
+
+        labels = self.identities.labels()
+        return {
+            labels[author_id]: {
+                "email": self.identities.emails[author_id],
+                "commits": commits[author_id],
+                "lines_added": added[author_id],
+                "lines_removed": removed[author_id],
+                "files_changed": files[author_id],
+                "first_commit": first[author_id],
+                "last_commit": last[author_id],
+            }
+            for author_id in range(count)
+        }
+
+    def file_stats(self) -> Dict[str, Any]:
+        """Compute per-file statistics keyed by full path, following
+        renames, as :meth:`TimelineAggregator.file_stats` does."""
+        # path id -> [changes, added, removed, author ids, first, last,
+        #             previous path ids]
+        records: Dict[int, List[Any]] = {}
+        starts = self.changes_start
+        old_ids, new_ids = self.old_path_id, self.new_path_id
+
+        for index, (author_id, timestamp) in enumerate(
+            zip(self.author_id, self.timestamp)
+        ):
+            for i in range(starts[index], starts[index + 1]):
+                old_id, new_id = old_ids[i], new_ids[i]
+                path_id = new_id if new_id != NONE_ID else old_id
+
+                if (
+                    self.change_type[i] == _RENAME
+                    and old_id in records
+                    and old_id != new_id
+                ):
+                    moved = records.pop(old_id)
+                    moved[6].append(old_id)
+                    target = records.get(path_id)
+                    if target is None:
+                        records[path_id] = moved
+                    else:
+                        target[0] += moved[0]
+                        target[1] += moved[1]
+                        target[2] += moved[2]
+                        target[3] |= moved[3]
+                        target[4] = min(target[4], moved[4])
+                        target[5] = max(target[5], moved[5])
+                        target[6].extend(moved[6])
+
+                record = records.get(path_id)
+                if record is None:
+                    record = records[path_id] = [
+                        0, 0, 0, set(), timestamp, timestamp, []
+                    ]  # fmt: skip
+                record[0] += 1
+                record[1] += self.change_lines_added[i]
+                record[2] += self.change_lines_removed[i]
+                record[3].add(author_id)
+                if timestamp < record[4]:
+                    record[4] = timestamp
+                if timestamp > record[5]:
+                    record[5] = timestamp
+
+        authors, paths = self.identities.labels(), self.paths
+        return {
+            paths[path_id]: {
+                "changes": record[0],
+                "lines_added": record[1],
+                "lines_removed": record[2],
+                "authors": [authors[a] for a in record[3]],
+                "first_change": record[4],
+                "last_change": record[5],
+                "previous_paths": [paths[p] for p in record[6]],
+            }
+            for path_id, record in records.items()
+        }
@@ -0,0 +1,331 @@
+"""
+In-memory index over timeline events for windowed, paginated queries.
+"""
+
+import bisect
+import heapq
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    from .columnar import NONE_ID, ColumnarTimeline
+    from .exporter import DataExporter, stream_format_for
+    from .identity import identity_key
+    from .rollups import select_rollup
+    from .tree import DirectoryTree
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from columnar import NONE_ID, ColumnarTimeline
+    from exporter import DataExporter, stream_format_for
+    from identity import identity_key
+    from rollups import select_rollup
+    from tree import DirectoryTree
+
+
+def _contains(positions: List[int], position: int) -> bool:
+    """Binary-search a sorted position list."""
+    i = bisect.bisect_left(positions, position)
+    return i < len(positions) and positions[i] == position
+
+
+class _ColumnarEvents:
+    """The events of a columnar timeline, decoded when they are accessed.
+
+    Events appended later (see :meth:`TimelineIndex.extend`) are kept as
+    dicts after the ones in the file.
+    """
+
+    def __init__(self, timeline: ColumnarTimeline):
+        self.timeline = timeline
+        self.appended: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.timeline) + len(self.appended)
+
+    def __getitem__(self, key: Union[int, slice]) -> Any:
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if key < len(self.timeline):
+            return self.timeline.event(key)
+        return self.appended[key - len(self.timeline)]
+
+    def append(self, event: Dict[str, Any]) -> None:
+        self.appended.append(event)
+
+
+class TimelineIndex:
+    """Answers time-range, author and path-prefix queries over a timeline.
+
+    The timeline is parsed once; queries only touch the index structures
+    and the events they return. New events can be appended with
+    :meth:`extend` while queries are being served.
+    """
+
+    DEFAULT_LIMIT = 500
+    MAX_LIMIT = 5000
+    # Number of path-prefix lookups kept for repeated queries
+    PREFIX_CACHE_SIZE = 64
+
+    def __init__(
+        self,
+        events: Iterable[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+        contributors: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        rollups: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        tree: Optional[DirectoryTree] = None,
+    ):
+        """Build the index from timeline events, oldest first."""
+        self.events: List[Dict[str, Any]] = []
+        self.timestamps: List[float] = []
+        # identity key (see identity_key) -> positions
+        self.by_author: Dict[str, List[int]] = {}
+        self.by_path: Dict[str, List[int]] = {}
+        for event in events:
+            self._index_event(event)
+        self.paths = sorted(self.by_path)
+
+        self.lock = threading.RLock()
+        self.metadata = metadata or {}
+        self.contributors = contributors or {}
+        self.files = files or {}
+        self.rollups = rollups or {}
+        self.tree = tree
+        self._prefix_cache: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    @classmethod
+    def load(cls, input_path: str) -> "TimelineIndex":
+        """Load and index a timeline file (JSON, NDJSON or columnar)."""
+        if stream_format_for(input_path) == "columnar":
+            return cls.from_columnar(ColumnarTimeline(input_path))
+        data = DataExporter.load_timeline(input_path)
+        return cls(
+            data.get("timeline", []),
+            metadata=data.get("metadata"),
+            contributors=data.get("contributors"),
+            files=data.get("files"),
+            rollups=data.get("rollups"),
+            tree=DirectoryTree.from_dict(data["tree"]) if "tree" in data else None,
+        )
+
+    @classmethod
+    def from_columnar(cls, timeline: ColumnarTimeline) -> "TimelineIndex":
+        """Index an open columnar timeline without decoding its events.
+
+        The index is built from the author and path id columns, and queries
+        decode only the events of the page they return. The timeline stays
+        open for as long as the index is in use.
+        """
+        sections = timeline.sections
+        index = cls(
+            (),
+            metadata=timeline.metadata,
+            contributors=timeline.contributors,
+            files=timeline.files,
+            rollups=sections.get("rollups"),
+            tree=(
+                DirectoryTree.from_dict(sections["tree"])
+                if "tree" in sections
+                else None
+            ),
+        )
+        index.events = _ColumnarEvents(timeline)
+        index.timestamps = array("d", timeline.timestamps)
+        index._index_columns(timeline)
+        return index
+
+    def _index_columns(self, timeline: ColumnarTimeline) -> None:
+        """Fill the author and path lists from a columnar timeline's ids."""
+        emails = timeline.author_emails
+        keys = [
+            identity_key(name, emails[i] if emails is not None else None)
+            for i, name in enumerate(timeline.authors)
+        ]
+        for position, author_id in enumerate(timeline.column("author_id")):
+            self.by_author.setdefault(keys[author_id], []).append(position)
+
+        changes_start = timeline.column("changes_start")
+        old_path_ids = timeline.column("old_path_id")
+        new_path_ids = timeline.column("new_path_id")
+        by_path_id: Dict[int, List[int]] = {}
+        for position in range(len(timeline)):
+            for i in range(changes_start[position], changes_start[position + 1]):
+                for path_id in (old_path_ids[i], new_path_ids[i]):
+                    if path_id == NONE_ID:
+                        continue
+                    positions = by_path_id.setdefault(path_id, [])
+                    if not positions or positions[-1] != position:
+                        positions.append(position)
+        self.by_path = {
+            timeline.path(path_id): positions
+            for path_id, positions in by_path_id.items()
+        }
+        self.paths = sorted(self.by_path)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def _index_event(self, event: Dict[str, Any]) -> List[str]:
+        """Append one event to the index lists; return its new paths."""
+        position = len(self.events)
+        self.events.append(event)
+        self.timestamps.append(event["timestamp"])
+        # Timelines written before events carried emails are keyed by name
+        key = identity_key(event["author"], event.get("email"))
+        self.by_author.setdefault(key, []).append(position)
+
+        new_paths = []
+        for file_change in event["files_changed"]:
+            for path in (file_change["old_path"], file_change["new_path"]):
+                if path is None:
+                    continue
+                positions = self.by_path.get(path)
+                if positions is None:
+                    positions = self.by_path[path] = []
+                    new_paths.append(path)
+                if not positions or positions[-1] != position:
+                    positions.append(position)
+        return new_paths
+
+    def extend(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Append events that are no older than the last indexed one."""
+        with self.lock:
+            for event in events:
+                if self.timestamps and event["timestamp"] < self.timestamps[-1]:
+                    raise ValueError("Events must be appended in timestamp order")
+                for path in self._index_event(event):
+                    bisect.insort(self.paths, path)
+            self._prefix_cache.clear()
+
+    def _positions_under(self, prefix: str) -> List[int]:
+        """Return the sorted event positions touching paths under ``prefix``."""
+        cached = self._prefix_cache.get(prefix)
+        if cached is not None:
+            self._prefix_cache.move_to_end(prefix)
+            return cached
+
+        # Paths sharing a prefix are contiguous in sorted order
+        lo = bisect.bisect_left(self.paths, prefix)
+        hi = bisect.bisect_left(self.paths, prefix + "\U0010ffff", lo)
+        positions = []
+        for position in heapq.merge(*(self.by_path[p] for p in self.paths[lo:hi])):
+            if not positions or positions[-1] != position:
+                positions.append(position)
+
+        self._prefix_cache[prefix] = positions
+        if len(self._prefix_cache) > self.PREFIX_CACHE_SIZE:
+            self._prefix_cache.popitem(last=False)
+        return positions
+
+    def rollup(
+        self,
+        resolution: str = "auto",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        max_buckets: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Return pre-aggregated buckets for a zoom level (see
+        :func:`select_rollup`)."""
+        return select_rollup(
+            self.rollups,
+            resolution,
+            start,
+            end,
+            max_buckets=min(max_buckets or self.MAX_LIMIT, self.MAX_LIMIT),
+        )
+
+    def directory(
+        self,
+        path: str = "",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        depth: int = 1,
+    ) -> Optional[Dict[str, Any]]:
+        """Summarize a directory subtree (see :meth:`DirectoryTree.query`)."""
+        if self.tree is None:
+            return None
+        with self.lock:
+            return self.tree.query(path, start, end, depth=min(max(depth, 0), 8))
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        author: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        cursor: int = 0,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Return one page of events matching all of the given filters.
+
+        ``start``/``end`` bound the timestamp (inclusive). ``author`` is a
+        contributor key (an author name, or ``"Name <email>"`` for authors
+        sharing a name). ``cursor`` is the ``next_cursor`` of the previous
+        page (0 for the first page).
+        """
+        with self.lock:
+            return self._query(start, end, author, path_prefix, cursor, limit)
+
+    def _author_positions(self, author: str) -> List[int]:
+        """Return the event positions of the contributor labelled ``author``."""
+        stats = self.contributors.get(author)
+        positions = None
+        if stats is not None:
+            positions = self.by_author.get(identity_key(author, stats.get("email")))
+        if positions is None:
+            positions = self.by_author.get(identity_key(author, None), [])
+        return positions
+
+    def _query(
+        self,
+        start: Optional[float],
+        end: Optional[float],
+        author: Optional[str],
+        path_prefix: Optional[str],
+        cursor: int,
+        limit: Optional[int],
+    ) -> Dict[str, Any]:
+        limit = min(limit or self.DEFAULT_LIMIT, self.MAX_LIMIT)
+        lo = 0 if start is None else bisect.bisect_left(self.timestamps, start)
+        hi = (
+            len(self.events)
+            if end is None
+            else bisect.bisect_right(self.timestamps, end)
+        )
+        lo = max(lo, cursor)
+
+        # Candidate position lists, each sorted; the page walks the shortest
+        # one and checks membership in the others.
+        candidates = []
+        if author is not None:
+            candidates.append(self._author_positions(author))
+        if path_prefix:
+            candidates.append(self._positions_under(path_prefix))
+
+        page: List[Dict[str, Any]] = []
+        next_cursor = None
+        if not candidates:
+            stop = min(hi, lo + limit)
+            page = self.events[lo:stop]
+            next_cursor = stop if stop < hi else None
+        else:
+            candidates.sort(key=len)
+            driver, others = candidates[0], candidates[1:]
+            i = bisect.bisect_left(driver, lo)
+            while i < len(driver) and driver[i] < hi:
+                position = driver[i]
+                i += 1
+                if all(_contains(other, position) for other in others):
+                    if len(page) == limit:
+                        next_cursor = position
+                        break
+                    page.append(self.events[position])
+
+        return {
+            "events": page,
+            "next_cursor": next_cursor,
+            "total_events": len(self.events),
+        }
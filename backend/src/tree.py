@@ -0,0 +1,218 @@
+"""
+Directory-tree aggregation index for hierarchical views.
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Set
+
+try:
+    from .rollups import bucket_start
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from rollups import bucket_start
+
+
+class _Node:
+    """Rolled-up activity of one directory (including its subdirectories)."""
+
+    __slots__ = (
+        "children",
+        "commits",
+        "changes",
+        "lines_added",
+        "lines_removed",
+        "authors",
+        "first_change",
+        "last_change",
+        "series",
+    )
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.commits = 0
+        self.changes = 0
+        self.lines_added = 0
+        self.lines_removed = 0
+        self.authors: Set[Hashable] = set()
+        self.first_change: Optional[float] = None
+        self.last_change: Optional[float] = None
+        # bucket start -> [commits, changes, lines added, lines removed]
+        self.series: Dict[float, List[int]] = {}
+
+
+class DirectoryTree:
+    """Prefix tree of directories with per-node churn and time series.
+
+    Every file change is rolled up into all of its ancestor directories
+    while commits stream in, so subtree questions ("activity under
+    services/billing between two dates") are answered from the index
+    instead of rescanning commits. Time windows are resolved at
+    ``resolution`` granularity (see :mod:`rollups`).
+    """
+
+    def __init__(self, resolution: str = "week"):
+        """Create an empty tree bucketing its time series by ``resolution``."""
+        self.resolution = resolution
+        self.root = _Node()
+
+    def add(self, commit: Dict[str, Any], author: Optional[Hashable] = None) -> None:
+        """Roll a commit's file changes up into their directories.
+
+        Authors are counted by ``author`` (an identity id) if given, as for
+        :meth:`RollupBuilder.add`, otherwise by name.
+        """
+        timestamp = commit["timestamp"]
+        bucket = bucket_start(timestamp, self.resolution)
+        touched: Dict[int, _Node] = {}
+
+        for change in commit["files_changed"]:
+            path = change["new_path"] or change["old_path"] or change["filename"]
+            added, removed = change["lines_added"], change["lines_removed"]
+
+            node = self.root
+            directories = path.split("/")[:-1]
+            for depth in range(len(directories) + 1):
+                if depth:
+                    part = directories[depth - 1]
+                    child = node.children.get(part)
+                    if child is None:
+                        child = node.children[part] = _Node()
+                    node = child
+                node.changes += 1
+                node.lines_added += added
+                node.lines_removed += removed
+                entry = node.series.get(bucket)
+                if entry is None:
+                    entry = node.series[bucket] = [0, 0, 0, 0]
+                entry[1] += 1
+                entry[2] += added
+                entry[3] += removed
+                touched[id(node)] = node
+
+        # Count each commit once per directory it touched
+        if author is None:
+            author = commit["author"]
+        for node in touched.values():
+            node.commits += 1
+            node.series[bucket][0] += 1
+            node.authors.add(author)
+            if node.first_change is None or timestamp < node.first_change:
+                node.first_change = timestamp
+            if node.last_change is None or timestamp > node.last_change:
+                node.last_change = timestamp
+
+    def _find(self, path: str) -> Optional[_Node]:
+        node = self.root
+        for part in path.strip("/").split("/"):
+            if not part:
+                continue
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def query(
+        self,
+        path: str = "",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        depth: int = 1,
+    ) -> Optional[Dict[str, Any]]:
+        """Summarize the subtree at ``path``, optionally within a time window.
+
+        Returns ``None`` for unknown directories. ``depth`` levels of
+        children are included; a window limits the churn figures to the
+        buckets overlapping ``[start, end]``.
+        """
+        node = self._find(path)
+        if node is None:
+            return None
+        return self._summarize(node, path.strip("/"), start, end, depth)
+
+    def _summarize(
+        self,
+        node: _Node,
+        path: str,
+        start: Optional[float],
+        end: Optional[float],
+        depth: int,
+    ) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {
+            "path": path,
+            "name": path.rsplit("/", 1)[-1],
+            "commits": node.commits,
+            "changes": node.changes,
+            "lines_added": node.lines_added,
+            "lines_removed": node.lines_removed,
+            "authors": len(node.authors),
+            "first_change": node.first_change,
+            "last_change": node.last_change,
+        }
+
+        if start is not None or end is not None:
+            first = None if start is None else bucket_start(start, self.resolution)
+            window = [0, 0, 0, 0]
+            for bucket, entry in node.series.items():
+                if (first is None or bucket >= first) and (
+                    end is None or bucket <= end
+                ):
+                    for i, value in enumerate(entry):
+                        window[i] += value
+            summary["window"] = dict(
+                zip(("commits", "changes", "lines_added", "lines_removed"), window)
+            )
+
+        if depth > 0:
+            summary["children"] = [
+                self._summarize(
+                    child, f"{path}/{name}" if path else name, start, end, depth - 1
+                )
+                for name, child in sorted(node.children.items())
+            ]
+        return summary
+
+    def series(self, path: str = "") -> List[List[float]]:
+        """Return ``[bucket_start, commits, changes, added, removed]`` rows."""
+        node = self._find(path)
+        if node is None:
+            return []
+        return [[bucket] + entry for bucket, entry in sorted(node.series.items())]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the whole tree, including time series, for storage."""
+
+        def encode(node: _Node) -> Dict[str, Any]:
+            return {
+                "commits": node.commits,
+                "changes": node.changes,
+                "lines_added": node.lines_added,
+                "lines_removed": node.lines_removed,
+                "authors": sorted(node.authors),
+                "first_change": node.first_change,
+                "last_change": node.last_change,
+                "series": [[b] + e for b, e in sorted(node.series.items())],
+                "children": {name: encode(c) for name, c in node.children.items()},
+            }
+
+        return {"resolution": self.resolution, "root": encode(self.root)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DirectoryTree":
+        """Rebuild a tree serialized with :meth:`to_dict`."""
+
+        def decode(encoded: Dict[str, Any]) -> _Node:
+            node = _Node()
+            node.commits = encoded["commits"]
+            node.changes = encoded["changes"]
+            node.lines_added = encoded["lines_added"]
+            node.lines_removed = encoded["lines_removed"]
+            node.authors = set(encoded["authors"])
+            node.first_change = encoded["first_change"]
+            node.last_change = encoded["last_change"]
+            node.series = {row[0]: list(row[1:]) for row in encoded["series"]}
+            node.children = {
+                name: decode(child) for name, child in encoded["children"].items()
+            }
+            return node
+
+        tree = cls(data["resolution"])
+        tree.root = decode(data["root"])
+        return tree
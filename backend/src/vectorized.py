@@ -0,0 +1,237 @@
+"""
+Vectorized NumPy aggregation over a :class:`CommitStore`.
+
+NumPy is an optional dependency: :data:`HAVE_NUMPY` tells whether these
+functions are usable, callers fall back to the pure-Python aggregation of
+:class:`CommitStore` otherwise. Both paths produce the same statistics.
+"""
+
+import bisect
+from typing import Any, Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+try:
+    from .columnar import CHANGE_TYPE_IDS, NONE_ID
+except ImportError:  # imported as a top-level module (tests, scripts)
+    from columnar import CHANGE_TYPE_IDS, NONE_ID
+
+HAVE_NUMPY = np is not None
+
+_RENAME = CHANGE_TYPE_IDS["RENAME"]
+
+
+def _column(values) -> "np.ndarray":
+    """View a store column (an ``array.array``) as a NumPy array."""
+    if not len(values):
+        return np.zeros(0, dtype=values.typecode)
+    return np.frombuffer(values, dtype=values.typecode)
+
+
+def _grouped_sum(groups, values, count: int) -> "np.ndarray":
+    totals = np.zeros(count, dtype=np.int64)
+    np.add.at(totals, groups, values.astype(np.int64))
+    return totals
+
+
+def _grouped_min_max(groups, values, count: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    first = np.full(count, np.inf)
+    last = np.full(count, -np.inf)
+    np.minimum.at(first, groups, values)
+    np.maximum.at(last, groups, values)
+    return first, last
+
+
+def contributor_stats(store) -> Dict[str, Any]:
+    """Compute contributor statistics with grouped reductions.
+
+    Matches :meth:`CommitStore.contributor_stats`.
+    """
+    count = len(store.identities)
+    authors = _column(store.author_id).astype(np.intp)
+    timestamps = _column(store.timestamp)
+
+    commits = np.bincount(authors, minlength=count).tolist()
+    added = _grouped_sum(authors, _column(store.lines_added), count).tolist()
+    removed = _grouped_sum(authors, _column(store.lines_removed), count).tolist()
+    files = _grouped_sum(authors, np.diff(_column(store.changes_start)), count).tolist()
+    first, last = _grouped_min_max(authors, timestamps, count)
+    first, last = first.tolist(), last.tolist()
+
+    labels = store.identities.labels()
+    return {
+        labels[author_id]: {
+            "email": store.identities.emails[author_id],
+            "commits": commits[author_id],
+            "lines_added": added[author_id],
+            "lines_removed": removed[author_id],
+            "files_changed": files[author_id],
+            "first_commit": first[author_id],
+            "last_commit": last[author_id],
+        }
+        for author_id in range(count)
+    }
+
+
+def file_stats(store) -> Dict[str, Any]:
+    """Compute per-file statistics with grouped reductions.
+
+    Matches :meth:`CommitStore.file_stats`. Renames are the only part
+    that depends on history order; they are replayed in a Python loop
+    over the (few) rename changes, which splits each path's changes into
+    epochs owned by one file record. Every change is then assigned its
+    record with a single sorted lookup and the statistics are reduced per
+    record.
+    """
+    total = len(store.change_type)
+    if not total:
+        return {}
+
+    per_commit = np.diff(_column(store.changes_start).astype(np.int64))
+    timestamps = np.repeat(_column(store.timestamp), per_commit)
+    authors = np.repeat(_column(store.author_id).astype(np.int64), per_commit)
+    old_ids = _column(store.old_path_id)
+    new_ids = _column(store.new_path_id)
+    # Path each change is recorded under
+    keys = np.where(new_ids != NONE_ID, new_ids, old_ids)
+
+    renames = np.flatnonzero(
+        (_column(store.change_type) == _RENAME)
+        & (old_ids != new_ids)
+        & (old_ids != NONE_ID)
+    ).tolist()
+
+    # Change positions grouped by path, ascending within each path; the
+    # changes of path p are positions[path_bounds[p]:path_bounds[p + 1]].
+    # Only needed to replay renames.
+    path_bounds: List[int] = []
+    positions: List[int] = []
+    if renames:
+        order = np.argsort(keys, kind="stable")
+        path_bounds = np.searchsorted(
+            keys[order], np.arange(len(store.paths) + 1)
+        ).tolist()
+        positions = order.tolist()
+
+    def touched(path_id: int, lo: int, hi: int) -> bool:
+        """Whether ``path_id`` has a change at a position in [lo, hi)."""
+        a, b = path_bounds[path_id], path_bounds[path_id + 1]
+        return bisect.bisect_left(positions, lo, a, b) < bisect.bisect_left(
+            positions, hi, a, b
+        )
+
+    # Record ids start as path ids; vacated paths get fresh ids past them.
+    parent = list(range(len(store.paths)))  # record -> record merged into
+    record_of: Dict[int, int] = {}  # path -> record of its current epoch
+    epoch_start: Dict[int, int] = {}  # path -> first position of that epoch
+    moved_in = set()  # paths whose current epoch began with a moved record
+    previous: Dict[int, List[int]] = {}  # record -> previous path ids
+    epochs: List[Tuple[int, int, int]] = []  # (path, start position, record)
+
+    def exists(path_id: int, position: int) -> bool:
+        """Whether ``path_id`` holds a file record just before ``position``."""
+        return path_id in moved_in or touched(
+            path_id, epoch_start.get(path_id, 0), position
+        )
+
+    for position in renames:
+        old, new = int(old_ids[position]), int(new_ids[position])
+        if not exists(old, position):
+            continue
+
+        moved = record_of.get(old, old)
+        previous.setdefault(moved, []).append(old)
+        # Later changes to the old path start a new record
+        fresh = len(parent)
+        parent.append(fresh)
+        record_of[old] = fresh
+        epoch_start[old] = position
+        moved_in.discard(old)
+        epochs.append((old, position, fresh))
+
+        if exists(new, position):
+            target = record_of.get(new, new)
+            parent[moved] = target
+            previous.setdefault(target, []).extend(previous.pop(moved))
+        else:
+            record_of[new] = moved
+            epoch_start[new] = position
+            moved_in.add(new)
+            epochs.append((new, position, moved))
+
+    records = keys.astype(np.int64)
+    if epochs:
+        table = np.array(epochs, dtype=np.int64)
+        span = total + 1
+        epoch_keys = table[:, 0] * span + table[:, 1]
+        epoch_order = np.argsort(epoch_keys)
+        epoch_keys = epoch_keys[epoch_order]
+        epoch_paths = table[epoch_order, 0]
+        epoch_records = table[epoch_order, 2]
+
+        found = np.searchsorted(
+            epoch_keys, records * span + np.arange(total), side="right"
+        )
+        found -= 1
+        hit = found >= 0
+        hit[hit] = epoch_paths[found[hit]] == records[hit]
+        records[hit] = epoch_records[found[hit]]
+
+        roots = np.array(parent, dtype=np.int64)
+        while True:
+            resolved = roots[roots]
+            if np.array_equal(resolved, roots):
+                break
+            roots = resolved
+        records = roots[records]
+
+    count = len(parent)
+    changes = np.bincount(records, minlength=count).tolist()
+    added = _grouped_sum(records, _column(store.change_lines_added), count).tolist()
+    removed = _grouped_sum(records, _column(store.change_lines_removed), count).tolist()
+    first, last = _grouped_min_max(records, timestamps, count)
+    first, last = first.tolist(), last.tolist()
+
+    # Distinct (record, author) pairs, grouped by record
+    author_count = max(len(store.identities), 1)
+    pairs = np.sort(records * author_count + authors)
+    distinct = np.empty(len(pairs), dtype=bool)
+    distinct[0] = True
+    np.not_equal(pairs[1:], pairs[:-1], out=distinct[1:])
+    pairs = pairs[distinct]
+    pair_records = pairs // author_count
+    names = np.array(store.identities.labels(), dtype=object)
+    names = names[pairs % author_count].tolist()
+    starts = np.flatnonzero(np.diff(pair_records)) + 1
+    starts = [0] + starts.tolist() + [len(names)]
+    record_authors = {
+        record: names[starts[i] : starts[i + 1]]
+        for i, record in enumerate(pair_records[starts[:-1]].tolist())
+    }
+
+    # Where each surviving record lives at the end of the history
+    located = dict.fromkeys(
+        np.flatnonzero(np.bincount(keys, minlength=len(store.paths))).tolist()
+    )
+    for path_id in record_of:
+        if not exists(path_id, total):
+            located.pop(path_id, None)
+    for path_id in located:
+        located[path_id] = record_of.get(path_id, path_id)
+
+    paths = store.paths
+    return {
+        paths[path_id]: {
+            "changes": changes[record],
+            "lines_added": added[record],
+            "lines_removed": removed[record],
+            "authors": record_authors[record],
+            "first_change": first[record],
+            "last_change": last[record],
+            "previous_paths": [paths[p] for p in previous.get(record, [])],
+        }
+        for path_id, record in located.items()
+    }
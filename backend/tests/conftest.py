@@ -0,0 +1,88 @@
+"""
+Shared test fixtures and commit builders.
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from git import Repo
+
+# 2023-11-14T22:13:20+00:00
+START = 1700000000.0
+
+
+def make_change(old_path, new_path, added=1, removed=0, change_type='MODIFY'):
+    """Build one entry of a commit's ``files_changed``."""
+    return {
+        'filename': (new_path or old_path).rsplit('/', 1)[-1],
+        'old_path': old_path,
+        'new_path': new_path,
+        'change_type': change_type,
+        'lines_added': added,
+        'lines_removed': removed,
+        'complexity': None,
+    }
+
+
+def make_commit(index, author='Test User', changes=(), timestamp=None,
+                email=None, message=None):
+    """Build a commit dict in the analyzer's schema.
+
+    ``changes`` are :func:`make_change` dicts or ``(path, added, removed)``
+    tuples for modified files. Commits are a minute apart by default and
+    the email is made from the author's first name.
+    """
+    files_changed = [
+        make_change(c[0], c[0], c[1], c[2]) if isinstance(c, tuple) else c
+        for c in changes
+    ]
+    if timestamp is None:
+        timestamp = START + index * 60
+    return {
+        'hash': f'{index:040x}',
+        'author': author,
+        'email': email or f'{author.split()[0].lower()}@example.com',
+        'timestamp': timestamp,
+        'datetime': datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+        'message': message or f'Commit {index}',
+        'files_changed': files_changed,
+        'lines_added': sum(c['lines_added'] for c in files_changed),
+        'lines_removed': sum(c['lines_removed'] for c in files_changed),
+        'total_files': len(files_changed),
+    }
+
+
+@pytest.fixture
+def tmp_git_repo(tmp_path):
+    """Return a factory for Git repositories under ``tmp_path``.
+
+    ``tmp_git_repo(name, commits)`` makes one commit per ``(message,
+    {path: text})`` pair in ``commits`` and returns the :class:`git.Repo`.
+    """
+    def make(name='repo', commits=()):
+        repo = Repo.init(tmp_path / name)
+        with repo.config_writer() as git_config:
+            git_config.set_value('user', 'name', 'Test User')
+            git_config.set_value('user', 'email', 'test@example.com')
+        for message, files in commits:
+            for path, text in files.items():
+                full_path = Path(repo.working_dir) / path
+                full_path.parent.mkdir(parents=True, exist_ok=True)
+                full_path.write_text(text)
+            repo.index.add(list(files))
+            repo.index.commit(message)
+        return repo
+
+    return make
+
+
+@pytest.fixture
+def sample_repo(tmp_git_repo):
+    """Create a temporary Git repository with some commits for testing."""
+    repo = tmp_git_repo('sample', [
+        ('Initial commit', {'README.md': '# Test Repository\n'}),
+        ('Add main.py', {'main.py': 'print("Hello World")'}),
+        ('Update main.py', {'main.py': 'print("Hello World")\nprint("Updated")'}),
+    ])
+    return repo.working_dir
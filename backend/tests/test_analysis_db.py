@@ -0,0 +1,101 @@
+"""
+Tests for the indexed analysis database.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from aggregator import TimelineAggregator
+from analysis_db import AnalysisDatabase, AnalysisDatabaseWriter
+from rollups import bucket_start
+
+from .conftest import make_commit
+
+DAY = 86400
+# A Thursday, so the first week bucket starts before it
+START = 1700697600.0
+
+
+COMMITS = [
+    make_commit(day, author, changes, timestamp=START + day * DAY)
+    for day, author, changes in [
+        (0, 'Ann', [('src/api.py', 50, 0), ('README.md', 10, 0)]),
+        (1, 'Bob', [('src/api.py', 5, 5)]),
+        (2, 'Ann', [('src/db.py', 20, 0)]),
+        (5, 'Bob', [('src/api.py', 1, 1), ('src/db.py', 1, 0)]),
+        (9, 'Ann', [('srcs/other.py', 100, 0)]),
+    ]
+]
+
+
+@pytest.fixture
+def database(tmp_path):
+    aggregator = TimelineAggregator()
+    path = tmp_path / 'analysis.sqlite'
+    writer = AnalysisDatabaseWriter(str(path))
+    for commit in COMMITS:
+        aggregator.add(commit)
+        writer.add(commit, aggregator.identities.resolve(commit['author'],
+                                                         commit['email']))
+    writer.finish(aggregator, aggregator.metadata())
+    assert not Path(f'{path}.tmp').exists()
+    return AnalysisDatabase(str(path))
+
+
+def test_top_files_by_churn_and_changes(database):
+    top = database.top_files()
+    assert [f['path'] for f in top] == ['srcs/other.py', 'src/api.py',
+                                        'src/db.py', 'README.md']
+    assert top[1] == {'path': 'src/api.py', 'changes': 3, 'lines_added': 56,
+                      'lines_removed': 6, 'churn': 62}
+    assert database.top_files(order='changes', limit=1)[0]['path'] == 'src/api.py'
+
+
+def test_path_filter_matches_directories_not_prefixes(database):
+    """Test that ``src`` covers files below src/ but not srcs/."""
+    assert {f['path'] for f in database.top_files(path='src/')} == {
+        'src/api.py', 'src/db.py'}
+    assert [f['path'] for f in database.top_files(path='README.md')] == ['README.md']
+    authors = database.top_authors(path='src')
+    assert [(a['author'], a['commits']) for a in authors] == [('Ann', 2), ('Bob', 2)]
+
+
+def test_time_range(database):
+    end = START + 2 * DAY
+    assert [f['path'] for f in database.top_files(start=START + DAY, end=end)] == [
+        'src/db.py', 'src/api.py']
+    authors = database.top_authors(end=end, order='churn')
+    assert [(a['author'], a['churn']) for a in authors] == [('Ann', 80), ('Bob', 10)]
+
+
+def test_activity_buckets_match_rollups(database):
+    for resolution in ('day', 'week', 'month'):
+        expected = {}
+        for commit in COMMITS:
+            start = bucket_start(commit['timestamp'], resolution)
+            expected[start] = expected.get(start, 0) + 1
+        rows = database.activity(resolution)
+        assert {row['start']: row['commits'] for row in rows} == expected
+
+    weeks = database.activity('week', author='Bob')
+    assert [(w['date'], w['commits'], w['lines_added']) for w in weeks] == [
+        ('2023-11-20', 1, 5), ('2023-11-27', 1, 2)]
+    by_author = database.activity('month', by_author=True)
+    assert [(r['date'], r['author'], r['commits']) for r in by_author] == [
+        ('2023-11-01', 'Ann', 2), ('2023-11-01', 'Bob', 2), ('2023-12-01', 'Ann', 1)]
+
+
+def test_bad_arguments_are_value_errors(database, tmp_path):
+    with pytest.raises(ValueError):
+        database.activity('year')
+    with pytest.raises(ValueError):
+        database.top_files(order='name')
+    with pytest.raises(ValueError):
+        database.top_authors(limit=0)
+    with pytest.raises(ValueError):
+        AnalysisDatabase(str(tmp_path / 'missing.sqlite'))
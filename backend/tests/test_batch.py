@@ -0,0 +1,68 @@
+"""
+Tests for batch analysis of many repositories.
+"""
+
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import batch
+from batch import analyze_many, read_manifest
+
+
+def commits(count):
+    return [(f'Commit {i}', {'file.txt': f'{i}\n'}) for i in range(count)]
+
+
+def test_manifest_and_failure_isolation(tmp_path, tmp_git_repo):
+    """Test that a broken repository is recorded without stopping the batch."""
+    small = tmp_git_repo('small', commits(1)).working_dir
+    large = tmp_git_repo('large', commits(3)).working_dir
+    manifest = tmp_path / 'repos.txt'
+    manifest.write_text('# nightly\nsmall\n\nmissing  # gone\nlarge\n')
+    repos = read_manifest(str(manifest))
+    assert repos == [small, str(tmp_path / 'missing'), large]
+
+    started = []
+    index = analyze_many(
+        repos, str(tmp_path / 'out'), jobs=1, engine='numstat',
+        on_result=lambda entry: started.append(entry['repo']),
+    )
+
+    # Largest first with a single job
+    assert started == [large, small, str(tmp_path / 'missing')]
+    entries = {Path(e['repo']).name: e for e in index['repositories']}
+    assert entries['large']['status'] == 'ok'
+    assert entries['large']['metadata']['total_commits'] == 3
+    assert Path(entries['small']['output']).exists()
+    assert entries['missing']['status'] == 'failed'
+    assert 'does not exist' in entries['missing']['error']
+
+    on_disk = json.loads((tmp_path / 'out' / 'index.json').read_text())
+    assert on_disk['summary']['statuses'] == {'ok': 2, 'failed': 1}
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork',
+    reason='workers only see the patched analysis when forked',
+)
+def test_timeout_kills_slow_repository(tmp_path, tmp_git_repo, monkeypatch):
+    """Test that a repository exceeding the timeout is stopped."""
+    repo = tmp_git_repo('slow', commits(1)).working_dir
+
+    def slow_analysis(*args, **kwargs):
+        time.sleep(30)
+
+    monkeypatch.setattr(batch, 'analyze_repository', slow_analysis)
+    started = time.monotonic()
+    index = analyze_many([repo], str(tmp_path / 'out'), jobs=1, timeout=0.5)
+
+    assert time.monotonic() - started < 10
+    assert index['repositories'][0]['status'] == 'timeout'
@@ -0,0 +1,125 @@
+"""
+Tests for on-demand complexity analysis and the per-blob cache.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from git import Repo
+from pydriller import Repository
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import complexity
+from analyzer import GitAnalyzer
+from cache import ComplexityCache
+
+BRANCHY = '''def f(x):
+    if x:
+        return 1
+    for i in range(x):
+        if i:
+            return i
+    return 0
+'''
+
+
+@pytest.fixture
+def code_repo():
+    """Create a repository whose history revisits the same file contents."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        repo = Repo.init(temp_dir)
+        with repo.config_writer() as git_config:
+            git_config.set_value('user', 'name', 'Test User')
+            git_config.set_value('user', 'email', 'test@example.com')
+
+        path = Path(temp_dir)
+        (path / 'app.py').write_text(BRANCHY)
+        (path / 'notes.txt').write_text('not code\n')
+        repo.git.add('.')
+        repo.git.commit('-m', 'Add app')
+        (path / 'app.py').write_text('def f(x):\n    return x\n')
+        repo.git.commit('-am', 'Simplify')
+        (path / 'app.py').write_text(BRANCHY)
+        repo.git.commit('-am', 'Revert')
+        repo.git.mv('app.py', 'core.py')
+        repo.git.commit('-m', 'Rename')
+        yield temp_dir
+
+
+def complexities(commits):
+    return [[f['complexity'] for f in c['files_changed']] for c in commits]
+
+
+def test_complexity_is_opt_in(code_repo):
+    """Test that complexity is only computed when asked for."""
+    for engine in ('pydriller', 'numstat'):
+        commits = GitAnalyzer(code_repo, engine=engine).analyze_commits()
+        assert all(v is None for row in complexities(commits) for v in row)
+
+
+def test_engines_agree_with_pydriller(code_repo):
+    """Test that the git log engines report the complexity pydriller computes."""
+    expected = complexities(
+        GitAnalyzer(code_repo, complexity=True).analyze_commits()
+    )
+    for engine in ('numstat', 'async'):
+        assert expected == complexities(
+            GitAnalyzer(code_repo, engine=engine, complexity=True).analyze_commits()
+        )
+    assert expected[:3] == [
+        [m.complexity for m in c.modified_files]
+        for c in Repository(code_repo).traverse_commits()
+    ][:3]
+    # The exact rename keeps its contents' complexity
+    assert expected == [[4, None], [1], [4], [4]]
+
+
+@pytest.mark.parametrize('engine', ['numstat', 'async'])
+def test_each_blob_is_parsed_once(code_repo, tmp_path, monkeypatch, engine):
+    """Test that repeated contents and repeated runs reuse cached results."""
+    parsed = []
+    original = complexity.source_complexity
+
+    def tracking(filename, source):
+        parsed.append(filename)
+        return original(filename, source)
+
+    monkeypatch.setattr(complexity, 'source_complexity', tracking)
+
+    analyzer = GitAnalyzer(code_repo, engine=engine, complexity=True,
+                           use_cache=True, cache_dir=str(tmp_path))
+    first = analyzer.analyze_commits()
+    # Two distinct app.py contents; the revert and rename reuse the first
+    assert parsed == ['app.py', 'app.py']
+
+    # A path-filtered run extracts commits again, but not complexity
+    scoped = GitAnalyzer(code_repo, engine=engine, complexity=True,
+                         use_cache=True, cache_dir=str(tmp_path),
+                         include_paths=['app.py'])
+    assert complexities(scoped.analyze_commits())[0] == [4]
+    assert len(parsed) == 2
+    assert complexities(analyzer.analyze_commits()) == complexities(first)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the blob cache stays within its size bound."""
+    path = str(tmp_path / 'complexity.sqlite')
+    with ComplexityCache(path, max_entries=2) as cache:
+        cache.put('a', 1)
+        cache.put('b', None)
+        cache.flush()
+        assert cache.get('a') == 1
+        assert 'b' in cache and cache.get('b') is None
+        cache.flush()
+        cache.get('a')
+        cache.put('c', 3)
+        cache.flush()
+
+    with ComplexityCache(path, max_entries=2) as cache:
+        assert len(cache) == 2
+        assert 'a' in cache and 'c' in cache
+        assert 'b' not in cache
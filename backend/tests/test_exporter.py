@@ -0,0 +1,107 @@
+"""
+Tests for data export module.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from aggregator import TimelineAggregator
+from columnar import ColumnarTimeline
+from exporter import DataExporter
+
+from .conftest import make_change, make_commit
+
+
+@pytest.fixture
+def commits():
+    return [
+        make_commit(i, 'Ann Author' if i % 2 else 'Bob Builder', [
+            make_change(None, f'file{i % 2}.py', i + 1, change_type='ADD'),
+        ])
+        for i in range(5)
+    ]
+
+
+def stream_timeline(commits, output_path):
+    aggregator = TimelineAggregator()
+    with DataExporter.open_timeline_writer(str(output_path)) as writer:
+        for commit in commits:
+            writer.write_event(aggregator.add(commit))
+        writer.finish(
+            aggregator.metadata(),
+            aggregator.contributor_stats(),
+            aggregator.file_stats(),
+            rollups=aggregator.rollups.to_dict(),
+        )
+    return aggregator
+
+
+@pytest.mark.parametrize('filename', ['timeline.json', 'timeline.ndjson'])
+def test_streamed_timeline_round_trips(commits, tmp_path, filename):
+    """Test that both streamed formats load back to the full timeline data."""
+    output_path = tmp_path / filename
+    stream_timeline(commits, output_path)
+
+    expected = DataExporter.create_timeline_data(commits, {}, {})
+    loaded = DataExporter.load_timeline(str(output_path))
+
+    assert loaded['timeline'] == expected['timeline']
+    assert loaded['metadata']['total_commits'] == len(commits)
+    assert set(loaded['contributors']) == {'Ann Author', 'Bob Builder'}
+    assert set(loaded['files']) == {'file0.py', 'file1.py'}
+
+
+def test_json_stream_is_a_single_document(commits, tmp_path):
+    """Test that streamed JSON is one compact, standard JSON document."""
+    output_path = tmp_path / 'timeline.json'
+    stream_timeline(commits, output_path)
+
+    text = output_path.read_text(encoding='utf-8')
+    assert '\n' not in text
+    assert set(json.loads(text)) == {
+        'metadata', 'timeline', 'contributors', 'files', 'rollups'
+    }
+
+
+def test_ndjson_has_one_event_per_line(commits, tmp_path):
+    """Test that NDJSON output puts each event on its own line."""
+    output_path = tmp_path / 'timeline.ndjson'
+    stream_timeline(commits, output_path)
+
+    lines = output_path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == len(commits) + 1
+    assert json.loads(lines[0])['commit_hash'] == commits[0]['hash']
+    assert 'metadata' in json.loads(lines[-1])
+
+
+def test_columnar_round_trips(commits, tmp_path):
+    """Test that the columnar format decodes back to the same timeline."""
+    stream_timeline(commits, tmp_path / 'timeline.json')
+    aggregator = stream_timeline(commits, tmp_path / 'timeline.ctv')
+
+    expected = DataExporter.load_timeline(str(tmp_path / 'timeline.json'))
+    loaded = DataExporter.load_timeline(str(tmp_path / 'timeline.ctv'))
+
+    assert loaded == expected
+    assert loaded['metadata'] == aggregator.metadata()
+
+
+def test_columnar_time_slice(commits, tmp_path):
+    """Test that a time slice is read without decoding other events."""
+    output_path = tmp_path / 'timeline.ctv'
+    stream_timeline(commits, output_path)
+
+    with ColumnarTimeline(str(output_path)) as timeline:
+        assert len(timeline) == len(commits)
+        start, end = commits[1]['timestamp'], commits[3]['timestamp']
+
+        assert timeline.slice_indices(start, end) == (1, 4)
+        hashes = [e['commit_hash'] for e in timeline.iter_events(start, end)]
+        assert hashes == [c['hash'] for c in commits[1:4]]
+        assert timeline.event(4)['files_changed'][0]['new_path'] == 'file0.py'
@@ -0,0 +1,118 @@
+"""
+Tests for the self-contained HTML export.
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from aggregator import TimelineAggregator
+from exporter import DataExporter
+from html_export import export_html, unpack
+
+from .conftest import START, make_change, make_commit
+
+
+def sample_commit(index):
+    """Build commit ``index``, with a name that could close a script tag."""
+    path = f'src/file{index % 3}.py'
+    return make_commit(
+        index,
+        'Ann Author' if index % 2 else 'Bob </script> Builder',
+        [
+            make_change(None if index < 3 else path, path, index + 1, index // 2,
+                        'ADD' if index < 3 else 'MODIFY'),
+        ],
+        timestamp=START + index * 3600,
+        message=f'Commit {index}\n\nLonger description',
+    )
+
+
+@pytest.fixture(params=['timeline.json', 'timeline.ndjson', 'timeline.ctv'])
+def timeline_file(request, tmp_path):
+    aggregator = TimelineAggregator()
+    path = tmp_path / request.param
+    events = []
+    with DataExporter.open_timeline_writer(str(path)) as writer:
+        for index in range(25):
+            events.append(aggregator.add(sample_commit(index)))
+            writer.write_event(events[-1])
+        writer.finish(
+            aggregator.metadata(),
+            aggregator.contributor_stats(),
+            aggregator.file_stats(),
+            rollups=aggregator.rollups.to_dict(),
+        )
+    return path, events
+
+
+def embedded(page, element_id):
+    match = re.search(rf'<script type="[^"]+" id="{element_id}">(.*?)</script>',
+                      page, re.S)
+    return match.group(1)
+
+
+def test_events_round_trip_through_packed_chunks(timeline_file, tmp_path):
+    """Test that decoding the delta-encoded chunks the way the page does
+    gives back every event."""
+    path, events = timeline_file
+    output = tmp_path / 'out' / 'timeline.html'
+    result = export_html(str(path), str(output), chunk_events=10)
+    assert result['events'] == 25 and result['chunks'] == 3
+
+    page = output.read_text(encoding='utf-8')
+    header = json.loads(embedded(page, 'header'))
+    paths = unpack(embedded(page, 'paths'))
+    assert [c['count'] for c in header['chunks']] == [10, 10, 5]
+    assert sum(header['rollups']['day']['commits']) == 25
+
+    decoded = []
+    for number, entry in enumerate(header['chunks']):
+        c = unpack(embedded(page, f'chunk-{number}'))
+        time, lines, files, path_id, k = entry['start'], entry['lines'], entry['files'], 0, 0
+        for i in range(entry['count']):
+            time += c['t'][i]
+            lines += c['cl'][i]
+            files += c['cf'][i]
+            changes = []
+            for _ in range(c['n'][i]):
+                path_id += c['p'][k]
+                changes.append((paths[path_id], c['c'][k], c['fa'][k], c['fr'][k]))
+                k += 1
+            decoded.append((time, header['authors'][c['a'][i]], c['m'][i], lines,
+                            files, changes))
+
+    expected = [
+        (int(e['timestamp']), e['author'], e['message'].split('\n')[0],
+         e['cumulative_lines'], e['cumulative_files'],
+         [(f['new_path'], f['change_type'][0], f['lines_added'], f['lines_removed'])
+          for f in e['files_changed']])
+        for e in events
+    ]
+    assert decoded == expected
+
+
+def test_page_is_self_contained_and_escaped(tmp_path):
+    """Test that the page loads nothing external and that embedded text
+    cannot close its script tag."""
+    aggregator = TimelineAggregator()
+    path = tmp_path / 'timeline.ndjson'
+    with DataExporter.open_timeline_writer(str(path)) as writer:
+        for index in range(3):
+            writer.write_event(aggregator.add(sample_commit(index)))
+        writer.finish(aggregator.metadata(), aggregator.contributor_stats(),
+                      aggregator.file_stats())
+    export_html(str(path), str(tmp_path / 'out.html'), title='<Demo>')
+
+    page = (tmp_path / 'out.html').read_text(encoding='utf-8')
+    assert 'src=' not in page and 'href=' not in page
+    assert '<title>&lt;Demo&gt;</title>' in page
+    header = json.loads(embedded(page, 'header'))
+    assert 'Bob </script> Builder' in header['authors']
+    assert header['contributors'][0]['name'] == 'Bob </script> Builder'
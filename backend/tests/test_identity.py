@@ -0,0 +1,100 @@
+"""
+Tests for author identity resolution.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from aggregator import TimelineAggregator
+from exporter import DataExporter
+from identity import IdentityTable, Mailmap
+from timeline_index import TimelineIndex
+
+from .conftest import make_change, make_commit
+
+
+def make_mailmap(text):
+    mailmap = Mailmap()
+    mailmap.update(text.splitlines())
+    return mailmap
+
+
+def test_mailmap_line_forms():
+    """Test every .mailmap line form and name-specific precedence."""
+    mailmap = make_mailmap(
+        '# comment\n'
+        'Jane Doe <jane@example.com>\n'
+        '<jane@example.com> <jane@old.example.com>\n'
+        'Joe Bloggs <joe@example.com> <JOE@laptop.local>\n'
+        'Ann Other <ann@example.com> root <root@localhost>\n'
+        'not a mailmap line\n'
+    )
+    assert mailmap.lookup('jdoe', 'jane@example.com') == \
+        ('Jane Doe', 'jane@example.com')
+    assert mailmap.lookup('Jane', 'jane@old.example.com') == \
+        ('Jane', 'jane@example.com')
+    assert mailmap.lookup('joe', 'joe@Laptop.local') == \
+        ('Joe Bloggs', 'joe@example.com')
+    assert mailmap.lookup('ROOT', 'root@localhost') == \
+        ('Ann Other', 'ann@example.com')
+    # Only the named commit identity on that email is remapped
+    assert mailmap.lookup('admin', 'root@localhost') == ('admin', 'root@localhost')
+    assert mailmap.lookup('Someone', 'x@y.z') == ('Someone', 'x@y.z')
+
+
+def test_identity_table_merges_emails_and_splits_names():
+    """Test that identities follow canonical emails, not names."""
+    identities = IdentityTable(
+        make_mailmap('Jane Doe <jane@example.com> <jane@old.example.com>\n')
+    )
+    jane = identities.resolve('Jane Doe', 'jane@example.com')
+    assert identities.resolve('jane', 'jane@old.example.com') == jane
+    assert identities.resolve('J. Doe', 'JANE@example.com') == jane
+    other = identities.resolve('Jane Doe', 'jane@elsewhere.org')
+    assert other != jane
+
+    assert len(identities) == 2
+    assert identities.labels() == [
+        'Jane Doe <jane@example.com>', 'Jane Doe <jane@elsewhere.org>'
+    ]
+
+
+def test_same_name_authors_stay_apart_in_every_view(tmp_path):
+    """Test that people sharing a name are kept apart in the index, the
+    rollups and the directory tree, for JSON and columnar timelines."""
+    added = [make_change(None, 'src/app.py', change_type='ADD')]
+    commits = [
+        make_commit(index, 'Sam Lee', added, email=email)
+        for index, email in enumerate(['sam@one.org', 'sam@two.org', 'SAM@one.org'])
+    ]
+
+    for filename in ('timeline.json', 'timeline.ctv'):
+        aggregator = TimelineAggregator()
+        path = str(tmp_path / filename)
+        with DataExporter.open_timeline_writer(path) as writer:
+            for commit in commits:
+                writer.write_event(aggregator.add(commit))
+            writer.finish(
+                aggregator.metadata(),
+                aggregator.contributor_stats(),
+                aggregator.file_stats(),
+                rollups=aggregator.rollups.to_dict(),
+                tree=aggregator.tree.to_dict(),
+            )
+
+        index = TimelineIndex.load(path)
+        assert set(index.contributors) == {'Sam Lee <sam@one.org>',
+                                           'Sam Lee <sam@two.org>'}
+        first = index.query(author='Sam Lee <sam@one.org>')['events']
+        assert [e['message'] for e in first] == ['Commit 0', 'Commit 2']
+        second = index.query(author='Sam Lee <sam@two.org>')['events']
+        assert [e['message'] for e in second] == ['Commit 1']
+        assert index.query(author='Sam Lee')['events'] == []
+
+        day = index.rollup(resolution='day')['buckets']
+        assert [(b['commits'], b['authors']) for b in day] == [(3, 2)]
+        tree = index.directory('src')
+        assert (tree['commits'], tree['authors']) == (3, 2)
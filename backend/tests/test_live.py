@@ -0,0 +1,112 @@
+"""
+Tests for the live-updating timeline.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from aggregator import TimelineAggregator
+from analyzer import GitAnalyzer
+from live import LiveTimeline
+
+
+def commit_file(repo, name, text, message):
+    path = Path(repo.working_dir) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    repo.index.add([name])
+    return repo.index.commit(message)
+
+
+INITIAL_COMMITS = [
+    ('Initial commit', {'README.md': '# Test\n'}),
+    ('Add app', {'src/app.py': 'x = 1\n'}),
+]
+
+
+def full_analysis(repo_path):
+    aggregator = TimelineAggregator()
+    events = [aggregator.add(c)
+              for c in GitAnalyzer(repo_path, engine='numstat').iter_commits()]
+    return aggregator, events
+
+
+def test_new_commits_are_appended_as_deltas(tmp_git_repo):
+    """Test that only new commits are analyzed and that the live state
+    matches a fresh analysis."""
+    repo = tmp_git_repo('repo', INITIAL_COMMITS)
+    live = LiveTimeline(GitAnalyzer(repo.working_dir, engine='numstat'))
+    assert live.refresh() is None
+    updates = live.updates(heartbeat=0)
+
+    commit_file(repo, 'src/app.py', 'x = 2\ny = 3\n', 'Update app')
+    repo.git.mv('src/app.py', 'src/main.py')
+    repo.index.commit('Rename app')
+
+    extracted = []
+    original = live.analyzer.list_commits_by_date
+
+    def tracking(*args, **kwargs):
+        hashes = original(*args, **kwargs)
+        extracted.extend(hashes)
+        return hashes
+
+    live.analyzer.list_commits_by_date = tracking
+    assert live.refresh() == 'delta'
+    assert len(extracted) == 2
+
+    update_id, update_type, payload = next(updates)
+    delta = json.loads(payload)
+    assert (update_id, update_type) == (1, 'delta')
+    assert [e['message'] for e in delta['events']] == ['Update app', 'Rename app']
+    assert delta['removed_files'] == ['src/app.py']
+    assert delta['files']['src/main.py']['previous_paths'] == ['src/app.py']
+    assert delta['metadata']['total_commits'] == 4
+
+    aggregator, events = full_analysis(repo.working_dir)
+    assert live.index.events == events
+    assert live.index.files == aggregator.file_stats()
+    assert live.index.contributors == aggregator.contributor_stats()
+    assert live.index.query(path_prefix='src/main.py')['events'] == events[-1:]
+    assert next(updates) is None
+
+
+def test_rewritten_history_resets(tmp_git_repo, monkeypatch):
+    """Test that a history rewrite rebuilds the timeline and that clients
+    too far behind are told to reload."""
+    repo = tmp_git_repo('repo', INITIAL_COMMITS)
+    monkeypatch.setattr(LiveTimeline, 'BACKLOG', 1)
+    live = LiveTimeline(GitAnalyzer(repo.working_dir, engine='numstat'))
+
+    repo.git.commit('--amend', '-m', 'Rewritten')
+    assert live.refresh() == 'reset'
+    assert [e['message'] for e in live.index.events][-1] == 'Rewritten'
+    assert len(live.index) == 2
+
+    commit_file(repo, 'b.txt', 'b\n', 'Add b')
+    assert live.refresh() == 'delta'
+
+    update_id, update_type, payload = next(live.updates(last_id=0))
+    assert update_type == 'reset' and update_id == 2
+    assert json.loads(payload)['metadata']['total_commits'] == 3
+
+
+def test_ids_from_before_a_restart_reset(tmp_git_repo):
+    """Test that a Last-Event-ID newer than any update gets a reset."""
+    repo = tmp_git_repo('repo', INITIAL_COMMITS)
+    live = LiveTimeline(GitAnalyzer(repo.working_dir, engine='numstat'))
+
+    update_id, update_type, payload = next(live.updates(last_id=57, heartbeat=0))
+    assert (update_id, update_type) == (0, 'reset')
+    assert json.loads(payload)['metadata']['total_commits'] == 2
+
+    updates = live.updates(last_id=57, heartbeat=0)
+    next(updates)
+    commit_file(repo, 'b.txt', 'b\n', 'Add b')
+    assert live.refresh() == 'delta'
+    update_id, update_type, _ = next(updates)
+    assert (update_id, update_type) == (1, 'delta')
@@ -0,0 +1,100 @@
+"""
+Tests for the asyncio extraction pipeline.
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+from git import Repo
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import pipeline
+from analyzer import GitAnalyzer
+from gitlog import iter_log_commits, path_scope
+from pipeline import iter_pipelined_commits
+from profiling import Profiler
+
+
+@pytest.fixture
+def history_repo():
+    """Create a repository with a dozen commits across two directories."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        repo = Repo.init(temp_dir)
+        with repo.config_writer() as git_config:
+            git_config.set_value('user', 'name', 'Test User')
+            git_config.set_value('user', 'email', 'test@example.com')
+
+        path = Path(temp_dir)
+        (path / 'src').mkdir()
+        (path / 'docs').mkdir()
+        for index in range(12):
+            directory = 'src' if index % 3 else 'docs'
+            (path / directory / f'file{index % 4}.py').write_text(
+                'def f(x):\n' + '    if x:\n        return 1\n' * index
+                + '    return 0\n')
+            repo.git.add('.')
+            repo.git.commit('-m', f'Commit {index}\n\nBody {index}')
+        yield temp_dir
+
+
+@pytest.fixture
+def small_slices(monkeypatch):
+    """Split even the fixture history across several git processes, with
+    queues small enough to apply backpressure."""
+    monkeypatch.setattr(pipeline, 'SLICE_SIZE', 2)
+    monkeypatch.setattr(pipeline, 'QUEUE_CHUNKS', 1)
+    monkeypatch.setattr(pipeline, 'READ_SIZE', 64)
+
+
+@pytest.mark.parametrize('processes', [1, 3])
+def test_commits_match_numstat_engine_in_order(history_repo, small_slices,
+                                               processes):
+    hashes = GitAnalyzer(history_repo).list_commits_by_date()
+    for scope in (None, path_scope(['src'])):
+        expected = list(iter_log_commits(history_repo, hashes, scope))
+        assert list(iter_pipelined_commits(history_repo, hashes, scope,
+                                           processes=processes)) == expected
+
+
+def test_async_engine_matches_numstat_engine(history_repo, small_slices):
+    """Test that the engine plugs into the analyzer, with complexity."""
+    expected = GitAnalyzer(history_repo, engine='numstat',
+                           complexity=True).analyze_commits()
+    commits = GitAnalyzer(history_repo, engine='async', workers=2,
+                          complexity=True).analyze_commits()
+    assert commits == expected
+    assert commits[-1]['files_changed'][0]['complexity'] == 12
+
+
+def test_complexity_time_is_not_counted_as_waiting(history_repo, small_slices):
+    """Test that complexity computed while waiting for the pipeline is
+    recorded once, as its own span."""
+    profiler = Profiler()
+    GitAnalyzer(history_repo, engine='async', workers=2, complexity=True,
+                profiler=profiler).analyze_commits()
+    spans = profiler.report()['spans']
+    assert spans['extract.complexity']['calls'] == profiler.counters['blobs_parsed']
+    assert spans['extract.git']['calls'] > 0
+    assert 0 <= spans['extract.git']['seconds']
+    assert (spans['extract.git']['seconds'] + spans['extract.complexity']['seconds']
+            <= profiler.report()['wall_seconds'])
+
+
+def test_git_errors_are_raised(history_repo, small_slices):
+    hashes = GitAnalyzer(history_repo).list_commits_by_date()
+    with pytest.raises(RuntimeError, match='git log failed'):
+        list(iter_pipelined_commits(history_repo, hashes + ['f' * 40],
+                                    processes=2))
+
+
+def test_closing_early_stops_the_pipeline(history_repo, small_slices):
+    hashes = GitAnalyzer(history_repo).list_commits_by_date()
+    commits = iter_pipelined_commits(history_repo, hashes, processes=3)
+    assert next(commits)['hash'] == hashes[0]
+    commits.close()
+    assert threading.active_count() == 1
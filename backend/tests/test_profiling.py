@@ -0,0 +1,50 @@
+"""
+Tests for analysis run instrumentation.
+"""
+
+import json
+import pstats
+import sys
+from pathlib import Path
+
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from main import analyze_repository
+from profiling import NULL_PROFILER, Profiler
+
+
+def test_profile_report_covers_each_stage(tmp_path, tmp_git_repo):
+    """Test that a profiled run reports spans, counters, rates and memory."""
+    repo = tmp_git_repo('repo', [
+        (f'Commit {i}', {f'file{i}.py': f'x = {i}\n', 'common.py': f'y = {i}\n'})
+        for i in range(3)
+    ]).working_dir
+    output = tmp_path / 'timeline.json'
+    profiler = Profiler(cpu_profile=str(tmp_path / 'loop.prof'))
+
+    analyze_repository(repo, str(output), engine='numstat', complexity=True,
+                       profiler=profiler)
+    report = json.loads(json.dumps(profiler.report()))
+
+    assert {'extract', 'extract.git', 'extract.list', 'extract.complexity',
+            'aggregate', 'write', 'summarize', 'export'} <= set(report['spans'])
+    assert report['spans']['aggregate']['calls'] == 3
+    assert report['counters']['commits'] == 3
+    assert report['counters']['files'] == 6
+    assert report['counters']['blobs_parsed'] == 6
+    assert report['counters']['bytes_written'] == output.stat().st_size
+    assert report['rates']['commits_per_second'] > 0
+    assert report['memory']['peak_rss_bytes'] > 0
+
+    stats = pstats.Stats(str(tmp_path / 'loop.prof'))
+    assert any(func[2] == '_fold_commits' for func in stats.stats)
+
+
+def test_null_profiler_records_nothing():
+    """Test that the default profiler is a no-op."""
+    with NULL_PROFILER.span('extract'):
+        NULL_PROFILER.count('commits')
+    assert not NULL_PROFILER
+    assert NULL_PROFILER.spans == {} and NULL_PROFILER.counters == {}
@@ -0,0 +1,114 @@
+"""
+Tests for the headless video renderer.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import render
+from render import FrameLayout, ffmpeg_command, iter_frames, render_video, scan_timeline
+
+
+def event(timestamp, *paths):
+    return {
+        'timestamp': timestamp,
+        'files_changed': [
+            {'old_path': None, 'new_path': path, 'change_type': 'MODIFY',
+             'lines_added': 10, 'lines_removed': 2}
+            for path in paths
+        ],
+    }
+
+
+def write_ndjson(path, events):
+    with open(path, 'w', encoding='utf-8') as f:
+        for e in events:
+            f.write(json.dumps(e) + '\n')
+        f.write(json.dumps({'metadata': {}, 'contributors': {}, 'files': {}}) + '\n')
+    return str(path)
+
+
+def test_frames_stream_and_reuse_unchanged_heatmaps(tmp_path):
+    """Test that every frame is produced, quiet stretches reuse the
+    previous image and the process pool renders the same frames."""
+    timeline = write_ndjson(tmp_path / 'timeline.ndjson', [
+        event(0, 'src/app.py', 'README.md'),
+        event(10, 'src/app.py'),
+        event(1000, 'docs/guide/intro.md', 'src/lib/util.py'),
+    ])
+    stats = {}
+    frames = list(iter_frames(timeline, width=64, height=48, fps=10, duration=20,
+                              jobs=1, stats=stats))
+    assert len(frames) == 200
+    assert all(len(frame) == 64 * 48 * 3 for frame in frames)
+    assert stats['rendered'] + stats['reused'] == 200
+    # Once the first commits cool down nothing changes until the last one
+    assert stats['reused'] > 100
+    # Only the progress bar differs between reused frames
+    heatmap_size = 64 * (48 - render.BAR_HEIGHT) * 3
+    assert frames[150][:heatmap_size] == frames[151][:heatmap_size]
+    assert frames[150] != frames[151]
+
+    parallel = list(iter_frames(timeline, width=64, height=48, fps=10, duration=20,
+                                jobs=2))
+    assert parallel == frames
+
+
+def test_directories_merge_into_parents_beyond_max_cells(monkeypatch):
+    """Test that the drawn depth shrinks until the directories fit."""
+    events = [event(i, f'top{i % 3}/sub{i}/file.py') for i in range(10)]
+    assert len(scan_timeline(events, depth=2)[2]) == 10
+
+    monkeypatch.setattr(render, 'MAX_CELLS', 5)
+    start, end, directories = scan_timeline(events, depth=2)
+    assert (start, end) == (0, 9)
+    assert directories == ['top0', 'top1', 'top2']
+
+
+def test_layout_rejects_odd_sizes():
+    with pytest.raises(ValueError):
+        FrameLayout(641, 480, 10)
+
+
+def test_encoder_commands(tmp_path):
+    """Test that frames are piped in raw and GIFs use the fixed palette."""
+    mp4 = ffmpeg_command('out.mp4', 'mp4', 640, 480, 30)
+    assert mp4[mp4.index('-i') + 1] == '-'
+    assert 'libx264' in mp4 and mp4[-1] == 'out.mp4'
+
+    gif = ffmpeg_command('out.gif', 'gif', 640, 480, 30, palette_path='p.rgb')
+    assert 'p.rgb' in gif and 'libx264' not in gif
+    assert len(render.PALETTE) == 256 * 3
+
+    timeline = write_ndjson(tmp_path / 'timeline.ndjson', [event(0, 'a.py')])
+    with pytest.raises(RuntimeError):
+        render_video(timeline, str(tmp_path / 'out.mp4'), ffmpeg='no-such-ffmpeg')
+    with pytest.raises(ValueError):
+        render_video(timeline, str(tmp_path / 'out.avi'))
+
+
+def test_chatty_encoder_does_not_block(tmp_path):
+    """Test that ffmpeg's stderr is drained while frames are written."""
+    encoder = tmp_path / 'ffmpeg'
+    encoder.write_text(
+        f'#!{sys.executable}\n'
+        'import sys\n'
+        'sys.stderr.write("progress\\n" * 100000)\n'
+        'sys.stderr.flush()\n'
+        'sys.stdin.buffer.read()\n'
+        'sys.stderr.write("encoder failed")\n'
+        'sys.exit(1)\n'
+    )
+    encoder.chmod(0o755)
+
+    events = [event(day * 86400, f'src/{day}.py') for day in range(10)]
+    timeline = write_ndjson(tmp_path / 'timeline.ndjson', events)
+    with pytest.raises(RuntimeError, match='encoder failed$'):
+        render_video(timeline, str(tmp_path / 'out.mp4'), ffmpeg=str(encoder),
+                     width=320, height=240)
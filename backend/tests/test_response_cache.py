@@ -0,0 +1,54 @@
+"""
+Tests for the compressed response cache.
+"""
+
+import gzip
+import sys
+from pathlib import Path
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import response_cache
+from response_cache import CachedBody, ResponseCache
+
+
+def test_entries_belong_to_a_generation():
+    """Test that entries are only found for their data generation."""
+    cache = ResponseCache()
+    entry = cache.put('/api/files', (1, 100), b'{"files":{}}', 'application/json')
+    assert cache.get('/api/files', (1, 100)) is entry
+    assert cache.get('/api/files', (2, 100)) is None
+    assert cache.get('/api/metadata', (1, 100)) is None
+
+
+def test_variants_are_built_once_and_only_when_worthwhile():
+    """Test that compressed variants are built lazily and only once."""
+    body = b'{"events":[' + b'{"lines_added":1},' * 200 + b'{}]}'
+    entry = CachedBody(body, 'application/json')
+    assert entry.encodings()[-1] == 'gzip'
+    assert entry.variants == {}
+    compressed = entry.encoded('gzip')
+    assert gzip.decompress(compressed) == body
+    assert entry.encoded('gzip') is compressed
+    assert entry.encoded(None) is body
+    if response_cache.HAVE_BROTLI:
+        assert entry.encodings()[0] == 'br'
+        assert response_cache.brotli.decompress(entry.encoded('br')) == body
+
+    small = CachedBody(b'{}', 'application/json')
+    assert small.encodings() == ()
+    # The validator depends on the content only
+    assert CachedBody(body, 'application/json').etag == entry.etag != small.etag
+
+
+def test_least_recently_used_entries_are_evicted():
+    """Test that the least recently used entries are evicted first."""
+    cache = ResponseCache(max_bytes=2500)
+    for key in 'abc':
+        cache.put(key, 0, b'x' * 1000, 'text/plain')
+    assert len(cache) == 2 and cache.get('a', 0) is None
+
+    cache.get('b', 0)
+    cache.put('d', 0, b'x' * 1000, 'text/plain')
+    assert cache.get('b', 0) is not None and cache.get('c', 0) is None
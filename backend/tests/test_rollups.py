@@ -0,0 +1,70 @@
+"""
+Tests for timeline rollups.
+"""
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from rollups import RollupBuilder, bucket_start, select_rollup
+
+from .conftest import make_commit
+
+
+def ts(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_bucket_boundaries():
+    """Test day, Monday-based week and month bucket starts in UTC."""
+    # 2024-03-14 was a Thursday
+    moment = ts(2024, 3, 14, 15, 30)
+    assert bucket_start(moment, 'day') == ts(2024, 3, 14)
+    assert bucket_start(moment, 'week') == ts(2024, 3, 11)
+    assert bucket_start(moment, 'month') == ts(2024, 3, 1)
+    with pytest.raises(ValueError):
+        bucket_start(moment, 'hour')
+
+
+def test_rollup_counts_distinct_authors_and_files():
+    """Test that buckets sum commits and lines and count distinct values."""
+    builder = RollupBuilder()
+    builder.add(make_commit(0, 'ann', [('a.py', 5, 0), ('b.py', 0, 0)],
+                            timestamp=ts(2024, 3, 11, 9)))
+    builder.add(make_commit(1, 'bob', [('a.py', 2, 0)], timestamp=ts(2024, 3, 11, 17)))
+    builder.add(make_commit(2, 'ann', [('c.py', 1, 0)], timestamp=ts(2024, 3, 13, 8)))
+    builder.add(make_commit(3, 'ann', [('a.py', 1, 0)], timestamp=ts(2024, 4, 2, 8)))
+
+    rollups = builder.to_dict()
+    first_day = rollups['day'][0]
+    assert first_day['date'] == '2024-03-11'
+    assert (first_day['commits'], first_day['lines_added']) == (2, 7)
+    assert (first_day['authors'], first_day['files']) == (2, 2)
+
+    assert [b['commits'] for b in rollups['week']] == [3, 1]
+    assert [b['files'] for b in rollups['month']] == [3, 1]
+
+
+def test_select_rollup_picks_finest_fitting_resolution():
+    """Test that auto resolution zooms to the finest level within budget."""
+    builder = RollupBuilder()
+    for day in range(1, 29):
+        builder.add(make_commit(day, 'ann', [('a.py', 1, 0)],
+                                timestamp=ts(2024, 2, day, 12)))
+    rollups = builder.to_dict()
+
+    assert select_rollup(rollups, max_buckets=30)['resolution'] == 'day'
+    assert select_rollup(rollups, max_buckets=10)['resolution'] == 'week'
+    assert select_rollup(rollups, max_buckets=2)['resolution'] == 'month'
+
+    window = select_rollup(
+        rollups, 'day', start=ts(2024, 2, 10, 6), end=ts(2024, 2, 12)
+    )
+    assert [b['date'] for b in window['buckets']] == [
+        '2024-02-10', '2024-02-11', '2024-02-12'
+    ]
@@ -0,0 +1,182 @@
+"""
+Tests for the web application's HTTP layer.
+"""
+
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from git import Repo
+
+# Add the project root to the path so the CLI package is importable
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.src.analyzer import GitAnalyzer
+from backend.src.analysis_db import AnalysisDatabase
+from backend.src.live import LiveTimeline
+from backend.src.main import analyze_repository
+from cli.src.main import create_app
+
+
+@pytest.fixture
+def repo_path(tmp_path):
+    """Create a repository with ten commits across two directories."""
+    repo = Repo.init(tmp_path / 'repo')
+    with repo.config_writer() as git_config:
+        git_config.set_value('user', 'name', 'Test User')
+        git_config.set_value('user', 'email', 'test@example.com')
+    for index in range(10):
+        name = f"{'src' if index % 2 else 'docs'}/file{index % 3}.txt"
+        path = Path(repo.working_dir) / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text('line\n' * (index + 1))
+        repo.index.add([name])
+        repo.index.commit(f'Commit {index}')
+    return repo.working_dir
+
+
+@pytest.fixture
+def analysis(repo_path, tmp_path):
+    """Analyze the repository into a timeline file and a database."""
+    timeline = str(tmp_path / 'timeline.json')
+    database = str(tmp_path / 'analysis.sqlite')
+    analyze_repository(repo_path, timeline, engine='numstat',
+                       database_path=database)
+    return timeline, database
+
+
+@pytest.fixture
+def client(analysis):
+    timeline, database = analysis
+    return create_app(timeline, database=AnalysisDatabase(database)).test_client()
+
+
+def test_etags_answer_revalidation_with_not_modified(client):
+    """Test that responses carry a validator and that unchanged data is
+    revalidated with 304 Not Modified."""
+    response = client.get('/api/metadata')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+
+    response = client.get('/api/metadata', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    response = client.get('/api/metadata', headers={'If-None-Match': 'W/"other"'})
+    assert response.status_code == 200
+
+
+def test_compressed_bodies_decode_to_the_same_json(client):
+    """Test that gzip is negotiated through Accept-Encoding."""
+    plain = client.get('/api/timeline')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    response = client.get('/api/timeline', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert json.loads(gzip.decompress(response.data)) == plain.get_json()
+    assert len(plain.get_json()['events']) == 10
+
+    refused = client.get('/api/timeline',
+                         headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in refused.headers
+
+
+def test_rewritten_timeline_invalidates_the_cache(client, analysis):
+    """Test that a new timeline file is served, with a new ETag."""
+    timeline, _ = analysis
+    response = client.get('/api/metadata')
+    etag = response.headers['ETag']
+    assert response.get_json()['metadata']['total_commits'] == 10
+
+    with open(timeline) as f:
+        data = json.load(f)
+    data['metadata']['total_commits'] = 11
+    with open(timeline, 'w') as f:
+        json.dump(data, f)
+    # Make sure the change is seen even on coarse file system timestamps
+    stat = os.stat(timeline)
+    os.utime(timeline, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    response = client.get('/api/metadata', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['metadata']['total_commits'] == 11
+
+
+def test_index_routes(client):
+    """Test the rollup, tree and timeline queries and their bad requests."""
+    rollup = client.get('/api/rollups?resolution=day').get_json()
+    assert sum(bucket['commits'] for bucket in rollup['buckets']) == 10
+
+    tree = client.get('/api/tree?path=src').get_json()
+    assert tree['path'] == 'src'
+    assert client.get('/api/tree?path=missing').status_code == 404
+
+    page = client.get('/api/timeline?path=docs&limit=2').get_json()
+    assert [e['message'] for e in page['events']] == ['Commit 0', 'Commit 2']
+
+    assert client.get('/api/rollups?resolution=year').status_code == 400
+    assert client.get('/api/timeline?start=yesterday').status_code == 400
+
+
+def test_query_routes_reject_bad_arguments(client):
+    """Test that invalid query arguments are 400 Bad Request, not 500."""
+    files = client.get('/api/query/top-files?path=src&order=changes').get_json()
+    assert [f['path'] for f in files['results']] == [
+        'src/file1.txt', 'src/file0.txt', 'src/file2.txt']
+    authors = client.get('/api/query/top-authors').get_json()['results']
+    assert [(a['author'], a['commits']) for a in authors] == [('Test User', 10)]
+    assert client.get('/api/query/activity?resolution=day').status_code == 200
+
+    for url in ('/api/query/top-files?limit=0',
+                '/api/query/top-files?limit=-5',
+                '/api/query/top-files?order=name',
+                '/api/query/top-authors?order=lines',
+                '/api/query/top-authors?limit=0',
+                '/api/query/activity?resolution=year',
+                '/api/query/activity?start=soon'):
+        response = client.get(url)
+        assert response.status_code == 400, url
+        assert 'error' in response.get_json()
+
+
+def test_queries_need_a_database(analysis):
+    """Test that query routes are missing without a database."""
+    client = create_app(analysis[0]).test_client()
+    assert client.get('/api/query/top-files').status_code == 404
+    assert client.get('/api/events').status_code == 404
+
+
+def test_live_events_stream_and_are_capped(repo_path, analysis):
+    """Test that live updates stream as Server-Sent Events and that streams
+    beyond the cap are refused until one closes."""
+    live = LiveTimeline(GitAnalyzer(repo_path, engine='numstat'))
+    client = create_app(analysis[0], live, max_streams=1).test_client()
+
+    response = client.get('/api/events', buffered=False,
+                          headers={'Last-Event-ID': '57'})
+    assert response.mimetype == 'text/event-stream'
+    stream = iter(response.response)
+    assert next(stream) == b'retry: 3000\n\n'
+    # An id from before a restart gets a reset
+    assert next(stream).startswith(b'id: 0\nevent: reset\n')
+
+    refused = client.get('/api/events')
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '30'
+
+    response.close()
+    response = client.get('/api/events', buffered=False)
+    assert response.status_code == 200
+    response.close()
+
+    metadata = client.get('/api/metadata').get_json()
+    assert metadata['metadata']['total_commits'] == 10
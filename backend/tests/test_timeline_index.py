@@ -0,0 +1,121 @@
+"""
+Tests for the timeline query index.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from columnar import ColumnarWriter
+from timeline_index import TimelineIndex
+
+
+def make_event(index, author, paths):
+    """Build a timeline event touching ``paths``."""
+    return {
+        'timestamp': 1000.0 + index,
+        'datetime': '1970-01-01T00:16:40+00:00',
+        'commit_hash': f'{index:040x}',
+        'author': author,
+        'message': f'Commit {index}',
+        'files_changed': [
+            {
+                'filename': p.rsplit('/', 1)[-1],
+                'old_path': p,
+                'new_path': p,
+                'change_type': 'MODIFY',
+                'lines_added': 1,
+                'lines_removed': 0,
+            }
+            for p in paths
+        ],
+        'lines_added': 1,
+        'lines_removed': 0,
+        'cumulative_lines': index + 1,
+        'cumulative_files': len(paths),
+    }
+
+
+@pytest.fixture(params=['memory', 'columnar'])
+def index(request, tmp_path):
+    events = [
+        make_event(0, 'ann', ['services/billing/api.py']),
+        make_event(1, 'bob', ['services/search/index.py']),
+        make_event(2, 'ann', ['services/billing/db.py', 'README.md']),
+        make_event(3, 'bob', ['services/billing/api.py']),
+        make_event(4, 'ann', ['web/app.js']),
+        make_event(5, 'ann', ['services/billing/api.py']),
+    ]
+    if request.param == 'memory':
+        return TimelineIndex(events)
+
+    path = str(tmp_path / 'timeline.ctv')
+    with ColumnarWriter(path) as writer:
+        for event in events:
+            writer.write_event(event)
+        writer.finish({}, {}, {})
+    return TimelineIndex.load(path)
+
+
+def positions(page):
+    return [int(e['commit_hash'], 16) for e in page['events']]
+
+
+def test_time_window(index):
+    """Test that start and end bound the returned events inclusively."""
+    assert positions(index.query(start=1001, end=1003)) == [1, 2, 3]
+
+
+def test_pagination_covers_every_event_once(index):
+    """Test that following next_cursor walks the timeline exactly once."""
+    seen, cursor = [], 0
+    while cursor is not None:
+        page = index.query(cursor=cursor, limit=4)
+        seen.extend(positions(page))
+        cursor = page['next_cursor']
+    assert seen == list(range(6))
+
+
+def test_author_and_path_prefix_filters(index):
+    """Test that filters combine and paginate over matching events only."""
+    assert positions(index.query(path_prefix='services/billing/')) == [0, 2, 3, 5]
+    assert positions(index.query(author='ann', path_prefix='services/')) == [0, 2, 5]
+
+    first = index.query(author='ann', path_prefix='services/', limit=2)
+    assert positions(first) == [0, 2]
+    second = index.query(
+        author='ann', path_prefix='services/', limit=2, cursor=first['next_cursor']
+    )
+    assert positions(second) == [5]
+    assert second['next_cursor'] is None
+
+
+def test_unknown_filters_return_nothing(index):
+    """Test that filters matching nothing give an empty final page."""
+    page = index.query(author='nobody')
+    assert page['events'] == [] and page['next_cursor'] is None
+    assert index.query(path_prefix='docs/')['events'] == []
+
+
+def test_columnar_index_decodes_only_returned_events(tmp_path, monkeypatch):
+    """Test that a columnar index decodes only the events a page returns."""
+    path = str(tmp_path / 'timeline.ctv')
+    with ColumnarWriter(path) as writer:
+        for i in range(50):
+            writer.write_event(make_event(i, 'ann' if i % 2 else 'bob', ['a.py']))
+        writer.finish({}, {}, {})
+
+    decoded = []
+    index = TimelineIndex.load(path)
+    source = index.events.timeline
+    original = source.event
+    monkeypatch.setattr(source, 'event', lambda i: decoded.append(i) or original(i))
+
+    assert len(index) == 50
+    assert positions(index.query(start=1010, end=1012)) == [10, 11, 12]
+    assert positions(index.query(author='ann', path_prefix='a', limit=2)) == [1, 3]
+    assert decoded == [10, 11, 12, 1, 3]
@@ -0,0 +1,81 @@
+"""
+Tests for the directory-tree aggregation index.
+"""
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from tree import DirectoryTree
+
+from .conftest import make_commit
+
+
+def ts(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def build_tree():
+    tree = DirectoryTree()
+    tree.add(make_commit(0, 'alice', timestamp=ts(2024, 1, 2), changes=[
+        ('services/billing/api.py', 10, 0),
+        ('services/billing/models.py', 5, 0),
+        ('README.md', 3, 0),
+    ]))
+    tree.add(make_commit(1, 'bob', timestamp=ts(2024, 2, 6), changes=[
+        ('services/billing/api.py', 4, 2),
+        ('services/auth/login.py', 7, 0),
+    ]))
+    tree.add(make_commit(2, 'alice', timestamp=ts(2024, 3, 5), changes=[
+        ('services/auth/login.py', 1, 1),
+    ]))
+    return tree
+
+
+def test_subtree_rollups():
+    """Test that changes roll up into every ancestor directory."""
+    tree = build_tree()
+
+    root = tree.query('', depth=1)
+    assert root['commits'] == 3
+    assert root['changes'] == 6
+    assert root['lines_added'] == 30
+    assert [child['name'] for child in root['children']] == ['services']
+
+    billing = tree.query('services/billing', depth=0)
+    assert billing['commits'] == 2
+    assert billing['changes'] == 3
+    assert billing['lines_added'] == 19
+    assert billing['lines_removed'] == 2
+    assert billing['authors'] == 2
+    assert billing['first_change'] == ts(2024, 1, 2)
+    assert billing['last_change'] == ts(2024, 2, 6)
+    assert 'children' not in billing
+
+    services = tree.query('services', depth=1)
+    assert services['commits'] == 3
+    assert [c['path'] for c in services['children']] == [
+        'services/auth', 'services/billing'
+    ]
+    assert tree.query('services/missing') is None
+
+
+def test_window_query_and_round_trip():
+    """Test date-window queries and that serialization preserves answers."""
+    tree = build_tree()
+    window = tree.query('services', start=ts(2024, 2, 1), end=ts(2024, 3, 31))
+    assert window['window'] == {
+        'commits': 2, 'changes': 3, 'lines_added': 12, 'lines_removed': 3
+    }
+
+    billing = tree.query('services/billing', start=ts(2024, 2, 13))
+    assert billing['window']['commits'] == 0
+
+    restored = DirectoryTree.from_dict(tree.to_dict())
+    assert restored.query('services', start=ts(2024, 2, 1), depth=2) == \
+        tree.query('services', start=ts(2024, 2, 1), depth=2)
+    assert restored.series('services/auth') == tree.series('services/auth')
+    assert [row[1] for row in tree.series('services/auth')] == [1, 1]
@@ -0,0 +1,78 @@
+"""
+Tests for the NumPy aggregation path.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the backend src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+pytest.importorskip('numpy')
+
+import vectorized
+from aggregator import TimelineAggregator
+from store import CommitStore
+
+from .conftest import make_change, make_commit
+
+
+@pytest.fixture
+def commits():
+    return [
+        make_commit(0, 'alice', [
+            make_change(None, 'src/a.py', 10, change_type='ADD'),
+            make_change(None, 'src/b.py', 5, change_type='ADD'),
+        ]),
+        make_commit(1, 'bob', [('src/a.py', 3, 2)]),
+        # Rename, then re-create the old path as a new file
+        make_commit(2, 'alice', [
+            make_change('src/a.py', 'lib/a.py', change_type='RENAME'),
+        ]),
+        make_commit(3, 'carol', [make_change(None, 'src/a.py', 7, change_type='ADD')]),
+        # Rename onto an existing path merges the records
+        make_commit(4, 'bob', [
+            make_change('src/b.py', 'lib/a.py', 1, 1, change_type='RENAME'),
+        ]),
+        make_commit(5, 'carol', [
+            make_change('src/a.py', None, 0, 7, change_type='DELETE'),
+        ]),
+        # Rename of a path without history
+        make_commit(6, 'alice', [
+            make_change('old/x.py', 'new/x.py', change_type='RENAME'),
+        ]),
+    ]
+
+
+def normalized(files):
+    return {path: dict(stats, authors=sorted(stats['authors']))
+            for path, stats in files.items()}
+
+
+def test_vectorized_stats_match_pure_python(commits):
+    """Test that the NumPy path matches the dict-based aggregation."""
+    aggregator = TimelineAggregator()
+    for commit in commits:
+        aggregator.add_contributor(commit)
+        aggregator.add_files(commit)
+    store = CommitStore(commits)
+
+    assert vectorized.contributor_stats(store) == aggregator.contributor_stats()
+    files = normalized(vectorized.file_stats(store))
+    assert files == normalized(aggregator.file_stats())
+    assert files == normalized(store.file_stats())
+
+    merged = files['lib/a.py']
+    # a.py: add, modify, rename; b.py: add; plus the merging rename
+    assert merged['changes'] == 5
+    assert merged['previous_paths'] == ['src/a.py', 'src/b.py']
+    assert files['src/a.py']['changes'] == 2
+
+
+def test_vectorized_stats_on_empty_store():
+    """Test that an empty store yields empty statistics."""
+    store = CommitStore()
+    assert vectorized.contributor_stats(store) == {}
+    assert vectorized.file_stats(store) == {}
@@ -2,18 +2,47 @@
 Command-line interface for Codebase Timeline Visualizer.
 """
 
+import functools
+import json
 import os
+import sqlite3
 import sys
+import threading
+from datetime import datetime
 from pathlib import Path
 
 import click
-from flask import Flask, send_from_directory
+from flask import Flask, Response, request, send_from_directory
 from flask_cors import CORS
 
-# Add backend to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "backend" / "src"))
+# Add the project root to the path so the backend package is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 
-from main import analyze_repository  # noqa: E402
+from backend.src.analysis_db import AnalysisDatabase  # noqa: E402
+from backend.src.analyzer import ENGINES, GitAnalyzer  # noqa: E402
+from backend.src.batch import analyze_many, read_manifest  # noqa: E402
+from backend.src.exporter import STREAM_FORMATS  # noqa: E402
+from backend.src.html_export import export_html  # noqa: E402
+from backend.src.live import LiveTimeline  # noqa: E402
+from backend.src.main import analyze_repository  # noqa: E402
+from backend.src.profiling import NULL_PROFILER, Profiler  # noqa: E402
+from backend.src.render import render_video  # noqa: E402
+from backend.src.response_cache import ResponseCache  # noqa: E402
+from backend.src.timeline_index import TimelineIndex  # noqa: E402
+
+
+def _parse_time(value):
+    """Parse a query-string time given as a Unix timestamp or ISO date."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid time: {value}") from None
 
 
 @click.group()
@@ -28,14 +57,149 @@ def cli():
 @click.option(
     "-o", "--output", default="timeline.json", help="Output file path for timeline data"
 )
+@click.option(
+    "--cache/--no-cache",
+    default=False,
+    help="Reuse previously extracted commits from the commit cache",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="Directory for the commit cache (default: inside .git)",
+)
+@click.option(
+    "-w",
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of processes used to extract commits (git processes with "
+    "--engine async)",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(ENGINES),
+    default="pydriller",
+    help="Commit extraction engine (numstat and async are faster)",
+)
+@click.option(
+    "--complexity",
+    is_flag=True,
+    help="Compute the cyclomatic complexity of changed files (slower)",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(STREAM_FORMATS),
+    help="Output format (default: guessed from the output extension)",
+)
+@click.option("--since", help="Only analyze commits after this date (git date format)")
+@click.option("--until", help="Only analyze commits before this date (git date format)")
+@click.option("--from-commit", help="First commit of the analyzed range (inclusive)")
+@click.option("--to-commit", help="Last commit of the analyzed range (default: HEAD)")
+@click.option(
+    "--include",
+    "include_paths",
+    multiple=True,
+    help="Only analyze changes under this file or directory (repeatable)",
+)
+@click.option(
+    "--exclude",
+    "exclude_paths",
+    multiple=True,
+    help="Ignore changes under this file or directory (repeatable)",
+)
+@click.option(
+    "--mailmap/--no-mailmap",
+    default=True,
+    help="Merge author identities using the repository's .mailmap",
+)
+@click.option(
+    "--aliases",
+    multiple=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Extra author alias file in .mailmap format (repeatable)",
+)
+@click.option(
+    "--db",
+    "database_path",
+    type=click.Path(dir_okay=False),
+    help="Also write the analysis to this SQLite database for queries",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Report stage timings, throughput and peak memory as JSON",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False),
+    help="Write the --profile report to this file (default: stderr)",
+)
+@click.option(
+    "--cprofile",
+    type=click.Path(dir_okay=False),
+    help="Write cProfile stats of the per-commit loop to this file",
+)
 @click.option("-v", "--verbose", is_flag=True, help="Enable verbose output")
-def analyze(repo_path, output, verbose):
+def analyze(
+    repo_path,
+    output,
+    cache,
+    cache_dir,
+    workers,
+    engine,
+    complexity,
+    output_format,
+    since,
+    until,
+    from_commit,
+    to_commit,
+    include_paths,
+    exclude_paths,
+    mailmap,
+    aliases,
+    database_path,
+    profile,
+    profile_output,
+    cprofile,
+    verbose,
+):
     """Analyze a Git repository and generate timeline data."""
+    profile = profile or profile_output is not None
+    profiler = Profiler(cpu_profile=cprofile) if profile or cprofile else NULL_PROFILER
     try:
         if verbose:
             click.echo(f"Analyzing repository: {repo_path}")
 
-        timeline_data = analyze_repository(repo_path, output)
+        timeline_data = analyze_repository(
+            repo_path,
+            output,
+            use_cache=cache or cache_dir is not None,
+            cache_dir=cache_dir,
+            workers=workers,
+            engine=engine,
+            output_format=output_format,
+            keep_timeline=False,
+            mailmap=mailmap,
+            alias_files=aliases,
+            since=since,
+            until=until,
+            from_commit=from_commit,
+            to_commit=to_commit,
+            include_paths=include_paths,
+            exclude_paths=exclude_paths,
+            complexity=complexity,
+            database_path=database_path,
+            profiler=profiler,
+        )
+
+        if profile:
+            report = json.dumps(profiler.report(), indent=2)
+            if profile_output:
+                with open(profile_output, "w", encoding="utf-8") as f:
+                    f.write(report + "\n")
+            else:
+                click.echo(report, err=True)
 
         if verbose:
             click.echo("Analysis complete!")
@@ -55,13 +219,92 @@ def analyze(repo_path, output, verbose):
         sys.exit(1)
 
 
-@cli.command()
-@click.option("-p", "--port", default=3001, help="Port to run the server on")
+@cli.command("analyze-many")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
 @click.option(
-    "-d", "--data", default="timeline.json", help="Path to timeline data file"
+    "-o",
+    "--output-dir",
+    default="timelines",
+    type=click.Path(file_okay=False),
+    help="Directory for the timeline files and the combined index.json",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Repositories analyzed at once (default: number of CPUs)",
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Per-repository time limit in seconds",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=False,
+    help="Reuse previously extracted commits from each repository's cache",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(ENGINES),
+    default="pydriller",
+    help="Commit extraction engine (numstat and async are faster)",
+)
+@click.option(
+    "--complexity",
+    is_flag=True,
+    help="Compute the cyclomatic complexity of changed files (slower)",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(STREAM_FORMATS),
+    default="json",
+    help="Output format of the timeline files",
 )
-def serve(port, data):
-    """Start the web interface server."""
+def analyze_many_command(
+    manifest, output_dir, jobs, timeout, cache, engine, complexity, output_format
+):
+    """Analyze every repository listed in MANIFEST (one path per line)."""
+    repos = read_manifest(manifest)
+    click.echo(f"Analyzing {len(repos)} repositories into {output_dir}")
+
+    def report(entry):
+        line = f"[{entry['status']}] {entry['repo']} ({entry['seconds']}s)"
+        if entry["status"] != "ok":
+            line += f": {entry['error']}"
+        click.echo(line, err=entry["status"] != "ok")
+
+    index = analyze_many(
+        repos,
+        output_dir,
+        jobs=jobs,
+        timeout=timeout,
+        output_format=output_format,
+        on_result=report,
+        use_cache=cache,
+        engine=engine,
+        complexity=complexity,
+    )
+
+    summary = index["summary"]
+    statuses = ", ".join(f"{n} {s}" for s, n in sorted(summary["statuses"].items()))
+    click.echo(f"Done in {summary['seconds']}s: {statuses}")
+    if summary["statuses"].get("ok", 0) != summary["repositories"]:
+        sys.exit(1)
+
+
+def create_app(data, live=None, database=None, max_streams=None):
+    """Create the web application serving the timeline file ``data``.
+
+    With a :class:`LiveTimeline` ``live``, its continuously updated timeline
+    is served instead, and ``/api/events`` streams its updates to clients
+    as Server-Sent Events. Each stream holds a server thread while it is
+    open; with ``max_streams``, further streams are refused with ``503``
+    so they cannot take every thread. With an :class:`AnalysisDatabase`
+    ``database``, the ``/api/query/*`` endpoints answer aggregate queries
+    from it.
+    """
     app = Flask(__name__, static_folder="../frontend/build", static_url_path="")
     CORS(app)
 
@@ -69,15 +312,360 @@ def serve(port, data):
     def index():
         return send_from_directory(app.static_folder, "index.html")
 
+    loaded = {}  # "index" and its file "signature", or the "failed" one
+    load_lock = threading.Lock()
+    response_cache = ResponseCache()
+    stream_slots = None if max_streams is None else threading.Semaphore(max_streams)
+
+    def current():
+        """Return the timeline index and the generation of its data.
+
+        The timeline file is parsed once, and again only after its
+        modification time or size changed.
+        """
+        if live is not None:
+            # Version first: the index is never older than its version
+            version = live.version
+            return live.index, version
+        try:
+            stat = os.stat(data)
+        except OSError:
+            return None, None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if loaded.get("signature") != signature:
+            with load_lock:
+                if signature not in (loaded.get("signature"), loaded.get("failed")):
+                    try:
+                        index = TimelineIndex.load(data)
+                    except (OSError, ValueError) as e:
+                        # Probably caught mid-write; keep serving the old data
+                        app.logger.warning("Could not load %s: %s", data, e)
+                        loaded["failed"] = signature
+                    else:
+                        loaded.update(index=index, signature=signature)
+        return loaded.get("index"), loaded.get("signature")
+
+    def send_cached(entry):
+        """Send a cached body, compressed if the client accepts it, or
+        ``304 Not Modified`` if the client already has it."""
+        if request.if_none_match.contains_weak(entry.etag):
+            response = Response(status=304)
+        else:
+            encoding = next(
+                (e for e in entry.encodings() if request.accept_encodings[e] > 0),
+                None,
+            )
+            response = Response(entry.encoded(encoding), mimetype=entry.mimetype)
+            if encoding is not None:
+                response.headers["Content-Encoding"] = encoding
+                response_cache.trim()
+        response.set_etag(entry.etag, weak=True)
+        response.vary.add("Accept-Encoding")
+        # Clients may keep responses but revalidate them on every use
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def cached(view):
+        """Answer from the response cache, calling ``view(index)`` on a miss.
+
+        Entries are keyed by path and query string and rebuilt when the
+        timeline data changes.
+        """
+
+        @functools.wraps(view)
+        def wrapper():
+            index, generation = current()
+            if index is None:
+                return {"error": "Timeline data not found"}, 404
+            key = request.full_path
+            entry = response_cache.get(key, generation)
+            if entry is None:
+                response = app.make_response(view(index))
+                if response.status_code != 200:
+                    return response
+                entry = response_cache.put(
+                    key, generation, response.get_data(), response.mimetype
+                )
+            return send_cached(entry)
+
+        return wrapper
+
+    @app.route("/api/metadata")
+    @cached
+    def get_metadata(index):
+        return {"metadata": index.metadata, "contributors": index.contributors}
+
+    @app.route("/api/files")
+    @cached
+    def get_files(index):
+        return {"files": index.files}
+
+    @app.route("/api/rollups")
+    @cached
+    def get_rollups(index):
+        try:
+            return index.rollup(
+                resolution=request.args.get("resolution", "auto"),
+                start=_parse_time(request.args.get("start")),
+                end=_parse_time(request.args.get("end")),
+                max_buckets=request.args.get("max_buckets", type=int),
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+    @app.route("/api/tree")
+    @cached
+    def get_tree(index):
+        try:
+            node = index.directory(
+                path=request.args.get("path", ""),
+                start=_parse_time(request.args.get("start")),
+                end=_parse_time(request.args.get("end")),
+                depth=request.args.get("depth", 1, type=int),
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        if node is None:
+            return {"error": "Directory not found"}, 404
+        return node
+
     @app.route("/api/timeline")
-    def get_timeline():
-        if os.path.exists(data):
-            return send_from_directory(".", data)
-        return {"error": "Timeline data not found"}, 404
+    @cached
+    def get_timeline(index):
+        try:
+            return index.query(
+                start=_parse_time(request.args.get("start")),
+                end=_parse_time(request.args.get("end")),
+                author=request.args.get("author"),
+                path_prefix=request.args.get("path"),
+                cursor=request.args.get("cursor", 0, type=int),
+                limit=request.args.get("limit", type=int),
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+    def database_query(view):
+        """Answer a query from ``database``, through the response cache.
 
-    click.echo(f"Starting server on http://localhost:{port}")
-    click.echo(f"Timeline data: {data}")
-    app.run(port=port, debug=True)
+        ``view()`` returns the result rows; a ValueError is a bad request.
+        """
+
+        @functools.wraps(view)
+        def wrapper():
+            if database is None:
+                return {"error": "Queries are only available with --db"}, 404
+            try:
+                generation = database.generation
+            except OSError:
+                return {"error": "Analysis database not found"}, 404
+            key = request.full_path
+            entry = response_cache.get(key, generation)
+            if entry is None:
+                try:
+                    results = view()
+                except ValueError as e:
+                    return {"error": str(e)}, 400
+                response = app.make_response({"results": results})
+                entry = response_cache.put(
+                    key, generation, response.get_data(), response.mimetype
+                )
+            return send_cached(entry)
+
+        return wrapper
+
+    def query_range():
+        return {
+            "start": _parse_time(request.args.get("start")),
+            "end": _parse_time(request.args.get("end")),
+            "path": request.args.get("path"),
+        }
+
+    @app.route("/api/query/top-files")
+    @database_query
+    def query_top_files():
+        return database.top_files(
+            limit=request.args.get("limit", 20, type=int),
+            order=request.args.get("order", "churn"),
+            **query_range(),
+        )
+
+    @app.route("/api/query/top-authors")
+    @database_query
+    def query_top_authors():
+        return database.top_authors(
+            limit=request.args.get("limit", 20, type=int),
+            order=request.args.get("order", "commits"),
+            **query_range(),
+        )
+
+    @app.route("/api/query/activity")
+    @database_query
+    def query_activity():
+        return database.activity(
+            resolution=request.args.get("resolution", "week"),
+            author=request.args.get("author"),
+            by_author=request.args.get("by") == "author",
+            **query_range(),
+        )
+
+    @app.route("/api/events")
+    def get_events():
+        if live is None:
+            return {"error": "Live updates are only available with --watch"}, 404
+        if stream_slots is not None and not stream_slots.acquire(blocking=False):
+            response = app.make_response(
+                ({"error": "Too many open live update streams"}, 503)
+            )
+            response.headers["Retry-After"] = "30"
+            return response
+        last_id = request.headers.get("Last-Event-ID", type=int)
+        if last_id is None:
+            last_id = request.args.get("last_id", type=int)
+
+        def stream():
+            yield "retry: 3000\n\n"
+            for update in live.updates(last_id):
+                if update is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                update_id, update_type, payload = update
+                yield f"id: {update_id}\nevent: {update_type}\ndata: {payload}\n\n"
+
+        response = Response(
+            stream(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        if stream_slots is not None:
+            # Called by the server once the client is gone, whether or not
+            # the stream was ever started
+            response.call_on_close(stream_slots.release)
+        return response
+
+    return app
+
+
+@cli.command()
+@click.option("-p", "--port", default=3001, help="Port to run the server on")
+@click.option(
+    "-d", "--data", default="timeline.json", help="Path to timeline data file"
+)
+@click.option(
+    "--watch",
+    "watch_repo",
+    type=click.Path(exists=True, file_okay=False),
+    help="Serve this repository's timeline live instead of --data, pushing "
+    "new commits to clients",
+)
+@click.option(
+    "--interval",
+    default=2.0,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds between checks for new commits in --watch mode",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(ENGINES),
+    default="numstat",
+    help="Commit extraction engine for --watch mode",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    help="Keep extracted commits in the commit cache in --watch mode",
+)
+@click.option(
+    "--host",
+    default="127.0.0.1",
+    show_default=True,
+    help="Interface to listen on (0.0.0.0 for all)",
+)
+@click.option(
+    "--production",
+    is_flag=True,
+    help="Serve with the multi-threaded waitress WSGI server instead of the "
+    "debug server",
+)
+@click.option(
+    "--threads",
+    default=8,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Request threads in --production mode; with --watch, at most half "
+    "of them serve /api/events streams and further clients get 503",
+)
+@click.option(
+    "--db",
+    "database_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Analysis database (from analyze --db) answering /api/query/*",
+)
+def serve(
+    port,
+    data,
+    watch_repo,
+    interval,
+    engine,
+    cache,
+    host,
+    production,
+    threads,
+    database_path,
+):
+    """Start the web interface server.
+
+    API responses are cached in memory, compressed (gzip, or brotli when
+    installed) and validated with ETags; the timeline file is parsed again
+    only when it changes on disk.
+    """
+    if production:
+        try:
+            import waitress
+        except ImportError:
+            raise click.ClickException(
+                "--production needs waitress (pip install waitress)"
+            )
+        if watch_repo and threads < 2:
+            raise click.ClickException(
+                "--production --watch needs --threads 2 or more, so live "
+                "update streams leave threads for other requests"
+            )
+
+    database = None
+    if database_path:
+        try:
+            database = AnalysisDatabase(database_path)
+        except (ValueError, sqlite3.DatabaseError) as e:
+            raise click.ClickException(str(e))
+
+    live = None
+    stop = threading.Event()
+    if watch_repo:
+        click.echo(f"Analyzing {watch_repo}...")
+        live = LiveTimeline(GitAnalyzer(watch_repo, use_cache=cache, engine=engine))
+        threading.Thread(target=live.watch, args=(interval, stop), daemon=True).start()
+    # Long-lived event streams must not take all of waitress' threads
+    max_streams = threads // 2 if production else None
+    app = create_app(data, live, database, max_streams)
+
+    click.echo(f"Starting server on http://{host}:{port}")
+    if live is not None:
+        click.echo(f"Watching {watch_repo} (live updates at /api/events)")
+    else:
+        click.echo(f"Timeline data: {data}")
+    if database is not None:
+        click.echo(f"Analysis database: {database_path} (queries at /api/query/*)")
+
+    try:
+        if production:
+            waitress.serve(app, host=host, port=port, threads=threads)
+        elif live is not None:
+            # The reloader would run a second watcher in a child process
+            app.run(host=host, port=port, debug=True, threaded=True, use_reloader=False)
+        else:
+            app.run(host=host, port=port, debug=True)
+    finally:
+        stop.set()
 
 
 @cli.command()
@@ -90,16 +678,70 @@ def serve(port, data):
     help="Export format",
 )
 @click.option("-o", "--output", help="Output file path")
-def export(data_file, format, output):
-    """Export timeline visualization to different formats."""
+@click.option("--width", default=1280, show_default=True, help="Video width in pixels")
+@click.option("--height", default=720, show_default=True, help="Video height in pixels")
+@click.option("--fps", default=30, show_default=True, help="Video frames per second")
+@click.option(
+    "--duration",
+    default=60.0,
+    show_default=True,
+    help="Video length in seconds, spread evenly over the history",
+)
+@click.option(
+    "--depth",
+    default=2,
+    show_default=True,
+    help="Directory depth of the heatmap cells",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    help="Frame rendering processes (default: one per CPU)",
+)
+@click.option("--title", help="Page title of HTML exports (default: file name)")
+def export(data_file, format, output, width, height, fps, duration, depth, jobs, title):
+    """Export timeline visualization to different formats.
+
+    HTML exports are a single page that works offline. MP4 and GIF
+    exports render a heatmap of activity per directory and need ffmpeg on
+    the PATH.
+    """
     if not output:
         base_name = Path(data_file).stem
         output = f"{base_name}_timeline.{format}"
 
     click.echo(f"Exporting {data_file} to {output} (format: {format})")
 
-    # TODO: Implement actual export functionality
-    click.echo("Export functionality coming soon!")
+    try:
+        if format == "html":
+            stats = export_html(data_file, output, title=title)
+        else:
+            stats = render_video(
+                data_file,
+                output,
+                output_format=format,
+                fps=fps,
+                width=width,
+                height=height,
+                duration=duration,
+                depth=depth,
+                jobs=jobs,
+            )
+    except (RuntimeError, ValueError) as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    if format == "html":
+        click.echo(
+            f"Wrote {stats['events']} events in {stats['chunks']} chunks "
+            f"to {output} ({stats['bytes'] / 1024:.0f} KiB)"
+        )
+    else:
+        click.echo(
+            f"Wrote {stats['frames']} frames to {output} "
+            f"({stats['rendered']} rendered, {stats['reused']} unchanged)"
+        )
 
 
 if __name__ == "__main__":
@@ -1,28 +1,113 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './App.css';
 import Timeline from './components/Timeline';
 
+// Events are fetched from the paginated API one block of this many commits
+// at a time, only around the position being viewed; the overview of the
+// whole history comes from the pre-aggregated rollups instead.
+const PAGE_SIZE = 2000;
+// Blocks kept in memory; the least recently viewed one is dropped first
+const MAX_PAGES = 8;
+// Buckets requested for the overview (the API picks the resolution)
+const OVERVIEW_BUCKETS = 1000;
+
+// Turn rollup buckets into the points of the cumulative lines overview
+function overviewPoints(buckets) {
+  let cumulative = 0;
+  let commits = 0;
+  return buckets.map(bucket => {
+    cumulative += bucket.lines_added - bucket.lines_removed;
+    commits += bucket.commits;
+    return { timestamp: bucket.start, cumulative_lines: cumulative, commits };
+  });
+}
+
 function App() {
-  const [timelineData, setTimelineData] = useState(null);
+  const [summary, setSummary] = useState(null);
+  const [overview, setOverview] = useState([]);
+  const [pages, setPages] = useState(() => new Map());
   const [isPlaying, setIsPlaying] = useState(false);
   const [currentTime, setCurrentTime] = useState(0);
-  const [maxTime, setMaxTime] = useState(100);
+  const requested = useRef(new Set());
+
+  const totalCommits = summary ? summary.metadata.total_commits : 0;
+  const maxTime = Math.max(totalCommits - 1, 0);
+  const page = Math.floor(currentTime / PAGE_SIZE);
 
   useEffect(() => {
-    // Try to load timeline data from API
-    fetch('/api/timeline')
+    let cancelled = false;
+
+    fetch('/api/metadata')
       .then(response => response.json())
       .then(data => {
-        setTimelineData(data);
-        if (data.timeline && data.timeline.length > 0) {
-          setMaxTime(data.timeline.length - 1);
-        }
+        if (!cancelled && data.metadata) setSummary(data);
+      })
+      .catch(error => {
+        console.log('No timeline metadata available:', error);
+      });
+
+    fetch(`/api/rollups?max_buckets=${OVERVIEW_BUCKETS}`)
+      .then(response => response.json())
+      .then(rollup => {
+        if (!cancelled && rollup.buckets) setOverview(overviewPoints(rollup.buckets));
       })
       .catch(error => {
-        console.log('No timeline data available:', error);
+        console.log('No timeline rollups available:', error);
       });
+
+    return () => {
+      cancelled = true;
+    };
   }, []);
 
+  // Load the block of events around the current position, and the next one
+  // while playing, unless they are loaded or being loaded already
+  useEffect(() => {
+    if (!totalCommits) return;
+    const wanted = isPlaying ? [page, page + 1] : [page];
+    wanted
+      .filter(n => n * PAGE_SIZE < totalCommits && !requested.current.has(n))
+      .forEach(n => {
+        requested.current.add(n);
+        fetch(`/api/timeline?cursor=${n * PAGE_SIZE}&limit=${PAGE_SIZE}`)
+          .then(response => response.json())
+          .then(data => {
+            if (!data.events) return;
+            setPages(current => {
+              const next = new Map(current);
+              next.set(n, data.events);
+              while (next.size > MAX_PAGES) {
+                const oldest = next.keys().next().value;
+                next.delete(oldest);
+                requested.current.delete(oldest);
+              }
+              return next;
+            });
+          })
+          .catch(error => {
+            requested.current.delete(n);
+            console.log('No timeline data available:', error);
+          });
+      });
+  }, [page, isPlaying, totalCommits]);
+
+  // Keep the viewed block most recently used
+  useEffect(() => {
+    setPages(current => {
+      if (!current.has(page) || [...current.keys()].pop() === page) return current;
+      const next = new Map(current);
+      const events = next.get(page);
+      next.delete(page);
+      next.set(page, events);
+      return next;
+    });
+  }, [page]);
+
+  const eventAt = (time) => {
+    const events = pages.get(Math.floor(time / PAGE_SIZE));
+    return events ? events[time % PAGE_SIZE] : undefined;
+  };
+
   const handlePlayPause = () => {
     setIsPlaying(!isPlaying);
   };
@@ -33,9 +118,13 @@ function App() {
   };
 
   const formatTime = (time) => {
-    if (!timelineData || !timelineData.timeline) return '00:00';
-    const commit = timelineData.timeline[time];
-    if (!commit) return '00:00';
+    const commit = eventAt(time);
+    if (!commit) {
+      if (time === maxTime && summary && summary.metadata.date_range.end) {
+        return new Date(summary.metadata.date_range.end).toLocaleDateString();
+      }
+      return '00:00';
+    }
     const date = new Date(commit.timestamp * 1000);
     return date.toLocaleDateString();
   };
@@ -65,11 +154,11 @@ function App() {
             </span>
           </div>
           <div className="visualization-area">
-            {timelineData ? (
+            {summary ? (
               <Timeline
-                data={timelineData}
-                currentTime={currentTime}
-                onTimeChange={setCurrentTime}
+                overview={overview}
+                events={pages.get(page) || []}
+                current={eventAt(currentTime)}
               />
             ) : (
               <div className="placeholder">
@@ -85,4 +174,4 @@ function App() {
   );
 }
 
-export default App;
\ No newline at end of file
+export default App;
@@ -2,12 +2,14 @@ import React, { useEffect, useRef, useState } from 'react';
 import * as d3 from 'd3';
 import './Timeline.css';
 
-const Timeline = ({ data, currentTime, onTimeChange }) => {
+// Draws the whole history from the rollup overview, with the commits of the
+// loaded block as points and the current commit highlighted
+const Timeline = ({ overview, events, current }) => {
   const svgRef = useRef();
   const [dimensions, setDimensions] = useState({ width: 800, height: 400 });
 
   useEffect(() => {
-    if (!data || !data.timeline) return;
+    if (!overview || !overview.length) return;
 
     const svg = d3.select(svgRef.current);
     svg.selectAll('*').remove();
@@ -20,11 +22,11 @@ const Timeline = ({ data, currentTime, onTimeChange }) => {
 
     // Create scales
     const xScale = d3.scaleTime()
-      .domain(d3.extent(data.timeline, d => new Date(d.timestamp * 1000)))
+      .domain(d3.extent(overview, d => new Date(d.timestamp * 1000)))
       .range([0, innerWidth]);
 
     const yScale = d3.scaleLinear()
-      .domain([0, d3.max(data.timeline, d => d.cumulative_lines)])
+      .domain([0, d3.max(overview, d => d.cumulative_lines)])
       .range([innerHeight, 0]);
 
     // Create main group
@@ -46,15 +48,15 @@ const Timeline = ({ data, currentTime, onTimeChange }) => {
       .y(d => yScale(d.cumulative_lines));
 
     g.append('path')
-      .datum(data.timeline)
+      .datum(overview)
       .attr('fill', 'none')
       .attr('stroke', '#007bff')
       .attr('stroke-width', 2)
       .attr('d', line);
 
-    // Add commit points
+    // Add commit points for the loaded block only
     g.selectAll('.commit-point')
-      .data(data.timeline)
+      .data(events)
       .enter()
       .append('circle')
       .attr('class', 'commit-point')
@@ -65,7 +67,18 @@ const Timeline = ({ data, currentTime, onTimeChange }) => {
       .attr('stroke', '#fff')
       .attr('stroke-width', 2);
 
-  }, [data, dimensions]);
+    if (current) {
+      g.append('circle')
+        .attr('class', 'current-commit')
+        .attr('cx', xScale(new Date(current.timestamp * 1000)))
+        .attr('cy', yScale(current.cumulative_lines))
+        .attr('r', 6)
+        .attr('fill', '#dc3545')
+        .attr('stroke', '#fff')
+        .attr('stroke-width', 2);
+    }
+
+  }, [overview, events, current, dimensions]);
 
   useEffect(() => {
     const handleResize = () => {